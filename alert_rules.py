@@ -0,0 +1,215 @@
+# Backend/alert_rules.py
+
+import argparse
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import cast, DateTime, exists, func, literal, or_, select, String, union_all, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+import models, kpi_engine
+
+# Every rule is one INSERT ... SELECT or UPDATE over the rows that changed since
+# the last run, found through the updated_at indexes. Only the due date rule and
+# the stalled rule depend on the calendar; they look at the days that passed
+# since the last run, so a run with nothing new touches a handful of index pages.
+STATE_NAME = "alert_rules"
+
+ALERT_OVERDUE_TASK = "Overdue Task"
+ALERT_BUDGET_OVERRUN = "Budget Overrun"
+ALERT_STALLED_PROJECT = "Stalled Project"
+
+OVERDUE_STATUS = "Overdue"
+# Projects in these statuses are not expected to move, so they never stall
+INACTIVE_PROJECT_STATUSES = ("Completed", "Canceled", "On Hold")
+# A project stalls when neither its tasks nor its budget moved for this many days
+STALL_DAYS = int(os.getenv("ALERT_RULES_STALL_DAYS", "14"))
+
+
+def _db_time(value: datetime):
+    # updated_at is written by CURRENT_TIMESTAMP, which has no fractional seconds, while
+    # bound datetimes carry them; datetime() brings the bound side to the same text format
+    return func.datetime(literal(value, DateTime))
+
+
+def _changed_tasks(watermark: datetime):
+    # Without ANALYZE statistics SQLite prefers the status and due date indexes, which
+    # cover large parts of the table; going through the ids keeps the scan on ix_tasks_updated_at
+    return select(models.Task.id).where(models.Task.updated_at >= _db_time(watermark))
+
+
+def _open_alert(alert_type: str, *conditions):
+    Alert = models.Alert
+    return exists().where(Alert.type == alert_type, Alert.is_resolved.is_(False), *conditions)
+
+
+def _raise_alerts(db: Session, alert_type: str, rows, today: date) -> List[Optional[int]]:
+    """
+    Inserts one unresolved alert per row of `rows`, a SELECT of (message,
+    project_id, task_id), with a single INSERT ... SELECT.
+
+    Returns:
+        list: The project ids of the new alerts.
+    """
+    Alert = models.Alert
+    source = select(
+        rows.c.message, rows.c.project_id, rows.c.task_id,
+        literal(alert_type), literal(today), literal(False),
+    )
+    stmt = (
+        sqlite_insert(Alert)
+        .from_select(["message", "project_id", "task_id", "type", "created_at", "is_resolved"], source)
+        .returning(Alert.project_id)
+    )
+    return list(db.execute(stmt).scalars())
+
+
+def flag_overdue_tasks(db: Session, watermark: Optional[datetime], ran_on: Optional[date], today: date) -> List[Optional[int]]:
+    """
+    Moves open tasks past their due date to "Overdue". Only tasks changed since
+    `watermark` or due since `ran_on` can have crossed their due date.
+
+    Returns:
+        list: The project ids of the flagged tasks.
+    """
+    Task = models.Task
+    stmt = update(Task).where(
+        func.coalesce(Task.status, "").not_in((*kpi_engine.DONE_TASK_STATUSES, OVERDUE_STATUS)),
+        Task.completion_date.is_(None),
+        Task.due_date < today,
+    )
+    if watermark is not None and ran_on is not None:
+        crossed = select(Task.id).where(Task.due_date >= ran_on, Task.due_date < today)
+        stmt = stmt.where(Task.id.in_(union_all(_changed_tasks(watermark), crossed)))
+    stmt = stmt.values(status=OVERDUE_STATUS).returning(Task.project_id)
+    return list(db.execute(stmt.execution_options(synchronize_session=False)).scalars())
+
+
+def raise_overdue_task_alerts(db: Session, watermark: Optional[datetime], today: date) -> List[Optional[int]]:
+    # Tasks flagged by this run carry a fresh updated_at, so they are always looked at
+    Task = models.Task
+    rows = select(
+        (literal("Task '") + func.coalesce(Task.title, "") + "' is overdue (due " + cast(Task.due_date, String) + ")").label("message"),
+        Task.project_id,
+        Task.id.label("task_id"),
+    ).where(
+        # Wrapped so SQLite drives the scan from the changed ids rather than every overdue task
+        func.coalesce(Task.status, "") == OVERDUE_STATUS,
+        ~_open_alert(ALERT_OVERDUE_TASK, models.Alert.task_id == Task.id),
+    )
+    if watermark is not None:
+        rows = rows.where(Task.id.in_(_changed_tasks(watermark)))
+    return _raise_alerts(db, ALERT_OVERDUE_TASK, rows.subquery(), today)
+
+
+def raise_budget_overrun_alerts(db: Session, watermark: Optional[datetime], today: date) -> List[Optional[int]]:
+    # budget_used and budget_status are written by the budget forecast job, which moves updated_at
+    Project = models.Project
+    rows = select(
+        (literal("Project '") + func.coalesce(Project.project_name, "") + "' is over budget").label("message"),
+        Project.id.label("project_id"),
+        literal(None, type_=models.Alert.task_id.type).label("task_id"),
+    ).where(
+        or_(Project.budget_status == "Over Budget", Project.budget_used > Project.budget_total),
+        ~_open_alert(ALERT_BUDGET_OVERRUN, models.Alert.project_id == Project.id),
+    )
+    if watermark is not None:
+        rows = rows.where(Project.updated_at >= _db_time(watermark))
+    return _raise_alerts(db, ALERT_BUDGET_OVERRUN, rows.subquery(), today)
+
+
+def raise_stalled_project_alerts(db: Session, today: date) -> List[Optional[int]]:
+    """
+    Raises an alert for active projects without task changes or budget entries
+    in the last STALL_DAYS days. Recently changed tasks are read through
+    ix_tasks_updated_at and budget entries through the daily rollups, so the
+    cost follows recent activity rather than the size of the task table.
+    """
+    Project, Task, Rollup = models.Project, models.Task, models.BudgetRollup
+    cutoff = today - timedelta(days=STALL_DAYS)
+    # NOT EXISTS rather than NOT IN: a task without a project would make NOT IN false for every project
+    active_tasks = exists().where(
+        Task.project_id == Project.id, Task.updated_at >= _db_time(datetime.combine(cutoff, datetime.min.time()))
+    )
+    recent_spend = exists().where(Rollup.project_id == Project.id, Rollup.bucket == "day", Rollup.period_start >= cutoff)
+    rows = select(
+        (literal("Project '") + func.coalesce(Project.project_name, "") + f"' has had no activity for {STALL_DAYS} days").label("message"),
+        Project.id.label("project_id"),
+        literal(None, type_=models.Alert.task_id.type).label("task_id"),
+    ).where(
+        func.coalesce(Project.status, "").not_in(INACTIVE_PROJECT_STATUSES),
+        or_(Project.start_date.is_(None), Project.start_date < cutoff),
+        ~active_tasks,
+        ~recent_spend,
+        ~_open_alert(ALERT_STALLED_PROJECT, models.Alert.project_id == Project.id),
+    )
+    return _raise_alerts(db, ALERT_STALLED_PROJECT, rows.subquery(), today)
+
+
+def _stamp_unversioned(db: Session) -> None:
+    # Databases migrated from before updated_at existed have no column default, so
+    # rows written there without the ORM start out NULL; they count as changed now
+    for model in (models.Task, models.Project):
+        db.execute(
+            update(model).where(model.updated_at.is_(None)).values(updated_at=func.current_timestamp())
+            .execution_options(synchronize_session=False)
+        )
+
+
+def run(db: Session, today: Optional[date] = None) -> Dict[str, int]:
+    """
+    Runs every rule once over the rows changed since the previous run, in one
+    transaction, and moves the watermark. The first run looks at every row.
+
+    Returns:
+        dict: The number of tasks flagged and of alerts raised per rule.
+    """
+    today = today or date.today()
+    state = db.get(models.AlertRuleState, STATE_NAME)
+    watermark = state.watermark if state else None
+    ran_on = state.ran_on if state else None
+
+    # The first write takes SQLite's write lock and holds it to the commit, so every
+    # change stamped before the new watermark is visible to this run
+    _stamp_unversioned(db)
+    flagged = flag_overdue_tasks(db, watermark, ran_on, today)
+    overdue_alerts = raise_overdue_task_alerts(db, watermark, today)
+    budget_alerts = raise_budget_overrun_alerts(db, watermark, today)
+    stalled_alerts = raise_stalled_project_alerts(db, today) if ran_on != today else []
+
+    # Taken last, so the tasks this run flagged are not looked at again next time
+    finished = db.execute(select(func.current_timestamp())).scalar()
+    db.execute(
+        sqlite_insert(models.AlertRuleState)
+        .values(name=STATE_NAME, watermark=finished, ran_on=today)
+        .on_conflict_do_update(index_elements=["name"], set_={"watermark": finished, "ran_on": today})
+    )
+    kpi_engine.refresh_projects(db, {*flagged, *overdue_alerts, *budget_alerts, *stalled_alerts})
+    db.commit()
+    return {
+        "overdue_tasks": len(flagged),
+        "overdue_task_alerts": len(overdue_alerts),
+        "budget_overrun_alerts": len(budget_alerts),
+        "stalled_project_alerts": len(stalled_alerts),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Flag overdue tasks and raise alerts for changes since the last run.")
+    parser.add_argument("--today", type=date.fromisoformat, default=None, help="Evaluate the rules as of this day (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        result = run(db, today=args.today)
+        print(", ".join(f"{count} {name.replace('_', ' ')}" for name, count in result.items()))
+        print(f"Ran in {time.perf_counter() - started:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# Backend/async_crud.py
+
+import functools
+from typing import Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import crud
+
+
+def _async_version(fn: Callable) -> Callable:
+    """
+    Wraps a sync crud function so it can be awaited with an AsyncSession.
+
+    The function runs through AsyncSession.run_sync, which hands it the sync
+    Session behind the AsyncSession, so crud.py remains the single
+    implementation for the API and for scripts. Only the driver I/O is awaited
+    (aiosqlite by default); the crud code itself, ORM hydration and any
+    pydantic validation still run on the event loop, so expensive functions
+    hold it for their CPU time.
+    """
+    @functools.wraps(fn)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        return await db.run_sync(fn, *args, **kwargs)
+    return wrapper
+
+
+# --- List Filters ---
+count_rows = _async_version(crud.count_rows)
+list_records = _async_version(crud.list_records)
+get_record = _async_version(crud.get_record)
+
+# --- Employee CRUD Operations ---
+get_employee = _async_version(crud.get_employee)
+get_employee_by_email = _async_version(crud.get_employee_by_email)
+get_employees = _async_version(crud.get_employees)
+create_employee = _async_version(crud.create_employee)
+update_employee = _async_version(crud.update_employee)
+delete_employee = _async_version(crud.delete_employee)
+get_employee_workloads = _async_version(crud.get_employee_workloads)
+roll_over_employee_workload = _async_version(crud.roll_over_employee_workload)
+
+# --- Customer CRUD Operations ---
+get_customer = _async_version(crud.get_customer)
+get_customers = _async_version(crud.get_customers)
+get_customer_overview = _async_version(crud.get_customer_overview)
+create_customer = _async_version(crud.create_customer)
+update_customer = _async_version(crud.update_customer)
+delete_customer = _async_version(crud.delete_customer)
+
+# --- Project CRUD Operations ---
+get_project = _async_version(crud.get_project)
+get_projects = _async_version(crud.get_projects)
+get_project_detail = _async_version(crud.get_project_detail)
+create_project = _async_version(crud.create_project)
+update_project = _async_version(crud.update_project)
+delete_project = _async_version(crud.delete_project)
+
+# --- Task CRUD Operations ---
+get_task = _async_version(crud.get_task)
+get_tasks = _async_version(crud.get_tasks)
+create_task = _async_version(crud.create_task)
+update_task = _async_version(crud.update_task)
+delete_task = _async_version(crud.delete_task)
+
+# --- Alert CRUD Operations ---
+get_alert = _async_version(crud.get_alert)
+get_alerts = _async_version(crud.get_alerts)
+create_alert = _async_version(crud.create_alert)
+update_alert = _async_version(crud.update_alert)
+delete_alert = _async_version(crud.delete_alert)
+
+# --- Budget History CRUD Operations ---
+get_budget_history = _async_version(crud.get_budget_history)
+get_budget_histories = _async_version(crud.get_budget_histories)
+create_budget_history = _async_version(crud.create_budget_history)
+get_budget_series = _async_version(crud.get_budget_series)
+
+# --- Budget Forecast ---
+get_budget_forecast = _async_version(crud.get_budget_forecast)
+refresh_budget_forecast = _async_version(crud.refresh_budget_forecast)
+
+# --- Alert Rules ---
+run_alert_rules = _async_version(crud.run_alert_rules)
+
+# --- Search ---
+search = _async_version(crud.search)
+
+# --- Project KPI CRUD Operations ---
+get_project_kpi = _async_version(crud.get_project_kpi)
+get_project_kpis = _async_version(crud.get_project_kpis)
+get_project_kpi_by_project = _async_version(crud.get_project_kpi_by_project)
+create_project_kpi = _async_version(crud.create_project_kpi)
+update_project_kpi = _async_version(crud.update_project_kpi)
+delete_project_kpi = _async_version(crud.delete_project_kpi)
+recompute_project_kpis = _async_version(crud.recompute_project_kpis)
+
+# --- Bulk Operations ---
+bulk_create_tasks = _async_version(crud.bulk_create_tasks)
+bulk_create_alerts = _async_version(crud.bulk_create_alerts)
+bulk_create_budget_histories = _async_version(crud.bulk_create_budget_histories)
+bulk_upsert_project_kpis = _async_version(crud.bulk_upsert_project_kpis)
+
+# --- Dashboard Aggregates ---
+get_dashboard_summary = _async_version(crud.get_dashboard_summary)
+
+# --- KPI Classification Jobs ---
+get_kpi_job = _async_version(crud.get_kpi_job)
+create_kpi_job = _async_version(crud.create_kpi_job)
+get_unfinished_kpi_job_ids = _async_version(crud.get_unfinished_kpi_job_ids)
+update_kpi_job = _async_version(crud.update_kpi_job)
+
+# --- Llama3 KPI Classification ---
+# These already await the Llama3 agent and take the AsyncSession directly
+classify_and_update_project_kpi_class = crud.classify_and_update_project_kpi_class_async
+classify_project_kpis_batch = crud.classify_project_kpis_batch
@@ -0,0 +1,171 @@
+# Backend/bench_async_db.py
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from datetime import date
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+import async_crud, crud, models, schemas
+from database import make_async_engine, make_engine
+
+DEFAULT_CONCURRENCY = (50, 100, 200, 500)
+
+
+def seed(db_path: str, projects: int, tasks_per_project: int) -> None:
+    engine = create_engine(f"sqlite:///{db_path}")
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Project), [
+            {"project_name": f"Project {i}", "status": "Active", "budget_total": 100000.0, "start_date": date(2024, 1, 1)}
+            for i in range(projects)
+        ])
+        conn.execute(insert(models.Task), [
+            {"project_id": p + 1, "title": f"Task {t}", "status": "In Progress", "priority": "Medium", "due_date": date(2025, 1, 1)}
+            for p in range(projects) for t in range(tasks_per_project)
+        ])
+    engine.dispose()
+
+
+def build_app(db_path: str) -> FastAPI:
+    """Serves the task list twice: through the sync Session and through the AsyncSession."""
+    # Both paths read through reader engines built from the configured DB_PROFILE
+    engine = make_engine(f"sqlite:///{db_path}", writer=False)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    async_engine = make_async_engine(f"sqlite:///{db_path}", writer=False)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/sync/tasks/", response_model=List[schemas.Task])
+    def read_tasks_sync(limit: int = 100, db: Session = Depends(get_db)):
+        return crud.get_tasks(db, limit=limit)
+
+    @app.get("/async/tasks/", response_model=List[schemas.Task])
+    async def read_tasks_async(limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+        return await async_crud.get_tasks(db, limit=limit)
+
+    return app
+
+
+def _serve(db_path: str, port: int) -> None:
+    import uvicorn
+    uvicorn.run(build_app(db_path), host="127.0.0.1", port=port, log_level="critical")
+
+
+async def _wait_until_up(base_url: str, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                await client.get(f"{base_url}/docs")
+                return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.1)
+
+
+async def run_load(url: str, concurrency: int, requests: int, timeout: float = 30.0) -> Dict:
+    """
+    Sends `requests` GETs to `url` from `concurrency` concurrent clients. A request
+    that takes longer than `timeout` seconds counts as an error.
+
+    Returns:
+        dict: Requests/sec, p50/p95 latency in milliseconds and the error count.
+    """
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        async def client_loop():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                try:
+                    response = await client.get(url)
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    percentile = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(0.50), 1),
+        "p95_ms": round(percentile(0.95), 1),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare requests/sec of the sync (threadpool) and async database paths under concurrent load."
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=list(DEFAULT_CONCURRENCY))
+    parser.add_argument("--requests", type=int, default=2000, help="Requests sent per path and concurrency level")
+    parser.add_argument("--limit", type=int, default=50, help="Tasks returned per request")
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--tasks-per-project", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="Per-request timeout; a starved threadpool shows up as timed-out requests")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        seed(db_path, args.projects, args.tasks_per_project)
+
+        for concurrency in args.concurrency:
+            for path in ("sync", "async"):
+                # Every measurement gets a fresh server in its own process, so the load
+                # generator does not share its GIL and a starved threadpool from one run
+                # cannot slow down the next
+                server = multiprocessing.Process(target=_serve, args=(db_path, args.port), daemon=True)
+                server.start()
+                try:
+                    base_url = f"http://127.0.0.1:{args.port}"
+                    asyncio.run(_wait_until_up(base_url))
+                    url = f"{base_url}/{path}/tasks/?limit={args.limit}"
+                    result = asyncio.run(run_load(url, concurrency, args.requests, args.timeout))
+                    result["path"] = path
+                    print(json.dumps(result))
+                finally:
+                    server.terminate()
+                    server.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# Backend/bench_serialization.py
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import date
+from typing import Dict, List, Optional
+
+from fastapi import Depends, FastAPI, Response
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+
+import crud, fast_json, models, schemas
+
+DEFAULT_LIMITS = (100, 1000, 5000)
+TASK_FIELDS = fast_json.schema_fields(schemas.Task)
+
+
+def seed(db_path: str, tasks: int) -> None:
+    engine = create_engine(f"sqlite:///{db_path}")
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Project), [
+            {"project_name": "Project 1", "status": "Active", "budget_total": 100000.0, "start_date": date(2024, 1, 1)}
+        ])
+        conn.execute(insert(models.Task), [
+            {
+                "project_id": 1,
+                "title": f"Task {t}",
+                "description": f"Description of task {t}",
+                "status": "Done" if t % 3 == 0 else "In Progress",
+                "priority": ("Low", "Medium", "High")[t % 3],
+                "due_date": date(2025, 1, 1 + t % 28),
+                "completion_date": date(2025, 2, 1) if t % 3 == 0 else None,
+                "reopened_count": t % 2,
+            }
+            for t in range(tasks)
+        ])
+    engine.dispose()
+
+
+def build_app(db_path: str) -> FastAPI:
+    """Serves the same task page through response_model validation and through the fast path."""
+    engine = create_engine(f"sqlite:///{db_path}")
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+
+    @app.get("/validated/tasks/", response_model=List[schemas.Task])
+    def read_tasks_validated(limit: int = 100, db: Session = Depends(get_db)):
+        return crud.get_tasks(db, limit=limit)
+
+    @app.get("/fast/tasks/", response_model=List[schemas.Task])
+    def read_tasks_fast(response: Response, limit: int = 100, db: Session = Depends(get_db)):
+        return fast_json.rows_response(crud.list_records(db, "tasks", TASK_FIELDS, limit=limit), TASK_FIELDS, response)
+
+    return app
+
+
+def measure(client: TestClient, url: str, rows: int, repeat: int) -> Dict:
+    """
+    Requests `url` `repeat` times after one warm-up request.
+
+    Returns:
+        dict: Median milliseconds per request and microseconds per row.
+    """
+    client.get(url).raise_for_status()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        client.get(url).raise_for_status()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    median = timings[len(timings) // 2]
+    return {"ms_per_request": round(median * 1000, 2), "us_per_row": round(median * 1e6 / rows, 2)}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare the per-row cost of list responses validated by response_model and of the fast JSON path."
+    )
+    parser.add_argument("--limits", type=int, nargs="+", default=list(DEFAULT_LIMITS), help="Rows per response")
+    parser.add_argument("--repeat", type=int, default=30, help="Requests per path and limit")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        seed(db_path, max(args.limits))
+        with TestClient(build_app(db_path)) as client:
+            for limit in args.limits:
+                validated, fast = (client.get(f"/{path}/tasks/?limit={limit}").json() for path in ("validated", "fast"))
+                if validated != fast:
+                    raise SystemExit(f"The fast path returned a different body for limit={limit}")
+                result = {"rows": limit}
+                for path in ("validated", "fast"):
+                    result[path] = measure(client, f"/{path}/tasks/?limit={limit}", limit, args.repeat)
+                result["speedup"] = round(result["validated"]["ms_per_request"] / result["fast"]["ms_per_request"], 2)
+                print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
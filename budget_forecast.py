@@ -0,0 +1,245 @@
+# Backend/budget_forecast.py
+
+import argparse
+import os
+import time
+from datetime import date, timedelta
+from itertools import chain
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+import models
+
+# The burn rate is the slope of a least-squares line through the cumulative
+# spend at the end of each week with spending in the trailing window. Weekly
+# rollups keep the load at about a dozen rows per project; projects with fewer
+# points fall back to their average daily spend over the part of the window
+# since their first budget entry.
+WINDOW_WEEKS = int(os.getenv("BUDGET_FORECAST_WINDOW_WEEKS", "13"))
+WINDOW_DAYS = WINDOW_WEEKS * 7
+MIN_FIT_POINTS = 3
+# Without a launch date, a project is at risk when its budget runs out within this horizon
+HORIZON_DAYS = int(os.getenv("BUDGET_FORECAST_HORIZON_DAYS", "90"))
+
+STATUS_OK = "OK"
+STATUS_AT_RISK = "At Risk"
+STATUS_OVER_BUDGET = "Over Budget"
+STATUSES = (STATUS_OK, STATUS_AT_RISK, STATUS_OVER_BUDGET)
+
+# julianday() of a date minus this offset is its proleptic Gregorian ordinal
+_JULIAN_ORDINAL_OFFSET = 1721424.5
+
+
+def load_portfolio(db: Session, as_of: date) -> Dict[str, np.ndarray]:
+    """
+    Loads the portfolio as columnar arrays: one query for the projects with
+    their spend up to `as_of`, and one for the weekly budget rollups inside the
+    trailing window of every project. Both read the rollups, so the ledger
+    itself is never scanned.
+
+    Returns:
+        dict: Project columns sorted by project id, days as julianday, the
+        stored (budget_used, budget_status) per project, and the window rows.
+    """
+    Rollup, Project = models.BudgetRollup, models.Project
+    spent = (
+        select(Rollup.cumulative_spent)
+        .where(Rollup.project_id == Project.id, Rollup.bucket == "day", Rollup.period_start <= as_of)
+        .order_by(Rollup.period_start.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    first_day = (
+        select(func.min(Rollup.period_start))
+        .where(Rollup.project_id == Project.id, Rollup.bucket == "day")
+        .scalar_subquery()
+    )
+    projects = db.execute(
+        select(
+            Project.id,
+            Project.budget_total,
+            func.coalesce(spent, 0.0),
+            func.julianday(Project.launch_date),
+            func.julianday(first_day),
+            Project.budget_used,
+            Project.budget_status,
+        ).order_by(Project.id)
+    ).all()
+    window = db.execute(
+        select(
+            Rollup.project_id,
+            func.julianday(Rollup.period_start),
+            Rollup.cumulative_spent,
+            Rollup.amount_spent,
+        )
+        .where(
+            Rollup.bucket == "week",
+            Rollup.period_start > as_of - timedelta(days=WINDOW_DAYS),
+            Rollup.period_start <= as_of,
+        )
+    ).all()
+
+    # Rollup columns are never NULL, so the window rows go straight into one flat array
+    window_columns = np.fromiter(chain.from_iterable(window), dtype=float, count=len(window) * 4).reshape(-1, 4)
+    return {
+        "project_id": np.array([row[0] for row in projects], dtype=np.int64),
+        "budget_total": np.array([np.nan if row[1] is None else row[1] for row in projects], dtype=float),
+        "spent": np.array([row[2] for row in projects], dtype=float),
+        "launch_day": np.array([np.nan if row[3] is None else row[3] for row in projects], dtype=float),
+        "first_day": np.array([np.nan if row[4] is None else row[4] for row in projects], dtype=float),
+        "stored": {row[0]: (row[5], row[6]) for row in projects},
+        "row_project_id": window_columns[:, 0].astype(np.int64),
+        "row_day": window_columns[:, 1],
+        "row_cumulative": window_columns[:, 2],
+        "row_amount": window_columns[:, 3],
+    }
+
+
+def forecast(portfolio: Dict[str, np.ndarray], as_of: date) -> Dict[str, np.ndarray]:
+    """
+    Fits a burn rate and projects the exhaustion date of every project in one
+    vectorized pass: per-project sums for the least-squares fit are gathered
+    with np.bincount, so the cost is linear in the number of rollup rows.
+
+    Returns:
+        dict: Per-project arrays aligned with portfolio["project_id"]; days are
+        relative to `as_of` and NaN where the budget is not being consumed.
+    """
+    as_of_day = as_of.toordinal() + _JULIAN_ORDINAL_OFFSET
+    ids = portfolio["project_id"]
+    size = len(ids)
+    row_ids = portfolio["row_project_id"]
+    group = np.searchsorted(ids, row_ids)
+    # Rollups outside the project list (deleted projects) are dropped
+    known = group < size
+    known[known] = ids[group[known]] == row_ids[known]
+    group = group[known]
+    # Each weekly cumulative figure holds at the end of its week, or at as_of for the current one
+    x = np.minimum(portfolio["row_day"][known] + 6, as_of_day) - as_of_day
+    y = portfolio["row_cumulative"][known]
+
+    n = np.bincount(group, minlength=size).astype(float)
+    sx = np.bincount(group, weights=x, minlength=size)
+    sy = np.bincount(group, weights=y, minlength=size)
+    sxx = np.bincount(group, weights=x * x, minlength=size)
+    sxy = np.bincount(group, weights=x * y, minlength=size)
+    window_spend = np.bincount(group, weights=portfolio["row_amount"][known], minlength=size)
+
+    denominator = n * sxx - sx * sx
+    fitted = (n >= MIN_FIT_POINTS) & (denominator > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(fitted, (n * sxy - sx * sy) / denominator, 0.0)
+    # A project younger than the window has only spent over the days since its first entry
+    covered = as_of_day - np.fmax(portfolio["first_day"], as_of_day - WINDOW_DAYS + 1) + 1
+    burn_rate = np.where(fitted, slope, window_spend / np.maximum(covered, 1.0))
+
+    budget_total = portfolio["budget_total"]
+    spent = portfolio["spent"]
+    remaining = budget_total - spent
+    burning = (burn_rate > 0) & ~np.isnan(budget_total)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        days_left = np.where(burning, np.maximum(remaining, 0.0) / burn_rate, np.nan)
+
+    launch = portfolio["launch_day"] - as_of_day
+    deadline = np.where(np.isnan(launch), HORIZON_DAYS, launch)
+    status = np.full(size, STATUS_OK, dtype=object)
+    status[burning & (days_left <= deadline)] = STATUS_AT_RISK
+    status[spent > budget_total] = STATUS_OVER_BUDGET  # NaN budgets compare False
+
+    return {
+        "project_id": ids,
+        "budget_total": budget_total,
+        "budget_used": spent,
+        "burn_rate_per_day": burn_rate,
+        "days_until_exhaustion": days_left,
+        "budget_status": status,
+    }
+
+
+def forecast_rows(result: Dict[str, np.ndarray], as_of: date) -> List[dict]:
+    """Turns the forecast arrays into one dict per project, matching schemas.ProjectBudgetForecast."""
+    last_day = date.max.toordinal() - as_of.toordinal()
+    rows = []
+    for project_id, total, used, rate, days_left, status in zip(
+        result["project_id"].tolist(), result["budget_total"].tolist(), result["budget_used"].tolist(),
+        result["burn_rate_per_day"].tolist(), result["days_until_exhaustion"].tolist(), result["budget_status"].tolist(),
+    ):
+        runs_out = not np.isnan(days_left)
+        rows.append({
+            "project_id": project_id,
+            "budget_total": None if np.isnan(total) else total,
+            "budget_used": used,
+            "burn_rate_per_day": rate,
+            "days_until_exhaustion": days_left if runs_out else None,
+            "exhaustion_date": as_of + timedelta(days=int(days_left)) if runs_out and days_left <= last_day else None,
+            "budget_status": status,
+        })
+    return rows
+
+
+def write_back(db: Session, result: Dict[str, np.ndarray], stored: Dict[int, tuple]) -> int:
+    """
+    Stores budget_used and budget_status for every project whose values
+    changed, with one executemany UPDATE. Leaves the commit to the caller.
+
+    Returns:
+        int: The number of projects updated.
+    """
+    changes = [
+        {"id": project_id, "budget_used": used, "budget_status": status}
+        for project_id, used, status in zip(
+            result["project_id"].tolist(), result["budget_used"].tolist(), result["budget_status"].tolist()
+        )
+        if stored.get(project_id) != (used, status)
+    ]
+    if changes:
+        db.execute(update(models.Project), changes)
+    return len(changes)
+
+
+def refresh(db: Session, as_of: Optional[date] = None) -> int:
+    """
+    Forecasts the whole portfolio and writes budget_used/budget_status back.
+
+    Returns:
+        int: The number of projects whose budget figures changed.
+    """
+    as_of = as_of or date.today()
+    portfolio = load_portfolio(db, as_of)
+    updated = write_back(db, forecast(portfolio, as_of), portfolio["stored"])
+    db.commit()
+    return updated
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Forecast budget exhaustion for every project.")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date.today(), help="Forecast date (YYYY-MM-DD)")
+    parser.add_argument("--write", action="store_true", help="Store budget_used and budget_status on the projects")
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        portfolio = load_portfolio(db, args.as_of)
+        loaded = time.perf_counter()
+        result = forecast(portfolio, args.as_of)
+        fitted = time.perf_counter()
+        for row in forecast_rows(result, args.as_of):
+            if row["budget_status"] != STATUS_OK:
+                print(f"project {row['project_id']}: {row['budget_status']}, "
+                      f"{row['budget_used']:.2f} of {row['budget_total']} used, "
+                      f"{row['burn_rate_per_day']:.2f}/day, runs out {row['exhaustion_date'] or 'n/a'}")
+        print(f"{len(result['project_id'])} projects, {len(portfolio['row_day'])} rollup rows: "
+              f"loaded in {loaded - started:.3f}s, forecast in {fitted - loaded:.3f}s")
+        if args.write:
+            updated = write_back(db, result, portfolio["stored"])
+            db.commit()
+            print(f"{updated} project(s) updated")
+
+
+if __name__ == "__main__":
+    main()
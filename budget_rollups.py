@@ -0,0 +1,222 @@
+# Backend/budget_rollups.py
+
+import math
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, case, delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+import models
+
+# BudgetHistory is append-only, so its rollups are maintained incrementally:
+# every append adds to the amount of its day, week and month and moves the
+# cumulative totals of that period (and of later ones, for backdated entries).
+BUCKETS = ("day", "week", "month")
+REBUILD_PAGE_SIZE = 10000
+
+# A ledger entry as folded into the rollups: (project_id, date, amount_spent, remaining_budget)
+Entry = Tuple[Optional[int], Optional[date], Optional[float], Optional[float]]
+
+
+def period_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _fold(db: Session, entries: Iterable[Entry]) -> Dict[Tuple[int, str], date]:
+    """
+    Adds `entries` to the amount, entry count and remaining budget of their
+    periods with one executemany upsert.
+
+    Returns:
+        dict: (project_id, bucket) -> earliest period touched, where cumulative totals are stale.
+    """
+    # (project_id, bucket, period_start) -> [amount_spent, entries, last_entry_date, remaining_budget]
+    deltas: Dict[Tuple[int, str, date], list] = {}
+    for project_id, day, amount, remaining in entries:
+        if project_id is None or day is None:
+            continue
+        for bucket in BUCKETS:
+            key = (project_id, bucket, period_start(day, bucket))
+            delta = deltas.get(key)
+            if delta is None:
+                deltas[key] = [amount or 0.0, 1, day, remaining]
+                continue
+            delta[0] += amount or 0.0
+            delta[1] += 1
+            # Later entries win ties, as they do in the upsert below
+            if day >= delta[2]:
+                delta[2], delta[3] = day, remaining
+
+    if not deltas:
+        return {}
+    rows = [
+        {
+            "project_id": project_id,
+            "bucket": bucket,
+            "period_start": start,
+            "amount_spent": amount,
+            "cumulative_spent": 0.0,
+            "entries": count,
+            "last_entry_date": last_date,
+            "remaining_budget": remaining,
+        }
+        for (project_id, bucket, start), (amount, count, last_date, remaining) in deltas.items()
+    ]
+    # A single-row statement run as executemany compiles once, whatever the batch size
+    rollups = models.BudgetRollup.__table__
+    stmt = sqlite_insert(rollups)
+    newer = stmt.excluded.last_entry_date >= rollups.c.last_entry_date
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[rollups.c.project_id, rollups.c.bucket, rollups.c.period_start],
+        set_={
+            "amount_spent": rollups.c.amount_spent + stmt.excluded.amount_spent,
+            "entries": rollups.c.entries + stmt.excluded.entries,
+            "remaining_budget": case((newer, stmt.excluded.remaining_budget), else_=rollups.c.remaining_budget),
+            "last_entry_date": case((newer, stmt.excluded.last_entry_date), else_=rollups.c.last_entry_date),
+        },
+    )
+    db.execute(stmt, rows)
+
+    stale: Dict[Tuple[int, str], date] = {}
+    for project_id, bucket, start in deltas:
+        key = (project_id, bucket)
+        if key not in stale or start < stale[key]:
+            stale[key] = start
+    return stale
+
+
+def _refresh_cumulative(db: Session, stale: Dict[Tuple[int, str], date]) -> None:
+    # Appends usually land in the latest period, so this rewrites one row per bucket
+    Rollup = models.BudgetRollup
+    set_cumulative = (
+        update(Rollup.__table__)
+        .where(Rollup.__table__.c.id == bindparam("rollup_id"))
+        .values(cumulative_spent=bindparam("cumulative"))
+    )
+    for (project_id, bucket), since in stale.items():
+        series = (Rollup.project_id == project_id, Rollup.bucket == bucket)
+        total = db.execute(
+            select(Rollup.cumulative_spent)
+            .where(*series, Rollup.period_start < since)
+            .order_by(Rollup.period_start.desc())
+            .limit(1)
+        ).scalar() or 0.0
+        updates = []
+        for rollup_id, amount in db.execute(
+            select(Rollup.id, Rollup.amount_spent).where(*series, Rollup.period_start >= since).order_by(Rollup.period_start)
+        ):
+            total += amount or 0.0
+            updates.append({"rollup_id": rollup_id, "cumulative": total})
+        if updates:
+            db.execute(set_cumulative, updates)
+
+
+def apply_entries(db: Session, entries: Iterable[Entry]) -> None:
+    """
+    Folds newly appended ledger entries into the rollups. Runs inside the
+    caller's transaction and leaves the commit to it.
+    """
+    _refresh_cumulative(db, _fold(db, entries))
+
+
+def rebuild(db: Session, project_ids: Optional[List[int]] = None) -> int:
+    """
+    Recomputes the rollups of every project, or only of `project_ids`, from the
+    ledger. The ledger is read in pages, so memory stays bounded by the number
+    of periods rather than the number of entries. Leaves the commit to the caller.
+
+    Returns:
+        int: The number of ledger entries folded.
+    """
+    Rollup, BudgetHistory = models.BudgetRollup, models.BudgetHistory
+    clear = delete(Rollup)
+    ledger = select(
+        BudgetHistory.id, BudgetHistory.project_id, BudgetHistory.date,
+        BudgetHistory.amount_spent, BudgetHistory.remaining_budget,
+    ).order_by(BudgetHistory.id).limit(REBUILD_PAGE_SIZE)
+    if project_ids is not None:
+        clear = clear.where(Rollup.project_id.in_(project_ids))
+        ledger = ledger.where(BudgetHistory.project_id.in_(project_ids))
+    db.execute(clear)
+
+    folded, last_id = 0, 0
+    while True:
+        page = db.execute(ledger.where(BudgetHistory.id > last_id)).all()
+        if not page:
+            break
+        last_id = page[-1].id
+        folded += len(page)
+        _fold(db, (row[1:] for row in page))
+
+    # Every period is new, so the cumulative totals are set in one pass with a window sum
+    rollups = Rollup.__table__
+    running = select(
+        rollups.c.id,
+        func.sum(rollups.c.amount_spent).over(
+            partition_by=(rollups.c.project_id, rollups.c.bucket), order_by=rollups.c.period_start
+        ).label("cumulative"),
+    )
+    if project_ids is not None:
+        running = running.where(rollups.c.project_id.in_(project_ids))
+    running = running.subquery()
+    db.execute(update(rollups).where(rollups.c.id == running.c.id).values(cumulative_spent=running.c.cumulative))
+    return folded
+
+
+def series(db: Session, project_id: int, bucket: str, points: int,
+           date_from: Optional[date] = None, date_to: Optional[date] = None) -> dict:
+    """
+    Reads a project's rollups for `bucket`, merging consecutive periods so no
+    more than `points` are returned. Each merged point spans `stride` periods:
+    it sums their spending and takes the cumulative and remaining figures of
+    the last one, so the shape of the burn curve is preserved.
+
+    Returns:
+        dict: periods (before merging), stride and points.
+    """
+    Rollup = models.BudgetRollup
+    conditions = [Rollup.project_id == project_id, Rollup.bucket == bucket]
+    if date_from is not None:
+        conditions.append(Rollup.period_start >= period_start(date_from, bucket))
+    if date_to is not None:
+        conditions.append(Rollup.period_start <= date_to)
+
+    periods = db.execute(select(func.count()).select_from(Rollup).where(*conditions)).scalar()
+    stride = max(1, math.ceil(periods / points))
+
+    ranked = select(
+        Rollup.period_start,
+        Rollup.amount_spent,
+        Rollup.cumulative_spent,
+        Rollup.remaining_budget,
+        (func.row_number().over(order_by=Rollup.period_start) - 1).label("rn"),
+    ).where(*conditions).cte("ranked")
+    groups = select(
+        (ranked.c.rn // stride).label("grp"),
+        func.min(ranked.c.period_start).label("period_start"),
+        func.max(ranked.c.period_start).label("period_end"),
+        func.sum(ranked.c.amount_spent).label("amount_spent"),
+        func.max(ranked.c.rn).label("last_rn"),
+    ).group_by("grp").subquery()
+    stmt = (
+        select(
+            groups.c.period_start,
+            groups.c.period_end,
+            groups.c.amount_spent,
+            ranked.c.cumulative_spent,
+            ranked.c.remaining_budget,
+        )
+        .join_from(groups, ranked, ranked.c.rn == groups.c.last_rn)
+        .order_by(groups.c.grp)
+    )
+    return {
+        "periods": periods,
+        "stride": stride,
+        "points": [row._asdict() for row in db.execute(stmt)],
+    }
@@ -0,0 +1,389 @@
+# Backend/bulk_import.py
+
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, AsyncIterable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import models, schemas
+import kpi_engine
+import budget_rollups
+import search_index
+import table_versions
+import workload
+
+# --- Streaming Import ---
+# Files are parsed as their bytes arrive and validated against the regular
+# Create schemas. Valid rows collect into chunks that are written with one
+# executemany INSERT and committed on their own, so memory use depends on the
+# chunk size and never on the file size.
+IMPORT_CHUNK_SIZE = 5000
+IMPORT_MAX_CHUNK_SIZE = 50000
+IMPORT_FORMATS = ("csv", "ndjson")
+IMPORT_MAX_RECORD_BYTES = 1024 * 1024
+IMPORT_MAX_REPORTED_REJECTS = 1000
+
+def _update_budget_rollups(db: Session, rows: List[dict]) -> None:
+    budget_rollups.apply_entries(
+        db, [(row["project_id"], row["date"], row["amount_spent"], row["remaining_budget"]) for row in rows]
+    )
+
+# entity -> (model, Create schema, foreign keys checked against existing rows,
+#            hook run with each chunk's rows before it is committed)
+IMPORT_TABLES = {
+    "tasks": (models.Task, schemas.TaskCreate, {"project_id": models.Project, "assignee_id": models.Employee}, None),
+    "budget-history": (
+        models.BudgetHistory, schemas.BudgetHistoryCreate, {"project_id": models.Project}, _update_budget_rollups,
+    ),
+}
+
+
+class RecordReader:
+    """
+    Incremental CSV/NDJSON parser. feed() takes the file in arbitrary byte
+    chunks and returns the records completed so far as (line, record) pairs,
+    where record is a dict, or an error message for a malformed record.
+    """
+    def __init__(self, fmt: str, required: Iterable[str] = ()):
+        self.fmt = fmt
+        self.required = set(required)
+        self.header: Optional[List[str]] = None
+        self._buffer = b""
+        self._line = 0
+        self._record: List[str] = [] # Lines of a CSV record whose quoted field spans lines
+        self._record_line = 0
+        self._quotes = 0
+
+    def feed(self, data: bytes) -> List[Tuple[int, Any]]:
+        self._buffer += data
+        end = self._buffer.rfind(b"\n")
+        complete, self._buffer = self._buffer[:max(end, 0)], self._buffer[end + 1:]
+        if len(self._buffer) > IMPORT_MAX_RECORD_BYTES:
+            raise HTTPException(status_code=400, detail=f"A line exceeds {IMPORT_MAX_RECORD_BYTES} bytes")
+        return self._parse_lines(complete) if end >= 0 else []
+
+    def finish(self) -> List[Tuple[int, Any]]:
+        records = self._parse_lines(self._buffer) if self._buffer else []
+        self._buffer = b""
+        if self._record:
+            records.append((self._record_line, "Unterminated quoted field"))
+            self._record = []
+        return records
+
+    def _parse_lines(self, data: bytes) -> List[Tuple[int, Any]]:
+        # Blocks are decoded whole; a block with invalid UTF-8 is decoded line by
+        # line so only the broken lines are rejected
+        try:
+            lines = data.decode("utf-8").split("\n")
+        except UnicodeDecodeError:
+            lines = [self._decode(raw) for raw in data.split(b"\n")]
+        if self._line == 0 and lines and lines[0]:
+            lines[0] = lines[0].removeprefix("\ufeff")
+
+        parse = self._parse_csv if self.fmt == "csv" else self._parse_ndjson
+        records = []
+        for line in lines:
+            self._line += 1
+            if line is None:
+                records.append((self._line, "Line is not valid UTF-8"))
+                continue
+            record = parse(line.rstrip("\r"))
+            if record is not None:
+                records.append(record)
+        return records
+
+    @staticmethod
+    def _decode(raw: bytes) -> Optional[str]:
+        try:
+            return raw.decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+
+    def _parse_ndjson(self, line: str):
+        if not line.strip():
+            return None
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            return self._line, f"Invalid JSON: {e}"
+        if not isinstance(record, dict):
+            return self._line, "Expected a JSON object"
+        return self._line, record
+
+    def _parse_csv(self, line: str):
+        if not self._record:
+            if not line.strip():
+                return None
+            self._record_line = self._line
+            if '"' not in line:
+                # Fast path for the common record without quoting
+                return self._csv_record(line.split(","))
+        self._record.append(line)
+        self._quotes += line.count('"')
+        if sum(map(len, self._record)) > IMPORT_MAX_RECORD_BYTES:
+            raise HTTPException(status_code=400, detail=f"Record at line {self._record_line} exceeds {IMPORT_MAX_RECORD_BYTES} bytes")
+        # Quotes inside a quoted field are doubled, so an odd count means the record continues
+        if self._quotes % 2:
+            return None
+        text = "\n".join(self._record)
+        self._record, self._quotes = [], 0
+        try:
+            values = next(csv.reader([text], strict=True))
+        except csv.Error as e:
+            return self._record_line, f"Invalid CSV: {e}"
+        return self._csv_record(values)
+
+    def _csv_record(self, values: List[str]):
+        if self.header is None:
+            self.header = [name.strip() for name in values]
+            missing = self.required - set(self.header)
+            if missing:
+                raise HTTPException(status_code=400, detail=f"CSV header is missing required columns: {', '.join(sorted(missing))}")
+            return None
+        if len(values) != len(self.header):
+            return self._record_line, f"Expected {len(self.header)} fields, got {len(values)}"
+        # Empty cells are left out so the schema defaults apply
+        return self._record_line, {name: value for name, value in zip(self.header, values) if value != ""}
+
+
+class BulkImporter:
+    """
+    Validates and writes one import. The sync (CLI) and async (API) drivers
+    below feed it the same way: process() turns raw bytes into validated rows,
+    write() inserts and commits one chunk, finish() refreshes the KPIs of the
+    touched projects.
+    """
+    def __init__(self, entity: str, fmt: str, chunk_size: int = IMPORT_CHUNK_SIZE):
+        if entity not in IMPORT_TABLES:
+            raise HTTPException(status_code=404, detail=f"Unknown import '{entity}'. Available: {', '.join(IMPORT_TABLES)}")
+        if fmt not in IMPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unknown format '{fmt}'. Available: {', '.join(IMPORT_FORMATS)}")
+        if not 1 <= chunk_size <= IMPORT_MAX_CHUNK_SIZE:
+            raise HTTPException(status_code=400, detail=f"chunk_size must be between 1 and {IMPORT_MAX_CHUNK_SIZE}")
+        self.entity = entity
+        self.model, self.schema, self.references, self.after_write = IMPORT_TABLES[entity]
+        self.chunk_size = chunk_size
+        required = [name for name, field in self.schema.model_fields.items() if field.is_required()]
+        self.reader = RecordReader(fmt, required=required)
+        self.columns = [name for name in self.schema.model_fields if name in self.model.__table__.c]
+        self.known_ids: Dict[str, set] = {}
+        self.project_ids = set()
+        self.assignee_ids = set()
+        self.pending: List[Tuple[int, dict, tuple]] = [] # (line, validated row, INSERT parameters)
+        self.rows_read = 0
+        self.inserted = 0
+        self.rejected = 0
+        self.chunks = 0
+        self.rejected_rows: List[schemas.ImportRejectedRow] = []
+        self.started = time.perf_counter()
+
+    def prepare(self, db: Session) -> None:
+        """Loads the referenced ids and compiles the INSERT for the session's database."""
+        # Referenced tables are small next to the imported ones, so their ids are held in memory
+        for column, model in self.references.items():
+            self.known_ids[column] = set(db.scalars(select(model.id)))
+
+        # Rows are sent to the driver as plain tuples. The bind processors of the
+        # column types (e.g. date -> ISO string on SQLite) are applied once per
+        # value during validation instead of by SQLAlchemy for every statement.
+        dialect = db.get_bind().dialect
+        table = self.model.__table__
+        compiled = table.insert().compile(dialect=dialect, column_keys=self.columns)
+        self.insert_sql = str(compiled)
+        self.positional = compiled.positional
+        if self.positional:
+            self.columns = list(compiled.positiontup)
+        self.bind_processors = [
+            (index, process)
+            for index, process in enumerate(table.c[name].type.bind_processor(dialect) for name in self.columns)
+            if process is not None
+        ]
+        # FTS5 flushes its pending index data at every statement, so the search
+        # index triggers would write one segment per row of an executemany.
+        # Indexed tables get the whole chunk in one INSERT ... SELECT over a JSON array.
+        self.single_statement = dialect.name == "sqlite" and table.name in search_index.INDEXED_TABLES
+        if self.single_statement:
+            fields = ", ".join(f"value ->> {index}" for index in range(len(self.columns)))
+            self.insert_sql = f"INSERT INTO {table.name} ({', '.join(self.columns)}) SELECT {fields} FROM json_each(?)"
+
+    def reject(self, line: int, errors: List[Dict[str, Any]]) -> None:
+        self.rejected += 1
+        if len(self.rejected_rows) < IMPORT_MAX_REPORTED_REJECTS:
+            self.rejected_rows.append(schemas.ImportRejectedRow(line=line, errors=errors))
+
+    def process(self, data: Optional[bytes]) -> List[List[Tuple[int, dict, tuple]]]:
+        """
+        Parses and validates `data` (None at the end of the file).
+
+        Returns:
+            list: The chunks of valid rows that are ready to be written.
+        """
+        records = self.reader.feed(data) if data is not None else self.reader.finish()
+        for line, record in records:
+            self.rows_read += 1
+            if isinstance(record, str):
+                self.reject(line, [{"type": "parse_error", "msg": record}])
+                continue
+            try:
+                row = self.schema.model_validate(record).__dict__
+            except ValidationError as e:
+                self.reject(line, e.errors(include_url=False, include_context=False, include_input=False))
+                continue
+            unknown = [
+                {"type": "foreign_key", "loc": [column], "msg": f"{column} {row[column]} does not exist"}
+                for column, ids in self.known_ids.items()
+                if row[column] is not None and row[column] not in ids
+            ]
+            if unknown:
+                self.reject(line, unknown)
+                continue
+            values = [row[name] for name in self.columns]
+            for index, process in self.bind_processors:
+                if values[index] is not None:
+                    values[index] = process(values[index])
+            self.pending.append((line, row, tuple(values)))
+
+        ready = []
+        while len(self.pending) >= self.chunk_size or (data is None and self.pending):
+            ready.append(self.pending[:self.chunk_size])
+            del self.pending[:self.chunk_size]
+        return ready
+
+    def write(self, db: Session, chunk: List[Tuple[int, dict, tuple]]) -> None:
+        if self.single_statement:
+            # Dates are left to the driver's adapters, which also produce str(value)
+            params = (json.dumps([values for _, _, values in chunk], default=str),)
+        elif self.positional:
+            params = [values for _, _, values in chunk]
+        else:
+            params = [dict(zip(self.columns, values)) for _, _, values in chunk]
+        try:
+            # One driver-level statement or executemany per chunk, without the
+            # ORM or SQLAlchemy's per-row parameter handling
+            db.connection().exec_driver_sql(self.insert_sql, params)
+            table_versions.track(db, [self.model.__tablename__])
+            if self.after_write:
+                self.after_write(db, [row for _, row, _ in chunk])
+            db.commit()
+        except SQLAlchemyError as e:
+            # Earlier chunks stay committed; the failed chunk is reported row by row
+            db.rollback()
+            for line, _, _ in chunk:
+                self.reject(line, [{"type": "database_error", "msg": str(e.orig or e)}])
+            return
+        self.inserted += len(chunk)
+        self.chunks += 1
+        self.project_ids.update(row["project_id"] for _, row, _ in chunk)
+        self.assignee_ids.update(row.get("assignee_id") for _, row, _ in chunk)
+
+    def finish(self, db: Session) -> schemas.ImportReport:
+        if self.project_ids:
+            # Once per import rather than per chunk: an employee's tasks are aggregated once
+            workload.refresh_employees(db, self.assignee_ids)
+            kpi_engine.refresh_projects(db, self.project_ids)
+            db.commit()
+        return self.report()
+
+    def report(self) -> schemas.ImportReport:
+        return schemas.ImportReport(
+            entity=self.entity,
+            rows_read=self.rows_read,
+            inserted=self.inserted,
+            rejected=self.rejected,
+            chunks=self.chunks,
+            elapsed_seconds=round(time.perf_counter() - self.started, 3),
+            rejected_rows=self.rejected_rows,
+        )
+
+
+def import_file(db: Session, importer: BulkImporter, blocks: Iterable[bytes],
+                on_progress: Optional[Callable[[BulkImporter], None]] = None) -> schemas.ImportReport:
+    """
+    Imports a file read as byte blocks through a sync Session (used by the CLI).
+
+    Returns:
+        ImportReport: Counts of read, inserted and rejected rows and the first rejected rows.
+    """
+    importer.prepare(db)
+    for data in _with_end(blocks):
+        for chunk in importer.process(data):
+            importer.write(db, chunk)
+            if on_progress:
+                on_progress(importer)
+    return importer.finish(db)
+
+def _with_end(blocks: Iterable[bytes]):
+    yield from blocks
+    yield None
+
+async def import_stream(db: AsyncSession, importer: BulkImporter, blocks: AsyncIterable[bytes],
+                        on_progress: Optional[Callable[[BulkImporter], None]] = None) -> schemas.ImportReport:
+    """
+    Imports a request body as it is received through an AsyncSession (used by
+    the API). Parsing and validation run in a worker thread so a large upload
+    does not stall the event loop.
+    """
+    await db.run_sync(importer.prepare)
+
+    async def write(chunks):
+        for chunk in chunks:
+            await db.run_sync(importer.write, chunk)
+            if on_progress:
+                on_progress(importer)
+
+    async for data in blocks:
+        if data:
+            await write(await asyncio.to_thread(importer.process, data))
+    await write(await asyncio.to_thread(importer.process, None))
+    return await db.run_sync(importer.finish)
+
+
+def print_progress(importer: BulkImporter) -> None:
+    elapsed = time.perf_counter() - importer.started
+    rate = importer.inserted / elapsed if elapsed else 0.0
+    print(f"{importer.entity}: {importer.rows_read} rows read, {importer.inserted} inserted, "
+          f"{importer.rejected} rejected ({rate:,.0f} rows/s)")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Stream a CSV or NDJSON file into tasks or budget history.")
+    parser.add_argument("entity", choices=list(IMPORT_TABLES))
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="Defaults to the file extension (.csv or .ndjson/.jsonl)")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    parser.add_argument("--block-size", type=int, default=1024 * 1024, help="Bytes read from the file at a time")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("csv" if args.path.suffix.lower() == ".csv" else "ndjson")
+    try:
+        importer = BulkImporter(args.entity, fmt, chunk_size=args.chunk_size)
+        with open(args.path, "rb") as f, SessionLocal() as db:
+            blocks = iter(lambda: f.read(args.block_size), b"")
+            report = import_file(db, importer, blocks, on_progress=print_progress)
+    except HTTPException as e:
+        print(f"Import failed: {e.detail}")
+        sys.exit(1)
+
+    for row in report.rejected_rows:
+        print(f"line {row.line}: " + "; ".join(f"{'.'.join(map(str, error.get('loc', ()))) or 'row'}: {error['msg']}"
+                                               for error in row.errors))
+    if report.rejected > len(report.rejected_rows):
+        print(f"... {report.rejected - len(report.rejected_rows)} more rejected rows")
+    print(f"{report.inserted} of {report.rows_read} rows imported into {args.entity} in {report.elapsed_seconds}s")
+
+
+if __name__ == "__main__":
+    main()
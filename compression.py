@@ -0,0 +1,157 @@
+# Backend/compression.py
+
+import zlib
+from typing import Optional
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Without brotli, clients that accept gzip still get it
+    brotli = None
+
+# Responses are compressed with the best encoding the client accepts, brotli
+# before gzip on equal q-values. The levels favour speed: these bodies are
+# built per request, and brotli 4 / gzip 6 already shrink repetitive JSON
+# most of the way at a fraction of the CPU of the maximum levels.
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+BROTLI_QUALITY = 4
+GZIP_LEVEL = 6
+# Chunks at least this large are compressed in a worker thread
+THREAD_MINIMUM_SIZE = 128 * 1024
+# Event streams are flushed message by message and never compressed; partial and
+# bodiless responses have nothing to compress
+EXCLUDED_CONTENT_TYPES = ("text/event-stream",)
+EXCLUDED_STATUSES = (204, 206, 304)
+
+
+def negotiate(accept_encoding: str, available=ENCODINGS) -> Optional[str]:
+    """
+    Picks the encoding of `available` with the highest q-value in an
+    Accept-Encoding header; ties go to the earlier one in `available`.
+
+    Returns:
+        str: The encoding, or None to send the body as it is.
+    """
+    qualities = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip():
+            qualities[name.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class _Encoder:
+    """One response body's compression stream; streamed chunks are flushed so clients can decode each as it arrives."""
+
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # wbits 16 + MAX_WBITS writes the gzip header and trailer around the deflate stream
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def encode(self, body: bytes, more_body: bool) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(body) + (self._brotli.flush() if more_body else self._brotli.finish())
+        return self._zlib.compress(body) + self._zlib.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+
+
+class _Responder:
+    """
+    Wraps `send` for one response: http.response.start is held back until the
+    first body chunk shows whether the response is worth compressing.
+    """
+
+    def __init__(self, send: Send, encoding: Optional[str], minimum_size: int) -> None:
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.encoder: Optional[_Encoder] = None
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if self.start is None:
+            # Past the first chunk, or an extension message
+            if self.encoder is not None and message["type"] == "http.response.body":
+                message = {**message, "body": await self._encode(message.get("body", b""), message.get("more_body", False))}
+            await self.send(message)
+            return
+
+        start, self.start = self.start, None
+        if message["type"] != "http.response.body":
+            await self.send(start)
+            await self.send(message)
+            return
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        headers = MutableHeaders(raw=start["headers"])
+        if self._compressible(start["status"], headers, body, more_body):
+            # Whether or not this client gets it compressed, others may
+            if "accept-encoding" not in headers.get("vary", "").lower():
+                headers.add_vary_header("Accept-Encoding")
+            if self.encoding is not None:
+                self.encoder = _Encoder(self.encoding)
+                body = await self._encode(body, more_body)
+                headers["Content-Encoding"] = self.encoding
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(body))
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = "W/" + etag
+        await self.send(start)
+        await self.send({**message, "body": body})
+
+    def _compressible(self, status: int, headers: MutableHeaders, body: bytes, more_body: bool) -> bool:
+        if status in EXCLUDED_STATUSES or "content-encoding" in headers:
+            return False
+        if headers.get("content-type", "").startswith(EXCLUDED_CONTENT_TYPES):
+            return False
+        # A streamed body's size is unknown, so it is compressed from its first chunk
+        return more_body or len(body) >= self.minimum_size
+
+    async def _encode(self, body: bytes, more_body: bool) -> bytes:
+        if len(body) >= THREAD_MINIMUM_SIZE:
+            return await anyio.to_thread.run_sync(self.encoder.encode, body, more_body)
+        return self.encoder.encode(body, more_body)
+
+
+class CompressionMiddleware:
+    """
+    Compresses response bodies of `minimum_size` bytes or more with brotli or
+    gzip, as negotiated from Accept-Encoding. Compressed responses carry a weak
+    ETag: the bytes differ from the identity encoding, which a strong validator
+    must not hide, and If-None-Match compares weakly anyway. Written against
+    plain ASGI messages, so it depends on no Starlette internals.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        await self.app(scope, receive, _Responder(send, encoding, self.minimum_size))
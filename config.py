@@ -1,16 +1,36 @@
 # config.py
 
 import os
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
 
 load_dotenv()
 
 class Settings(BaseSettings):
-    # Only the database URL is needed now
-    DATABASE_URL: str
+    DATABASE_URL: str = "sqlite:///./sql_app.db"
+    # Database the GET endpoints read from; defaults to DATABASE_URL (a replica can be set here)
+    DATABASE_READ_URL: Optional[str] = None
+
+    # Engine profile, see database.DB_PROFILES; the DB_* and SQLITE_* values below override it
+    DB_PROFILE: str = "sqlite-wal"
+
+    # Connection pools: the writer pool stays small because SQLite has a single writer
+    DB_POOL_SIZE: Optional[int] = None
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_WRITER_POOL_SIZE: Optional[int] = None
+    DB_WRITER_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_TIMEOUT: Optional[float] = None
+
+    # SQLite pragmas applied to every new connection
+    SQLITE_JOURNAL_MODE: Optional[str] = None
+    SQLITE_SYNCHRONOUS: Optional[str] = None
+    SQLITE_MMAP_SIZE: Optional[int] = None
+    SQLITE_CACHE_SIZE: Optional[int] = None
+    SQLITE_BUSY_TIMEOUT_MS: Optional[int] = None
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 # Create an instance of your settings
-settings = Settings()
\ No newline at end of file
+settings = Settings()
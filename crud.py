@@ -1,16 +1,259 @@
 # Backend/crud.py
 
-from sqlalchemy.orm import Session
-from typing import List, Optional
+import asyncio
+import base64
+import csv
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+
+from pydantic import ValidationError
+from sqlalchemy import Date, and_, case, func, insert, or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, raiseload, selectinload
+from typing import Any, AsyncIterator, Dict, List, Optional
 from fastapi import HTTPException
 
 # Assuming 'models' and 'schemas' are in the same 'Backend' directory
 # Use relative imports for modules within the same package
 import models, schemas 
-from  llama_kpi_agent import Llama3Client # Note the leading dot for relative import
+import fast_json
+import kpi_engine
+import budget_rollups
+import budget_forecast
+import alert_rules
+import search_index
+import table_versions
+import workload
+from  llama_kpi_agent import AsyncLlama3Client, Llama3Client, Llama3Unavailable # Note the leading dot for relative import
+from kpi_cache import KpiClassificationCache
+from kpi_scoring import CLASSES as KPI_CLASSES, KpiScorer, feature_matrix
+
+# Classifications are cached by KPI feature vector so unchanged projects skip the LLM
+kpi_classification_cache = KpiClassificationCache(
+    path=os.getenv("KPI_CACHE_PATH", "./kpi_cache.db"),
+    max_entries=int(os.getenv("KPI_CACHE_MAX_ENTRIES", "10000")),
+    ttl_seconds=float(os.getenv("KPI_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+)
 
 # Initialize your Llama3 client globally or pass it as a dependency
-llama_client = Llama3Client() 
+llama_client = Llama3Client(cache=kpi_classification_cache) 
+
+# Upper bound on concurrent Llama3 calls made by the API
+KPI_CLASSIFY_MAX_CONCURRENCY = int(os.getenv("KPI_CLASSIFY_MAX_CONCURRENCY", "4"))
+
+# Non-blocking client used by the API endpoints; llama_client stays for scripts
+async_llama_client = AsyncLlama3Client(
+    cache=kpi_classification_cache,
+    connect_timeout=float(os.getenv("LLAMA3_CONNECT_TIMEOUT", "3")),
+    read_timeout=float(os.getenv("LLAMA3_READ_TIMEOUT", "60")),
+    max_retries=int(os.getenv("LLAMA3_MAX_RETRIES", "2")),
+    max_concurrency=KPI_CLASSIFY_MAX_CONCURRENCY,
+)
+
+# Local classifier tier: projects it scores with at least this confidence skip Llama3.
+# It is only enabled by a model distilled from Llama3 labels (python kpi_scoring.py);
+# the hand-tuned fallback model never stands in for Llama3.
+KPI_SCORER_PATH = os.getenv("KPI_SCORER_PATH", "./kpi_scoring_model.json")
+kpi_scorer = KpiScorer.load(KPI_SCORER_PATH) if os.path.exists(KPI_SCORER_PATH) else None
+KPI_LOCAL_MIN_CONFIDENCE = float(os.getenv("KPI_LOCAL_MIN_CONFIDENCE", "0.6"))
+
+def classify_locally(rows: List[Dict[str, Any]]) -> List[Optional[str]]:
+    """The local tier's class per row of KPI features, or None where the row must go to Llama3."""
+    if kpi_scorer is None:
+        return [None] * len(rows)
+    return kpi_scorer.classify(feature_matrix(rows), KPI_LOCAL_MIN_CONFIDENCE)
+
+# --- Keyset Pagination ---
+# List endpoints accept an opaque `after` cursor holding the (sort key, id) of the
+# last row of the previous page, so a page costs an index seek instead of scanning
+# and discarding `skip` rows. Rows are always ordered by the sort key, then id.
+def encode_cursor(sort_column, row):
+    payload = {"k": sort_column.key, "v": getattr(row, sort_column.key), "id": row.id}
+    if isinstance(payload["v"], date):
+        payload["v"] = payload["v"].isoformat()
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(sort_column, cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if payload["k"] != sort_column.key or not isinstance(payload["id"], int):
+            raise ValueError("cursor does not match the requested ordering")
+        value = payload["v"]
+        if value is not None and isinstance(sort_column.type, Date):
+            value = date.fromisoformat(value)
+        return value, payload["id"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+def page_query(query, model, skip: int = 0, limit: int = 100, after: Optional[str] = None,
+               sort_column=None, descending: bool = False):
+    """Restricts `query` to one page, ordered by the sort key, then id. See paginate()."""
+    sort_column = sort_column if sort_column is not None else model.id
+    id_column = model.id
+
+    if after:
+        value, last_id = decode_cursor(sort_column, after)
+        # SQLite sorts NULLs first ascending and last descending
+        if sort_column is id_column:
+            condition = id_column < last_id if descending else id_column > last_id
+        elif value is None:
+            tie = and_(sort_column.is_(None), id_column < last_id if descending else id_column > last_id)
+            condition = tie if descending else or_(tie, sort_column.isnot(None))
+        elif descending:
+            condition = or_(
+                sort_column < value,
+                and_(sort_column == value, id_column < last_id),
+                sort_column.is_(None),
+            )
+        else:
+            condition = or_(sort_column > value, and_(sort_column == value, id_column > last_id))
+        query = query.filter(condition)
+
+    if sort_column is id_column:
+        order_by = [id_column.desc() if descending else id_column]
+    elif descending:
+        order_by = [sort_column.desc(), id_column.desc()]
+    else:
+        order_by = [sort_column, id_column]
+    query = query.order_by(*order_by)
+    # OFFSET only applies without a cursor, and SQLAlchemy wants it after ORDER BY
+    if skip and not after:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+def paginate(query, model, skip: int = 0, limit: int = 100, after: Optional[str] = None,
+             sort_column=None, descending: bool = False):
+    return page_query(query, model, skip, limit, after, sort_column, descending).all()
+
+def next_cursor(model, rows, limit: int, sort_column=None):
+    """Returns the cursor for the page after `rows`, or None on the last page."""
+    if limit <= 0 or len(rows) < limit:
+        return None
+    return encode_cursor(sort_column if sort_column is not None else model.id, rows[-1])
+
+# --- List Filters ---
+# List endpoints take typed filters on whitelisted columns and a sort key. On the
+# large tables every filter is an equality, IN or date range predicate on an
+# indexed column, so a filtered page costs an index seek like an unfiltered one.
+# String filters take comma-separated values ("status=Pending,In Progress").
+# entity -> (model, filterable columns, column used by date_from/date_to, sortable columns)
+LIST_TABLES = {
+    "employees": (models.Employee, ("status", "position"), "hire_date", ("id", "name", "hire_date")),
+    "customers": (models.Customer, ("industry", "priority_level"), None, ("id", "name", "priority_level")),
+    "projects": (models.Project, ("status", "customer_id", "budget_status"), "start_date", ("id", "project_name", "start_date", "launch_date")),
+    "tasks": (models.Task, ("status", "priority", "project_id", "assignee_id"), "due_date", ("id", "due_date", "priority", "status", "title")),
+    "alerts": (models.Alert, ("project_id", "task_id", "type", "is_resolved"), "created_at", ("id", "created_at", "type")),
+    "budget-history": (models.BudgetHistory, ("project_id",), "date", ("id", "date")),
+    "project-kpis": (models.Project_KPI, ("project_id", "kpi_class", "risk_flag"), None, ("id", "project_id")),
+}
+
+# Totals are cached per filter set until their table's stored version moves, so
+# paging through a result set counts it once
+LIST_COUNT_CACHE_MAX_ENTRIES = 1024
+_list_counts: "OrderedDict[tuple, tuple]" = OrderedDict()
+_list_counts_lock = threading.Lock()
+
+def _filter_conditions(entity: str, model, filterable, date_column, filters: Dict[str, Any],
+                       date_from: Optional[date] = None, date_to: Optional[date] = None) -> list:
+    conditions = []
+    for name, value in filters.items():
+        if value is None:
+            continue
+        if name not in filterable:
+            raise HTTPException(status_code=400, detail=f"'{name}' cannot filter {entity}. Allowed: {', '.join(filterable)}")
+        column = getattr(model, name)
+        if isinstance(value, str) and "," in value:
+            conditions.append(column.in_([part.strip() for part in value.split(",") if part.strip()]))
+        else:
+            conditions.append(column == value)
+    if (date_from is not None or date_to is not None) and date_column is None:
+        raise HTTPException(status_code=400, detail=f"{entity} cannot be filtered by date")
+    if date_from is not None:
+        conditions.append(getattr(model, date_column) >= date_from)
+    if date_to is not None:
+        conditions.append(getattr(model, date_column) <= date_to)
+    return conditions
+
+def list_conditions(entity: str, filters: Optional[Dict[str, Any]] = None) -> list:
+    """
+    Compiles the filters of a list request into WHERE conditions. `filters`
+    maps column names, date_from and date_to to values; None values are ignored.
+    """
+    model, filterable, date_column, _ = LIST_TABLES[entity]
+    filters = dict(filters or {})
+    date_from, date_to = filters.pop("date_from", None), filters.pop("date_to", None)
+    return _filter_conditions(entity, model, filterable, date_column, filters, date_from, date_to)
+
+def parse_sort(entity: str, sort: Optional[str]):
+    """
+    Resolves a sort key such as "due_date" or "-due_date" (descending).
+
+    Returns:
+        tuple: The sort column and whether it is descending.
+    """
+    model, _, _, sortable = LIST_TABLES[entity]
+    if not sort:
+        return model.id, False
+    name = sort.removeprefix("-")
+    if name not in sortable:
+        raise HTTPException(status_code=400, detail=f"Cannot sort {entity} by '{name}'. Allowed: {', '.join(sortable)}")
+    return getattr(model, name), sort.startswith("-")
+
+def list_rows(db: Session, entity: str, skip: int = 0, limit: int = 100, after: Optional[str] = None,
+              filters: Optional[Dict[str, Any]] = None, sort: Optional[str] = None):
+    model = LIST_TABLES[entity][0]
+    sort_column, descending = parse_sort(entity, sort)
+    query = db.query(model).filter(*list_conditions(entity, filters))
+    return paginate(query, model, skip=skip, limit=limit, after=after, sort_column=sort_column, descending=descending)
+
+def list_records(db: Session, entity: str, fields, skip: int = 0, limit: int = 100, after: Optional[str] = None,
+                 filters: Optional[Dict[str, Any]] = None, sort: Optional[str] = None):
+    """
+    Reads the same page as list_rows(), but only the columns in `fields`, as
+    plain rows without ORM objects. The id and sort columns are read after
+    them when missing, for the cursor.
+    """
+    model = LIST_TABLES[entity][0]
+    sort_column, descending = parse_sort(entity, sort)
+    names = list(fields) + [name for name in dict.fromkeys(("id", sort_column.key)) if name not in fields]
+    query = db.query(*(getattr(model, name) for name in names)).filter(*list_conditions(entity, filters))
+    return paginate(query, model, skip=skip, limit=limit, after=after, sort_column=sort_column, descending=descending)
+
+def get_record(db: Session, entity: str, fields, record_id: int, by: str = "id"):
+    """Reads the columns in `fields` of the row whose `by` column equals `record_id`, or None."""
+    model = LIST_TABLES[entity][0]
+    stmt = select(*(getattr(model, name) for name in fields)).where(getattr(model, by) == record_id).limit(1)
+    return db.execute(stmt).first()
+
+def count_rows(db: Session, entity: str, filters: Optional[Dict[str, Any]] = None) -> int:
+    """Returns the number of rows matching `filters`, cached until the table changes."""
+    model = LIST_TABLES[entity][0]
+    conditions = list_conditions(entity, filters)
+    key = (entity, tuple(sorted((name, value) for name, value in (filters or {}).items() if value is not None)))
+    # Read before counting: a write committing meanwhile moves the version, so an
+    # entry can be stored under an outdated version but never hold an outdated count
+    version = table_versions.versions(db, [model.__tablename__])[model.__tablename__]
+    with _list_counts_lock:
+        cached = _list_counts.get(key)
+        if cached is not None and cached[0] == version:
+            _list_counts.move_to_end(key)
+            return cached[1]
+    total = db.execute(select(func.count()).select_from(model).where(*conditions)).scalar_one()
+    with _list_counts_lock:
+        _list_counts[key] = (version, total)
+        _list_counts.move_to_end(key)
+        while len(_list_counts) > LIST_COUNT_CACHE_MAX_ENTRIES:
+            _list_counts.popitem(last=False)
+    return total
 
 # --- Employee CRUD ---
 def get_employee(db: Session, employee_id: int):
@@ -19,8 +262,9 @@ def get_employee(db: Session, employee_id: int):
 def get_employee_by_email(db: Session, email: str):
     return db.query(models.Employee).filter(models.Employee.email == email).first()
 
-def get_employees(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Employee).offset(skip).limit(limit).all()
+def get_employees(db: Session, skip: int = 0, limit: int = 100, after: Optional[str] = None,
+                  filters: Optional[Dict[str, Any]] = None, sort: Optional[str] = None):
+    return list_rows(db, "employees", skip=skip, limit=limit, after=after, filters=filters, sort=sort)
 
 def create_employee(db: Session, employee: schemas.EmployeeCreate):
     # Handle preferences conversion to JSON string
@@ -57,16 +301,51 @@ def delete_employee(db: Session, employee_id: int):
     db_employee = db.query(models.Employee).filter(models.Employee.id == employee_id).first()
     if db_employee:
         db.delete(db_employee)
+        workload.refresh_employees(db, [employee_id])
         db.commit()
         return True
     return False
 
+# --- Employee Workload ---
+def get_employee_workloads(db: Session, skip: int = 0, limit: int = 100):
+    """
+    Reads every employee's materialized workload, busiest first. Employees who
+    never had a task get zeros.
+
+    Returns:
+        list: EmployeeWorkload rows.
+    """
+    Employee, Workload = models.Employee, models.EmployeeWorkload
+    stmt = (
+        select(
+            Employee.id.label("employee_id"),
+            Employee.name,
+            Employee.position,
+            func.coalesce(Workload.open_tasks, 0).label("open_tasks"),
+            func.coalesce(Workload.weighted_load, 0.0).label("weighted_load"),
+            func.coalesce(Workload.overdue_tasks, 0).label("overdue_tasks"),
+            func.coalesce(Workload.due_soon_tasks, 0).label("due_soon_tasks"),
+            func.coalesce(Workload.workload_index, 0.0).label("workload_index"),
+            Workload.as_of,
+        )
+        .outerjoin(Workload, Workload.employee_id == Employee.id)
+        .order_by(func.coalesce(Workload.workload_index, 0.0).desc(), Employee.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    return [schemas.EmployeeWorkload(**row._asdict()) for row in db.execute(stmt)]
+
+def roll_over_employee_workload(db: Session):
+    """Moves the overdue and due soon counts of the workloads to today; run by the scheduled job."""
+    return workload.roll_over(db)
+
 # --- Customer CRUD ---
 def get_customer(db: Session, customer_id: int):
     return db.query(models.Customer).filter(models.Customer.id == customer_id).first()
 
-def get_customers(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Customer).offset(skip).limit(limit).all()
+def get_customers(db: Session, skip: int = 0, limit: int = 100, after: Optional[str] = None,
+                  filters: Optional[Dict[str, Any]] = None, sort: Optional[str] = None):
+    return list_rows(db, "customers", skip=skip, limit=limit, after=after, filters=filters, sort=sort)
 
 def create_customer(db: Session, customer: schemas.CustomerCreate):
     # Use model_dump to convert Pydantic model to a dict for SQLAlchemy model creation
@@ -82,10 +361,63 @@ def update_customer(db: Session, customer_id: int, customer_update: schemas.Cust
         update_data = customer_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_customer, field, value)
+        if "priority_level" in update_data:
+            kpi_engine.refresh_projects(db, [project.id for project in db_customer.projects])
         db.commit()
         db.refresh(db_customer)
     return db_customer
 
+def get_customer_overview(db: Session, skip: int = 0, limit: int = 100, after: Optional[str] = None,
+                          filters: Optional[Dict[str, Any]] = None, sort: Optional[str] = None):
+    """
+    Reads a page of customers with their project rollups: project counts,
+    summed budgets and the worst KPI class. The page of customers is picked
+    first, like get_customers(), and one GROUP BY then joins only those
+    customers to their projects (ix_projects_customer_id) and KPIs, so the cost
+    follows the page size rather than the number of customers.
+
+    Returns:
+        list: CustomerOverview rows.
+    """
+    Customer, Project, Kpi = models.Customer, models.Project, models.Project_KPI
+    sort_column, descending = parse_sort("customers", sort)
+    page = page_query(
+        db.query(Customer).filter(*list_conditions("customers", filters)),
+        Customer, skip=skip, limit=limit, after=after, sort_column=sort_column, descending=descending,
+    ).subquery()
+
+    active = and_(Project.id.isnot(None), func.coalesce(Project.status, "").not_in(alert_rules.INACTIVE_PROJECT_STATUSES))
+    # KPI_CLASSES runs from worst to best; "Error" and unclassified projects have no rank
+    kpi_rank = case({kpi_class: rank for rank, kpi_class in enumerate(KPI_CLASSES)}, value=Kpi.kpi_class)
+    order_by = [page.c[sort_column.key], page.c.id] if sort_column is not Customer.id else [page.c.id]
+    stmt = (
+        select(
+            page.c.id,
+            page.c.name,
+            page.c.contact_person,
+            page.c.email,
+            page.c.phone,
+            page.c.industry,
+            page.c.priority_level,
+            func.count(Project.id).label("project_count"),
+            func.count(case((active, Project.id))).label("active_project_count"),
+            func.coalesce(func.sum(Project.budget_total), 0.0).label("budget_total"),
+            func.coalesce(func.sum(Project.budget_used), 0.0).label("budget_used"),
+            func.min(kpi_rank).label("worst_kpi_rank"),
+        )
+        .outerjoin(Project, Project.customer_id == page.c.id)
+        .outerjoin(Kpi, Kpi.project_id == Project.id)
+        .group_by(page.c.id)
+        .order_by(*(column.desc() if descending else column for column in order_by))
+    )
+    return [
+        schemas.CustomerOverview(
+            **{key: value for key, value in row._asdict().items() if key != "worst_kpi_rank"},
+            worst_kpi_class=KPI_CLASSES[row.worst_kpi_rank] if row.worst_kpi_rank is not None else None,
+        )
+        for row in db.execute(stmt)
+    ]
+
 def delete_customer(db: Session, customer_id: int):
     db_customer = db.query(models.Customer).filter(models.Customer.id == customer_id).first()
     if db_customer:
@@ -98,8 +430,83 @@ def delete_customer(db: Session, customer_id: int):
 def get_project(db: Session, project_id: int):
     return db.query(models.Project).filter(models.Project.id == project_id).first()
 
-def get_projects(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Project).offset(skip).limit(limit).all()
+def get_projects(db: Session, skip: int = 0, limit: int = 100, after: Optional[str] = None,
+                 filters: Optional[Dict[str, Any]] = None, sort: Optional[str] = None):
+    return list_rows(db, "projects", skip=skip, limit=limit, after=after, filters=filters, sort=sort)
+
+# Relationships GET /api/projects/{id} can embed; "tasks.assignee" implies "tasks"
+PROJECT_INCLUDES = ("customer", "tasks", "tasks.assignee", "budget_history", "kpi")
+
+def parse_includes(include: Optional[str]) -> set:
+    requested = {name.strip() for name in (include or "").split(",") if name.strip()}
+    unknown = requested - set(PROJECT_INCLUDES)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown include(s): {', '.join(sorted(unknown))}. Allowed: {', '.join(PROJECT_INCLUDES)}",
+        )
+    if "tasks.assignee" in requested:
+        requested.add("tasks")
+    return requested
+
+def _project_detail_options(include: set):
+    # Anything not requested raises instead of lazy loading, so a serializer can never trigger N+1 queries
+    options = [raiseload("*")]
+    # Many-to-one and one-to-one: joined into the project query itself
+    if "customer" in include:
+        options.append(joinedload(models.Project.customer))
+    if "kpi" in include:
+        options.append(joinedload(models.Project.kpi))
+    # One-to-many: one SELECT ... WHERE project_id IN (...) each; assignees are joined into the tasks query
+    if "tasks" in include:
+        tasks = selectinload(models.Project.tasks)
+        options.append(tasks.joinedload(models.Task.assignee) if "tasks.assignee" in include else tasks)
+    if "budget_history" in include:
+        options.append(selectinload(models.Project.budget_history))
+    return options
+
+def project_detail_query_limit(include: set) -> int:
+    """The most queries get_project_detail may issue: the project plus one per collection."""
+    return 1 + ("tasks" in include) + ("budget_history" in include)
+
+def get_project_detail(db: Session, project_id: int, include: set = frozenset()):
+    """
+    Loads a project with the relationships named in `include` using a fixed number
+    of queries, whatever the number of tasks or budget entries.
+
+    Returns:
+        schemas.ProjectDetail: The project, or None if it does not exist.
+    """
+    # raiseload("*") turns any lazy load into an error; the tests hold the query
+    # count to project_detail_query_limit
+    db_project = (
+        db.query(models.Project)
+        .options(*_project_detail_options(include))
+        .filter(models.Project.id == project_id)
+        .populate_existing()
+        .first()
+    )
+    if db_project is None:
+        return None
+
+    detail = schemas.ProjectDetail.model_validate(schemas.Project.model_validate(db_project).model_dump())
+    if "customer" in include:
+        detail.customer = db_project.customer and schemas.Customer.model_validate(db_project.customer)
+    if "kpi" in include:
+        detail.kpi = db_project.kpi and schemas.ProjectKpi.model_validate(db_project.kpi)
+    if "tasks" in include:
+        detail.tasks = []
+        for db_task in sorted(db_project.tasks, key=lambda task: task.id):
+            task = schemas.TaskDetail.model_validate(schemas.Task.model_validate(db_task).model_dump())
+            if "tasks.assignee" in include:
+                task.assignee = db_task.assignee and schemas.Employee.model_validate(db_task.assignee)
+            detail.tasks.append(task)
+    if "budget_history" in include:
+        detail.budget_history = [
+            schemas.BudgetHistory.model_validate(entry)
+            for entry in sorted(db_project.budget_history, key=lambda entry: (entry.date or date.min, entry.id))
+        ]
+    return detail
 
 def create_project(db: Session, project: schemas.ProjectCreate):
     customer_obj = db.query(models.Customer).filter(models.Customer.id == project.customer_id).first()
@@ -137,6 +544,7 @@ def update_project(db: Session, project_id: int, project_update: schemas.Project
 
     for field, value in update_data.items():
         setattr(db_project, field, value)
+    kpi_engine.refresh_projects(db, [db_project.id])
     
     db.commit()
     db.refresh(db_project)
@@ -154,12 +562,15 @@ def delete_project(db: Session, project_id: int):
 def get_task(db: Session, task_id: int):
     return db.query(models.Task).filter(models.Task.id == task_id).first()
 
-def get_tasks(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Task).offset(skip).limit(limit).all()
+def get_tasks(db: Session, skip: int = 0, limit: int = 100, after: Optional[str] = None,
+              filters: Optional[Dict[str, Any]] = None, sort: Optional[str] = None):
+    return list_rows(db, "tasks", skip=skip, limit=limit, after=after, filters=filters, sort=sort)
 
 def create_task(db: Session, task: schemas.TaskCreate):
     db_task = models.Task(**task.model_dump())
     db.add(db_task)
+    workload.refresh_employees(db, [db_task.assignee_id])
+    kpi_engine.refresh_projects(db, [db_task.project_id])
     db.commit()
     db.refresh(db_task)
     return db_task
@@ -167,9 +578,12 @@ def create_task(db: Session, task: schemas.TaskCreate):
 def update_task(db: Session, task_id: int, task_update: schemas.TaskUpdate):
     db_task = db.query(models.Task).filter(models.Task.id == task_id).first()
     if db_task:
+        old_project_id, old_assignee_id = db_task.project_id, db_task.assignee_id
         update_data = task_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_task, field, value)
+        workload.refresh_employees(db, [old_assignee_id, db_task.assignee_id])
+        kpi_engine.refresh_projects(db, [old_project_id, db_task.project_id])
         db.commit()
         db.refresh(db_task)
     return db_task
@@ -178,6 +592,8 @@ def delete_task(db: Session, task_id: int):
     db_task = db.query(models.Task).filter(models.Task.id == task_id).first()
     if db_task:
         db.delete(db_task)
+        workload.refresh_employees(db, [db_task.assignee_id])
+        kpi_engine.refresh_projects(db, [db_task.project_id])
         db.commit()
         return True
     return False
@@ -186,12 +602,14 @@ def delete_task(db: Session, task_id: int):
 def get_alert(db: Session, alert_id: int):
     return db.query(models.Alert).filter(models.Alert.id == alert_id).first()
 
-def get_alerts(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Alert).offset(skip).limit(limit).all()
+def get_alerts(db: Session, skip: int = 0, limit: int = 100, after: Optional[str] = None,
+               filters: Optional[Dict[str, Any]] = None, sort: Optional[str] = None):
+    return list_rows(db, "alerts", skip=skip, limit=limit, after=after, filters=filters, sort=sort)
 
 def create_alert(db: Session, alert: schemas.AlertCreate):
     db_alert = models.Alert(**alert.model_dump())
     db.add(db_alert)
+    kpi_engine.refresh_projects(db, [db_alert.project_id])
     db.commit()
     db.refresh(db_alert)
     return db_alert
@@ -199,9 +617,11 @@ def create_alert(db: Session, alert: schemas.AlertCreate):
 def update_alert(db: Session, alert_id: int, alert_update: schemas.AlertUpdate):
     db_alert = db.query(models.Alert).filter(models.Alert.id == alert_id).first()
     if db_alert:
+        old_project_id = db_alert.project_id
         update_data = alert_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_alert, field, value)
+        kpi_engine.refresh_projects(db, [old_project_id, db_alert.project_id])
         db.commit()
         db.refresh(db_alert)
     return db_alert
@@ -210,6 +630,7 @@ def delete_alert(db: Session, alert_id: int):
     db_alert = db.query(models.Alert).filter(models.Alert.id == alert_id).first()
     if db_alert:
         db.delete(db_alert)
+        kpi_engine.refresh_projects(db, [db_alert.project_id])
         db.commit()
         return True
     return False
@@ -218,28 +639,113 @@ def delete_alert(db: Session, alert_id: int):
 def get_budget_history(db: Session, history_id: int):
     return db.query(models.BudgetHistory).filter(models.BudgetHistory.id == history_id).first()
 
-def get_budget_histories(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.BudgetHistory).offset(skip).limit(limit).all()
+def get_budget_histories(db: Session, skip: int = 0, limit: int = 100, after: Optional[str] = None,
+                         filters: Optional[Dict[str, Any]] = None, sort: Optional[str] = None):
+    return list_rows(db, "budget-history", skip=skip, limit=limit, after=after, filters=filters, sort=sort)
 
 def create_budget_history(db: Session, budget_history: schemas.BudgetHistoryCreate):
     db_budget_history = models.BudgetHistory(**budget_history.model_dump())
     db.add(db_budget_history)
+    budget_rollups.apply_entries(db, _budget_entries([budget_history]))
+    kpi_engine.refresh_projects(db, [db_budget_history.project_id])
     db.commit()
     db.refresh(db_budget_history)
     return db_budget_history
 
 # No direct update/delete for BudgetHistory as it's often an append-only ledger
 
+def _budget_entries(histories):
+    return [(h.project_id, h.date, h.amount_spent, h.remaining_budget) for h in histories]
+
+def get_budget_series(db: Session, project_id: int, bucket: str = "week", points: int = 200,
+                      date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """
+    Returns a project's spending per day, week or month from the rollups,
+    downsampled to at most `points` points.
+
+    Args:
+        bucket (str): "day", "week" or "month".
+        points (int): Upper bound on the number of points returned.
+
+    Returns:
+        BudgetSeries: The series, or None if the project does not exist.
+    """
+    if bucket not in budget_rollups.BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Unknown bucket '{bucket}'. Available: {', '.join(budget_rollups.BUCKETS)}")
+    if points < 1:
+        raise HTTPException(status_code=400, detail="points must be at least 1")
+    if get_project(db, project_id) is None:
+        return None
+    series = budget_rollups.series(db, project_id, bucket, points, date_from=date_from, date_to=date_to)
+    return schemas.BudgetSeries(project_id=project_id, bucket=bucket, **series)
+
+# --- Budget Forecast ---
+def get_budget_forecast(db: Session, as_of: Optional[date] = None, budget_status: Optional[str] = None):
+    """
+    Forecasts when each project's budget runs out from its recent burn rate.
+
+    Args:
+        as_of (date): Forecast date, defaults to today.
+        budget_status (str): Only return projects with this status ("OK", "At Risk" or "Over Budget").
+
+    Returns:
+        BudgetForecast: One entry per project.
+    """
+    if budget_status is not None and budget_status not in budget_forecast.STATUSES:
+        raise HTTPException(status_code=400, detail=f"Unknown budget_status '{budget_status}'. Available: {', '.join(budget_forecast.STATUSES)}")
+    as_of = as_of or date.today()
+    result = budget_forecast.forecast(budget_forecast.load_portfolio(db, as_of), as_of)
+    projects = budget_forecast.forecast_rows(result, as_of)
+    if budget_status is not None:
+        projects = [row for row in projects if row["budget_status"] == budget_status]
+    return schemas.BudgetForecast(as_of=as_of, window_days=budget_forecast.WINDOW_DAYS, projects=projects)
+
+def refresh_budget_forecast(db: Session):
+    """Writes the forecast's budget_used and budget_status to every project; run by the scheduled job."""
+    return budget_forecast.refresh(db)
+
+# --- Alert Rules ---
+def run_alert_rules(db: Session):
+    """Flags overdue tasks and raises rule alerts for the rows changed since the last run; run by the scheduled job."""
+    return alert_rules.run(db)
+
+# --- Search ---
+def search(db: Session, q: str, entities: Optional[List[str]] = None, skip: int = 0, limit: int = 20):
+    """
+    Full-text search over projects, tasks, customers and employees.
+
+    Args:
+        q (str): Words to look for; each matches as a prefix, and all must match.
+        entities (list): Restrict the search to these entities; default all.
+
+    Returns:
+        list: SearchHit rows, best match first.
+    """
+    if skip < 0 or not 1 <= limit <= search_index.MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"skip must be >= 0 and limit between 1 and {search_index.MAX_PAGE_SIZE}")
+    if skip + limit > search_index.MAX_RESULT_WINDOW:
+        raise HTTPException(status_code=400, detail=f"skip + limit cannot exceed {search_index.MAX_RESULT_WINDOW}; refine the query instead")
+    entities = entities or list(search_index.SEARCH_TABLES)
+    unknown = [entity for entity in entities if entity not in search_index.SEARCH_TABLES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown entity '{unknown[0]}'. Available: {', '.join(search_index.SEARCH_TABLES)}")
+    terms = search_index.query_terms(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="The query has no searchable words")
+    return search_index.search(db, terms, entities, skip=skip, limit=limit)
+
 # --- Project KPI CRUD ---
 def get_project_kpi(db: Session, kpi_id: int):
     return db.query(models.Project_KPI).filter(models.Project_KPI.id == kpi_id).first()
 
-def get_project_kpis(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Project_KPI).offset(skip).limit(limit).all()
+def get_project_kpis(db: Session, skip: int = 0, limit: int = 100, after: Optional[str] = None,
+                     filters: Optional[Dict[str, Any]] = None, sort: Optional[str] = None):
+    return list_rows(db, "project-kpis", skip=skip, limit=limit, after=after, filters=filters, sort=sort)
 
 def create_project_kpi(db: Session, kpi: schemas.ProjectKpiCreate):
     db_kpi = models.Project_KPI(**kpi.model_dump())
     db.add(db_kpi)
+    kpi_engine.refresh_projects(db, [db_kpi.project_id])
     db.commit()
     db.refresh(db_kpi)
     return db_kpi
@@ -262,15 +768,296 @@ def delete_project_kpi(db: Session, kpi_id: int):
         return True
     return False
 
-# --- Llama3 Integration for KPI Classification ---
-def classify_and_update_project_kpi_class(db: Session, project_id: int):
-    db_kpi = db.query(models.Project_KPI).filter(models.Project_KPI.project_id == project_id).first()
-    if not db_kpi:
-        return None
+def recompute_project_kpis(db: Session):
+    return kpi_engine.recompute_all(db)
+
+# --- Bulk Writes ---
+# Batches are validated item by item with the regular Create schemas; the valid
+# rows are then written with one multi-row INSERT per chunk inside a single
+# transaction, so a batch costs one commit instead of one per row.
+BULK_CHUNK_SIZE = 500
+BULK_MAX_ITEMS = 10000
+
+def _validate_batch(schema, items: List[Any]):
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds the limit of {BULK_MAX_ITEMS} items")
+
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as e:
+            results[index] = schemas.BulkItemResult(
+                index=index,
+                status="error",
+                errors=e.errors(include_url=False, include_context=False),
+            )
+    return valid, results
+
+def _chunks(rows: list, size: int = BULK_CHUNK_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+def _bulk_result(results: List[schemas.BulkItemResult]):
+    failed = sum(1 for result in results if result.status == "error")
+    return schemas.BulkResult(succeeded=len(results) - failed, failed=failed, results=results)
+
+def _bulk_insert(db: Session, model, schema, items: List[Any], on_insert=None):
+    valid, results = _validate_batch(schema, items)
+    try:
+        for chunk in _chunks(valid):
+            stmt = insert(model).values([obj.model_dump() for _, obj in chunk]).returning(model.id)
+            # Rowids are assigned in VALUES order, but RETURNING order is unspecified
+            ids = sorted(db.execute(stmt).scalars().all())
+            for (index, _), new_id in zip(chunk, ids):
+                results[index] = schemas.BulkItemResult(index=index, status="created", id=new_id)
+        if on_insert:
+            on_insert(db, [obj for _, obj in valid])
+        kpi_engine.refresh_projects(db, {obj.project_id for _, obj in valid})
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Bulk insert failed, no rows were written: {e.orig or e}")
+    return valid, results
+
+def bulk_create_tasks(db: Session, items: List[Any]):
+    _, results = _bulk_insert(
+        db, models.Task, schemas.TaskCreate, items,
+        on_insert=lambda db, tasks: workload.refresh_employees(db, {task.assignee_id for task in tasks}),
+    )
+    return _bulk_result(results)
+
+def bulk_create_alerts(db: Session, items: List[Any]):
+    _, results = _bulk_insert(db, models.Alert, schemas.AlertCreate, items)
+    return _bulk_result(results)
+
+def bulk_create_budget_histories(db: Session, items: List[Any]):
+    _, results = _bulk_insert(
+        db, models.BudgetHistory, schemas.BudgetHistoryCreate, items,
+        on_insert=lambda db, histories: budget_rollups.apply_entries(db, _budget_entries(histories)),
+    )
+    return _bulk_result(results)
+
+def bulk_upsert_project_kpis(db: Session, items: List[Any]):
+    """
+    Inserts or updates KPI records keyed by project_id. Only the fields present
+    in an item are written when its project already has a KPI record.
+    """
+    valid, results = _validate_batch(schemas.ProjectKpiCreate, items)
+    project_ids = {obj.project_id for _, obj in valid}
+    existing = set()
+    for chunk in _chunks(list(project_ids)):
+        existing.update(db.scalars(
+            select(models.Project_KPI.project_id).where(models.Project_KPI.project_id.in_(chunk))
+        ))
+
+    # A multi-row VALUES list needs the same columns in every row, so items are
+    # grouped by the set of fields they provide.
+    groups: Dict[tuple, list] = {}
+    for index, obj in valid:
+        values = obj.model_dump(exclude_unset=True)
+        groups.setdefault(tuple(sorted(values)), []).append((index, values))
+
+    try:
+        for columns, group in groups.items():
+            for chunk in _chunks(group):
+                stmt = sqlite_insert(models.Project_KPI).values([values for _, values in chunk])
+                # An item carrying only project_id still needs a (no-op) SET so RETURNING reports its row
+                set_ = {column: stmt.excluded[column] for column in columns if column != "project_id"}
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[models.Project_KPI.project_id],
+                    set_=set_ or {"project_id": stmt.excluded.project_id},
+                ).returning(models.Project_KPI.project_id, models.Project_KPI.id)
+                ids_by_project = dict(db.execute(stmt).all())
+                for index, values in chunk:
+                    project_id = values["project_id"]
+                    results[index] = schemas.BulkItemResult(
+                        index=index,
+                        status="updated" if project_id in existing else "created",
+                        id=ids_by_project.get(project_id),
+                    )
+                    existing.add(project_id)
+        kpi_engine.refresh_projects(db, project_ids)
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Bulk upsert failed, no rows were written: {e.orig or e}")
+    return _bulk_result(results)
+
+# --- Streaming Export ---
+# Exports select plain columns (no ORM objects, no identity map) and stream
+# them from a server-side cursor in batches, so memory use does not depend on
+# the table size.
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# entity -> (model, response schema, filterable columns, column used by date_from/date_to).
+# Exports carry the fields of the entity's response schema, so internal columns
+# such as updated_at stay out of them.
+EXPORT_TABLES = {
+    "tasks": (models.Task, schemas.Task, ("project_id", "assignee_id", "status"), "due_date"),
+    "projects": (models.Project, schemas.Project, ("customer_id", "status"), "start_date"),
+    "budget-history": (models.BudgetHistory, schemas.BudgetHistory, ("project_id",), "date"),
+    "alerts": (models.Alert, schemas.Alert, ("project_id", "is_resolved", "type"), "created_at"),
+}
+
+def export_statement(entity: str, filters: Dict[str, Any], date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """
+    Builds the SELECT for an export of `entity`, ordered by id. `filters` maps
+    column names to required values, as for the list endpoints; None values are ignored.
+
+    Returns:
+        tuple: The statement and the exported column names.
+    """
+    if entity not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown export '{entity}'. Available: {', '.join(EXPORT_TABLES)}")
+    model, schema, filterable, date_column = EXPORT_TABLES[entity]
+    # id leads, as the first column of every CSV export
+    names = ["id", *(name for name in fast_json.schema_fields(schema) if name != "id")]
+    conditions = _filter_conditions(entity, model, filterable, date_column, filters, date_from, date_to)
+    stmt = select(*(getattr(model, name) for name in names)).where(*conditions).order_by(model.id)
+    return stmt, names
+
+def _export_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+async def stream_export(db: AsyncSession, stmt, columns: List[str], fmt: str) -> AsyncIterator[str]:
+    """Yields the export as NDJSON lines or CSV, one chunk per fetched batch of rows."""
+    result = await db.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        async for rows in result.partitions():
+            writer.writerows([_export_value(value) for value in row] for row in rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    else:
+        async for rows in result.partitions():
+            yield "".join(
+                json.dumps(dict(zip(columns, map(_export_value, row))), separators=(",", ":")) + "\n"
+                for row in rows
+            )
+
+# --- Dashboard Summary ---
+# The home page only needs totals, so they are aggregated in SQL. The result is
+# kept until one of its tables changes version, so a write from any process,
+# the CLIs included, retires it together with the ETag.
+DASHBOARD_TABLES = ("projects", "tasks", "customers", "alerts")
+
+_dashboard_cache = {}
+_dashboard_cache_lock = threading.Lock()
+
+def _compute_dashboard_summary(db: Session, project_limit: int):
+    def count_of(column):
+        return select(func.count(column)).scalar_subquery()
+
+    totals = db.execute(
+        select(
+            count_of(models.Project.id).label("total_projects"),
+            count_of(models.Task.id).label("total_tasks"),
+            count_of(models.Customer.id).label("total_customers"),
+            count_of(models.Alert.id).label("total_alerts"),
+            select(func.count(models.Alert.id))
+            .where(models.Alert.is_resolved.is_(False))
+            .scalar_subquery()
+            .label("unresolved_alerts"),
+            select(func.coalesce(func.sum(models.Project.budget_total), 0.0))
+            .scalar_subquery()
+            .label("total_budget"),
+            select(func.coalesce(func.sum(models.Project.budget_used), 0.0))
+            .scalar_subquery()
+            .label("total_budget_used"),
+        )
+    ).one()
+
+    status_rows = (
+        db.query(models.Task.status, func.count(models.Task.id))
+        .group_by(models.Task.status)
+        .all()
+    )
+
+    budget_rows = (
+        db.query(
+            models.Project.id,
+            models.Project.project_name,
+            models.Project.budget_total,
+            models.Project.budget_used,
+        )
+        .order_by(models.Project.budget_total.desc(), models.Project.id)
+        .limit(project_limit)
+        .all()
+    )
+
+    return schemas.DashboardSummary(
+        total_projects=totals.total_projects,
+        total_tasks=totals.total_tasks,
+        total_customers=totals.total_customers,
+        total_alerts=totals.total_alerts,
+        unresolved_alerts=totals.unresolved_alerts,
+        total_budget=totals.total_budget,
+        total_budget_used=totals.total_budget_used,
+        task_status_counts={status or "Unknown": count for status, count in status_rows},
+        project_budgets=[
+            schemas.ProjectBudgetSummary(
+                id=row.id,
+                project_name=row.project_name,
+                budget_total=row.budget_total or 0.0,
+                budget_used=row.budget_used or 0.0,
+            )
+            for row in budget_rows
+        ],
+    )
+
+def get_dashboard_summary(db: Session, project_limit: int = 50):
+    # Read before aggregating, as in count_rows: a write committing meanwhile moves
+    # the versions, so a snapshot can be stored under outdated ones but never be newer than them
+    versions = tuple(sorted(table_versions.versions(db, DASHBOARD_TABLES).items()))
+    with _dashboard_cache_lock:
+        cached = _dashboard_cache.get(project_limit)
+        if cached is not None and cached[0] == versions:
+            return cached[1]
+
+    summary = _compute_dashboard_summary(db, project_limit)
+
+    with _dashboard_cache_lock:
+        _dashboard_cache[project_limit] = (versions, summary)
+    return summary
+
+# --- KPI Classification Jobs ---
+def get_kpi_job(db: Session, job_id: int):
+    return db.query(models.KpiClassificationJob).filter(models.KpiClassificationJob.id == job_id).first()
+
+def create_kpi_job(db: Session, project_id: int):
+    db_job = models.KpiClassificationJob(project_id=project_id, status="queued")
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+def get_unfinished_kpi_job_ids(db: Session):
+    # Jobs that were queued or running when the server stopped are picked up again
+    return db.scalars(
+        select(models.KpiClassificationJob.id)
+        .where(models.KpiClassificationJob.status.in_(("queued", "running")))
+        .order_by(models.KpiClassificationJob.id)
+    ).all()
 
+def update_kpi_job(db: Session, job_id: int, **fields):
+    db.query(models.KpiClassificationJob).filter(models.KpiClassificationJob.id == job_id).update(fields)
+    db.commit()
+
+# --- Llama3 Integration for KPI Classification ---
+def _kpi_features(db_kpi: models.Project_KPI):
     # Prepare data for Llama3 - Ensure these fields exist on your models.Project_KPI
     # and correspond to the parameters in Llama3Client.classify_kpi_class
-    kpi_data = {
+    return {
         "completion_percentage": db_kpi.completion_percentage,
         "milestone_completion": db_kpi.milestone_completion,
         "budget_utilization": db_kpi.budget_utilization,
@@ -284,13 +1071,136 @@ def classify_and_update_project_kpi_class(db: Session, project_id: int):
         "risk_flag": db_kpi.risk_flag
     }
 
+def classify_and_update_project_kpi_class(db: Session, project_id: int):
+    db_kpi = db.query(models.Project_KPI).filter(models.Project_KPI.project_id == project_id).first()
+    if not db_kpi:
+        return None
+
+    kpi_data = _kpi_features(db_kpi)
+
     try:
-        # Call Llama3 client to get the classification
-        kpi_class_prediction = llama_client.classify_kpi_class(**kpi_data)
+        # Clear-cut projects are classified locally, the rest go to Llama3
+        [kpi_class_prediction] = classify_locally([kpi_data])
+        if kpi_class_prediction is None:
+            kpi_class_prediction = llama_client.classify_kpi_class(**kpi_data)
         db_kpi.kpi_class = kpi_class_prediction
         db.commit()
         db.refresh(db_kpi)
         return db_kpi
     except Exception as e:
         print(f"Error classifying KPI for project {project_id}: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def get_project_kpi_by_project(db: Session, project_id: int):
+    return db.query(models.Project_KPI).filter(models.Project_KPI.project_id == project_id).first()
+
+def _set_kpi_class(db: Session, db_kpi: models.Project_KPI, kpi_class: str):
+    db_kpi.kpi_class = kpi_class
+    db.commit()
+    db.refresh(db_kpi)
+    return db_kpi
+
+async def _classify_with_llama(kpi_data: dict) -> str:
+    try:
+        kpi_class = await async_llama_client.classify_kpi_class(**kpi_data)
+    except Llama3Unavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if kpi_class == "Error":
+        raise HTTPException(status_code=502, detail="Llama3 classification failed. Check backend logs.")
+    return kpi_class
+
+async def classify_and_update_project_kpi_class_async(db: AsyncSession, project_id: int):
+    """
+    Event-loop version of classify_and_update_project_kpi_class: database work
+    goes through the AsyncSession and the Llama3 call is awaited, so no worker
+    thread is held while the model answers.
+    """
+    db_kpi = await db.run_sync(get_project_kpi_by_project, project_id)
+    if not db_kpi:
+        return None
+    # End the read transaction so no pooled connection is held while Llama3 answers
+    await db.commit()
+
+    kpi_data = _kpi_features(db_kpi)
+    [kpi_class_prediction] = classify_locally([kpi_data])
+    if kpi_class_prediction is None:
+        kpi_class_prediction = await _classify_with_llama(kpi_data)
+    return await db.run_sync(_set_kpi_class, db_kpi, kpi_class_prediction)
+
+def _select_kpis_for_batch(db: Session, batch: schemas.KpiClassifyBatchRequest):
+    query = db.query(models.Project_KPI)
+    if batch.project_ids is not None:
+        query = query.filter(models.Project_KPI.project_id.in_(batch.project_ids))
+    if batch.kpi_class is not None:
+        query = query.filter(models.Project_KPI.kpi_class == batch.kpi_class)
+    if batch.risk_flag is not None:
+        query = query.filter(models.Project_KPI.risk_flag == batch.risk_flag)
+    return {db_kpi.project_id: db_kpi for db_kpi in query.order_by(models.Project_KPI.project_id)}
+
+async def classify_project_kpis_batch(db: AsyncSession, batch: schemas.KpiClassifyBatchRequest):
+    """
+    Classifies many projects and writes every successful classification back in
+    a single commit. All projects are first scored by the local tier in one
+    vectorized pass; only the low-confidence ones are sent to Llama3, with
+    concurrent calls.
+    """
+    started = time.perf_counter()
+    kpis = await db.run_sync(_select_kpis_for_batch, batch)
+    # End the read transaction so no pooled connection is held while Llama3 answers
+    await db.commit()
+
+    outcomes = {}
+    for project_id in batch.project_ids or []:
+        if project_id not in kpis:
+            outcomes[project_id] = schemas.KpiClassifyOutcome(
+                project_id=project_id, status="error", error="Project KPI not found"
+            )
+
+    features = {project_id: _kpi_features(db_kpi) for project_id, db_kpi in kpis.items()}
+    if batch.use_local_tier and features:
+        local = classify_locally(list(features.values()))
+        for project_id, prediction in zip(list(features), local):
+            if prediction is not None:
+                kpis[project_id].kpi_class = prediction
+                outcomes[project_id] = schemas.KpiClassifyOutcome(
+                    project_id=project_id, status="classified", kpi_class=prediction, source="local"
+                )
+                del features[project_id]
+    escalated = len(features)
+
+    # The client caps concurrency globally; a request may ask for less
+    limit = asyncio.Semaphore(min(batch.max_concurrency or KPI_CLASSIFY_MAX_CONCURRENCY, KPI_CLASSIFY_MAX_CONCURRENCY))
+
+    async def classify(kpi_data: dict) -> str:
+        async with limit:
+            return await _classify_with_llama(kpi_data)
+
+    predictions = await asyncio.gather(
+        *(classify(kpi_data) for kpi_data in features.values()), return_exceptions=True
+    )
+    for project_id, prediction in zip(features, predictions):
+        if isinstance(prediction, HTTPException):
+            outcomes[project_id] = schemas.KpiClassifyOutcome(
+                project_id=project_id, status="error", error=prediction.detail
+            )
+        elif isinstance(prediction, BaseException):
+            outcomes[project_id] = schemas.KpiClassifyOutcome(
+                project_id=project_id, status="error", error=str(prediction)
+            )
+        else:
+            kpis[project_id].kpi_class = prediction
+            outcomes[project_id] = schemas.KpiClassifyOutcome(
+                project_id=project_id, status="classified", kpi_class=prediction, source="llm"
+            )
+    if kpis:
+        await db.commit()
+
+    results = [outcomes[project_id] for project_id in sorted(outcomes)]
+    classified = sum(1 for outcome in results if outcome.status == "classified")
+    return schemas.KpiClassifyBatchResult(
+        classified=classified,
+        failed=len(results) - classified,
+        escalated=escalated,
+        elapsed_seconds=time.perf_counter() - started,
+        results=results,
+    )
@@ -0,0 +1,60 @@
+# Backend/fast_json.py
+
+from typing import Optional, Sequence, Tuple
+
+import orjson
+from fastapi import HTTPException, Response
+
+# With a response_model, FastAPI validates every returned ORM object through
+# from_attributes, reading each column back through SQLAlchemy's instrumented
+# attributes, before it dumps the list. List rows come straight from typed
+# table columns, so the fast path trusts them as they are: they are read as
+# plain tuples, without building ORM objects, and encoded by orjson, which
+# writes dates, floats, booleans and None the same way Pydantic does. The
+# price is that values are no longer checked against the schema; a NULL in a
+# column the schema requires goes out as null instead of failing the request.
+# Sparse fieldsets (?fields=) go through the same path, so that only the
+# requested columns are read and written.
+
+
+def schema_fields(schema) -> Tuple[str, ...]:
+    """Returns the fields of a response schema, in the order the validated path writes them."""
+    return tuple(schema.model_fields)
+
+
+def select_fields(schema, fields: Optional[str]) -> Tuple[str, ...]:
+    """
+    Resolves a comma-separated ?fields= list against `schema`, keeping the
+    schema's field order. No list selects every field.
+    """
+    available = schema_fields(schema)
+    if not fields:
+        return available
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(requested.difference(available))
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown) or '(none given)'}. Allowed: {', '.join(available)}",
+        )
+    return tuple(name for name in available if name in requested)
+
+
+def rows_response(rows, fields: Sequence[str], response: Response) -> Response:
+    """
+    Encodes `rows`, tuples whose leading values belong to `fields`, as a JSON
+    list of objects. FastAPI drops the headers set on the injected `response`
+    when an endpoint returns its own Response, so they are carried over.
+    """
+    return _encoded([dict(zip(fields, row)) for row in rows], response)
+
+
+def row_response(row, fields: Sequence[str], response: Response) -> Response:
+    """Encodes a single row as a JSON object, like rows_response()."""
+    return _encoded(dict(zip(fields, row)), response)
+
+
+def _encoded(content, response: Response) -> Response:
+    encoded = Response(content=orjson.dumps(content), media_type="application/json")
+    encoded.headers.raw.extend(response.headers.raw)
+    return encoded
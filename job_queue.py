@@ -0,0 +1,148 @@
+# Backend/job_queue.py
+
+import asyncio
+from datetime import datetime
+from typing import Any, Awaitable, Callable, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import async_crud, models
+from database import AsyncSessionLocal
+
+
+class QueueFull(Exception):
+    """Raised by KpiJobQueue.submit when `max_pending` jobs are already waiting."""
+
+
+class KpiJobQueue:
+    """
+    In-process queue for KPI classification jobs; no external broker needed.
+
+    Every job is a row in kpi_classification_jobs, so a client can poll its
+    status and work that was queued or running when the server stopped is
+    resumed on the next start. A fixed number of asyncio workers drain the
+    queue through the async Llama3 client.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 100, session_factory: Callable[[], AsyncSession] = AsyncSessionLocal):
+        """
+        Args:
+            workers (int): Number of jobs processed concurrently.
+            max_pending (int): Jobs allowed to wait before submit() raises QueueFull.
+            session_factory (callable): Creates the database sessions used by the workers.
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self.session_factory = session_factory
+        self._queue: "asyncio.Queue[int]" = asyncio.Queue()
+        self._reserved = 0
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() + self._reserved
+
+    async def start(self) -> None:
+        async with self.session_factory() as db:
+            # Recovered jobs are queued regardless of max_pending, which only throttles new submissions
+            for job_id in await async_crud.get_unfinished_kpi_job_ids(db):
+                self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        # Interrupted jobs stay "running" in the table and are resumed on the next start
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, project_id: int) -> models.KpiClassificationJob:
+        if self.pending >= self.max_pending:
+            raise QueueFull(f"{self.pending} classification jobs are already pending")
+        # Hold a slot while the job row is written so concurrent submits cannot overshoot
+        self._reserved += 1
+        try:
+            async with self.session_factory() as db:
+                db_job = await async_crud.create_kpi_job(db, project_id)
+        finally:
+            self._reserved -= 1
+        self._queue.put_nowait(db_job.id)
+        return db_job
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                print(f"Error running KPI classification job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: int) -> None:
+        async with self.session_factory() as db:
+            db_job = await async_crud.get_kpi_job(db, job_id)
+            if db_job is None or db_job.status in ("succeeded", "failed"):
+                return
+            project_id = db_job.project_id
+            await async_crud.update_kpi_job(db, job_id, status="running", started_at=datetime.utcnow())
+
+            try:
+                db_kpi = await async_crud.classify_and_update_project_kpi_class(db, project_id)
+            except HTTPException as e:
+                result = {"status": "failed", "error": str(e.detail)}
+            except Exception as e:
+                result = {"status": "failed", "error": str(e)}
+            else:
+                if db_kpi is None:
+                    result = {"status": "failed", "error": "Project KPI not found"}
+                else:
+                    result = {"status": "succeeded", "kpi_class": db_kpi.kpi_class}
+
+            await async_crud.update_kpi_job(db, job_id, finished_at=datetime.utcnow(), **result)
+
+
+def _did_work(result: Any) -> bool:
+    """Tells whether a job result reports work done: a non-zero count, or a dict with one."""
+    if isinstance(result, dict):
+        return any(result.values())
+    return bool(result)
+
+
+class PeriodicJob:
+    """
+    Runs `job` in the background every `interval_seconds`, first right after
+    start(). Each run gets its own session; a failed run is logged and the
+    next one happens on schedule. A run is logged only when its result, a count
+    or a dict of counts, reports some work done, so idle ticks stay quiet.
+    """
+
+    def __init__(self, name: str, job: Callable[[AsyncSession], Awaitable[Any]], interval_seconds: float,
+                 session_factory: Callable[[], AsyncSession] = AsyncSessionLocal):
+        self.name = name
+        self.job = job
+        self.interval_seconds = interval_seconds
+        self.session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self.interval_seconds > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                async with self.session_factory() as db:
+                    result = await self.job(db)
+                if _did_work(result):
+                    print(f"{self.name} finished: {result}")
+            except Exception as e:
+                print(f"Error running {self.name}: {e}")
+            await asyncio.sleep(self.interval_seconds)
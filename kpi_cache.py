@@ -0,0 +1,254 @@
+# Backend/kpi_cache.py
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class KpiClassificationCache:
+    """
+    Caches Llama3 KPI classifications keyed by the project's KPI feature vector,
+    the model name and the prompt version, so unchanged projects are not sent
+    to the LLM again.
+
+    Entries live in an in-memory LRU in front of a local SQLite table, which
+    keeps them across restarts. Both tiers expire entries after `ttl_seconds`.
+    Concurrent lookups of the same missing key share a single computation.
+    """
+
+    def __init__(self, path: str = "./kpi_cache.db", max_entries: int = 10000, ttl_seconds: float = 7 * 24 * 3600):
+        """
+        Args:
+            path (str): SQLite file holding the persisted entries (":memory:" disables persistence).
+            max_entries (int): Maximum number of entries kept in memory and on disk.
+            ttl_seconds (float): Age after which an entry is ignored and recomputed.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # _lock guards the in-memory state and is never held across I/O, so taking it
+        # on the event loop cannot stall; _db_lock serialises use of the SQLite connection
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        # Only touched from the event loop, so it needs no lock
+        self._inflight_async: Dict[str, asyncio.Future] = {}
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._compute_seconds = 0.0
+        self._computations = 0
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS kpi_classification_cache (
+                key TEXT PRIMARY KEY,
+                kpi_class TEXT NOT NULL,
+                features TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_kpi_classification_cache_created_at "
+            "ON kpi_classification_cache (created_at)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def canonical_features(features: Dict[str, Any]) -> str:
+        # 3 and 3.0 describe the same project, so numbers are normalised before hashing
+        normalised = {
+            name: value if isinstance(value, bool) or value is None else round(float(value), 6)
+            for name, value in features.items()
+        }
+        return json.dumps(normalised, sort_keys=True, separators=(",", ":"))
+
+    @classmethod
+    def make_key(cls, features: Dict[str, Any], model_name: str, prompt_version: str) -> str:
+        material = f"{model_name}\x1f{prompt_version}\x1f{cls.canonical_features(features)}"
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[1] <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    return entry[0]
+                del self._memory[key]
+
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT kpi_class, created_at FROM kpi_classification_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or now - row[1] > self.ttl_seconds:
+            return None
+        with self._lock:
+            self._remember(key, row[0], row[1])
+        return row[0]
+
+    def put(self, key: str, kpi_class: str, features: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, kpi_class, now)
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kpi_classification_cache (key, kpi_class, features, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, kpi_class, self.canonical_features(features), now),
+            )
+            self._conn.execute(
+                "DELETE FROM kpi_classification_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            self._conn.execute(
+                """
+                DELETE FROM kpi_classification_cache WHERE key IN (
+                    SELECT key FROM kpi_classification_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def _remember(self, key: str, kpi_class: str, created_at: float) -> None:
+        self._memory[key] = (kpi_class, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], str],
+        features: Dict[str, Any],
+        cacheable: Callable[[str], bool] = lambda value: True,
+    ) -> str:
+        """
+        Returns the cached classification for `key`, or runs `compute` to produce it.
+        Callers that miss on a key already being computed wait for that result
+        instead of starting another LLM call. Results rejected by `cacheable`
+        are returned but not stored.
+        """
+        cached = self.get(key)
+        with self._lock:
+            if cached is not None:
+                self._hits += 1
+                return cached
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self._misses += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        started = time.perf_counter()
+        try:
+            value = compute()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                self._compute_seconds += time.perf_counter() - started
+                self._computations += 1
+
+        if cacheable(value):
+            self.put(key, value, features)
+        return value
+
+    async def get_or_compute_async(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[str]],
+        features: Dict[str, Any],
+        cacheable: Callable[[str], bool] = lambda value: True,
+    ) -> str:
+        """Event-loop version of get_or_compute; `compute` returns an awaitable."""
+        # get() may read SQLite, and waits while another thread commits, so it runs off the event loop
+        cached = await asyncio.to_thread(self.get, key)
+        future = self._inflight_async.get(key)
+        leader = cached is None and future is None
+        if leader:
+            future = asyncio.get_running_loop().create_future()
+            self._inflight_async[key] = future
+        with self._lock:
+            if cached is not None:
+                self._hits += 1
+            elif leader:
+                self._misses += 1
+            else:
+                self._coalesced += 1
+        if cached is not None:
+            return cached
+
+        if not leader:
+            # shield() keeps a cancelled waiter from cancelling the shared call
+            return await asyncio.shield(future)
+
+        started = time.perf_counter()
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else is waiting on it
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            self._inflight_async.pop(key, None)
+            with self._lock:
+                self._compute_seconds += time.perf_counter() - started
+                self._computations += 1
+
+        if cacheable(value):
+            # put() commits to SQLite, so keep it off the event loop
+            await asyncio.to_thread(self.put, key, value, features)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._db_lock:
+            persisted = self._conn.execute("SELECT COUNT(*) FROM kpi_classification_cache").fetchone()[0]
+        with self._lock:
+            lookups = self._hits + self._misses + self._coalesced
+            avg_compute = self._compute_seconds / self._computations if self._computations else 0.0
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "hit_rate": (self._hits + self._coalesced) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "persisted_entries": persisted,
+                "avg_llm_seconds": avg_compute,
+                # Every hit or coalesced lookup is an LLM call that was not made
+                "estimated_llm_seconds_saved": (self._hits + self._coalesced) * avg_compute,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        with self._db_lock:
+            self._conn.execute("DELETE FROM kpi_classification_cache")
+            self._conn.commit()
@@ -0,0 +1,176 @@
+# Backend/kpi_engine.py
+
+from datetime import date
+from typing import Iterable, Optional
+
+from sqlalchemy import and_, case, func, or_, select, true, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+import models
+
+# Project_KPI fields that are derived from Task, Alert, BudgetHistory and Customer rows,
+# and from the employee workload maintained by workload.py.
+# The remaining fields (milestones, schedule variance, risk flag, ...) stay manual.
+DERIVED_FIELDS = (
+    "overdue_tasks",
+    "alert_count",
+    "avg_task_completion_time",
+    "reopened_tasks",
+    "budget_utilization",
+    "customer_priority_level",
+    "employee_workload_index",
+)
+
+DONE_TASK_STATUSES = ("Done", "Completed")
+DEFAULT_CUSTOMER_PRIORITY = 3
+REFRESH_CHUNK_SIZE = 500
+
+
+def _derived_kpis_select(project_ids: Optional[list] = None, today: Optional[date] = None):
+    """
+    Builds one SELECT that yields (project_id, *DERIVED_FIELDS) for every project,
+    or only for `project_ids`. Each input table is aggregated once with GROUP BY
+    and joined to projects, so the cost does not depend on how many projects
+    are refreshed.
+    """
+    today = today or date.today()
+    Task, Alert, BudgetHistory = models.Task, models.Alert, models.BudgetHistory
+    Project, Customer = models.Project, models.Customer
+
+    is_overdue = or_(
+        Task.status == "Overdue",
+        and_(
+            func.coalesce(Task.status, "").not_in(DONE_TASK_STATUSES),
+            Task.completion_date.is_(None),
+            Task.due_date < today,
+        ),
+    )
+    task_stats = select(
+        Task.project_id.label("project_id"),
+        func.sum(case((is_overdue, 1), else_=0)).label("overdue_tasks"),
+        func.sum(case((Task.reopened_count > 0, 1), else_=0)).label("reopened_tasks"),
+        # Tasks have no creation date, so completion time is measured from the project start
+        func.avg(func.julianday(Task.completion_date)).label("avg_completion_day"),
+    ).group_by(Task.project_id)
+
+    alert_stats = (
+        select(Alert.project_id.label("project_id"), func.count(Alert.id).label("alert_count"))
+        .where(Alert.is_resolved.is_(False))
+        .group_by(Alert.project_id)
+    )
+
+    budget_stats = select(
+        BudgetHistory.project_id.label("project_id"),
+        func.sum(BudgetHistory.amount_spent).label("amount_spent"),
+    ).group_by(BudgetHistory.project_id)
+
+    Load, Workload = models.EmployeeProjectLoad, models.EmployeeWorkload
+    workload_stats = (
+        select(Load.project_id.label("project_id"), func.avg(Workload.workload_index).label("workload_index"))
+        .join(Workload, Workload.employee_id == Load.employee_id)
+        .group_by(Load.project_id)
+    )
+
+    if project_ids is not None:
+        task_stats = task_stats.where(Task.project_id.in_(project_ids))
+        alert_stats = alert_stats.where(Alert.project_id.in_(project_ids))
+        budget_stats = budget_stats.where(BudgetHistory.project_id.in_(project_ids))
+        workload_stats = workload_stats.where(Load.project_id.in_(project_ids))
+
+    task_stats = task_stats.subquery()
+    alert_stats = alert_stats.subquery()
+    budget_stats = budget_stats.subquery()
+    workload_stats = workload_stats.subquery()
+
+    stmt = (
+        select(
+            Project.id.label("project_id"),
+            func.coalesce(task_stats.c.overdue_tasks, 0).label("overdue_tasks"),
+            func.coalesce(alert_stats.c.alert_count, 0).label("alert_count"),
+            func.coalesce(
+                task_stats.c.avg_completion_day - func.julianday(Project.start_date), 0.0
+            ).label("avg_task_completion_time"),
+            func.coalesce(task_stats.c.reopened_tasks, 0).label("reopened_tasks"),
+            func.coalesce(
+                budget_stats.c.amount_spent * 100.0 / func.nullif(Project.budget_total, 0), 0.0
+            ).label("budget_utilization"),
+            func.coalesce(Customer.priority_level, DEFAULT_CUSTOMER_PRIORITY).label("customer_priority_level"),
+            func.coalesce(workload_stats.c.workload_index, 0.0).label("employee_workload_index"),
+        )
+        .select_from(Project)
+        .outerjoin(task_stats, task_stats.c.project_id == Project.id)
+        .outerjoin(alert_stats, alert_stats.c.project_id == Project.id)
+        .outerjoin(budget_stats, budget_stats.c.project_id == Project.id)
+        .outerjoin(workload_stats, workload_stats.c.project_id == Project.id)
+        .outerjoin(Customer, Customer.id == Project.customer_id)
+        # SQLite needs a WHERE clause before ON CONFLICT in INSERT ... SELECT
+        .where(true())
+    )
+    if project_ids is not None:
+        stmt = stmt.where(Project.id.in_(project_ids))
+    return stmt
+
+
+def _upsert_derived_kpis(db: Session, project_ids: Optional[list], create_missing: bool) -> int:
+    derived = _derived_kpis_select(project_ids)
+    if not create_missing:
+        derived = derived.where(models.Project.id.in_(select(models.Project_KPI.project_id)))
+
+    stmt = sqlite_insert(models.Project_KPI).from_select(["project_id", *DERIVED_FIELDS], derived)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.Project_KPI.project_id],
+        set_={field: stmt.excluded[field] for field in DERIVED_FIELDS},
+    )
+    return db.execute(stmt).rowcount
+
+
+def recompute_all(db: Session) -> int:
+    """
+    Recomputes the derived KPI fields for the whole portfolio in one statement,
+    creating KPI records for projects that do not have one yet.
+
+    Returns:
+        int: The number of KPI records written.
+    """
+    count = _upsert_derived_kpis(db, None, create_missing=True)
+    db.commit()
+    return count
+
+
+def refresh_projects(db: Session, project_ids: Iterable[Optional[int]]) -> None:
+    """
+    Brings the derived KPI fields of the given projects up to date after their
+    tasks, alerts, budget history or customer changed. Runs inside the caller's
+    transaction and leaves the commit to it. Projects without a KPI record are
+    skipped; they get one from recompute_all or POST /api/project-kpis.
+    """
+    ids = sorted({project_id for project_id in project_ids if project_id is not None})
+    if not ids:
+        return
+    db.flush()
+    for start in range(0, len(ids), REFRESH_CHUNK_SIZE):
+        _upsert_derived_kpis(db, ids[start:start + REFRESH_CHUNK_SIZE], create_missing=False)
+
+
+def refresh_workload_index(db: Session, project_ids: Iterable[Optional[int]]) -> None:
+    """
+    Updates only employee_workload_index for the given projects, after the
+    workload of employees working on them changed. Reads the employee_project_load
+    rows of each project, never its tasks. Leaves the commit to the caller.
+    """
+    ids = sorted({project_id for project_id in project_ids if project_id is not None})
+    Load, Workload, KPI = models.EmployeeProjectLoad, models.EmployeeWorkload, models.Project_KPI
+    average = (
+        select(func.avg(Workload.workload_index))
+        .join_from(Load, Workload, Workload.employee_id == Load.employee_id)
+        .where(Load.project_id == KPI.project_id)
+        .scalar_subquery()
+    )
+    for start in range(0, len(ids), REFRESH_CHUNK_SIZE):
+        db.execute(
+            update(KPI)
+            .where(KPI.project_id.in_(ids[start:start + REFRESH_CHUNK_SIZE]))
+            .values(employee_workload_index=func.coalesce(average, 0.0))
+            .execution_options(synchronize_session=False)
+        )
@@ -0,0 +1,193 @@
+# Backend/kpi_scoring.py
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Order of the columns in every feature matrix; matches the parameters of
+# Llama3Client.classify_kpi_class.
+FEATURES = (
+    "completion_percentage",
+    "milestone_completion",
+    "budget_utilization",
+    "schedule_variance",
+    "overdue_tasks",
+    "alert_count",
+    "avg_task_completion_time",
+    "employee_workload_index",
+    "customer_priority_level",
+    "reopened_tasks",
+    "risk_flag",
+)
+CLASSES = ("Low", "Medium", "High")
+CLASS_TARGETS = {"Low": -1.0, "Medium": 0.0, "High": 1.0}
+
+DEFAULT_MODEL_PATH = "./kpi_scoring_model.json"
+DEFAULT_MIN_CONFIDENCE = 0.6
+
+# Hand-tuned fallback used until a model has been distilled from Llama3 labels.
+# Each feature is standardised as (x - center) / scale and weighted; a positive
+# score means a healthy project.
+DEFAULT_MODEL = {
+    "center": [50.0, 50.0, 90.0, 0.0, 2.0, 1.0, 10.0, 70.0, 3.0, 1.0, 0.0],
+    "scale": [25.0, 25.0, 15.0, 7.0, 2.0, 2.0, 5.0, 15.0, 1.0, 1.0, 1.0],
+    "weights": [1.0, 1.0, -1.0, 1.0, -1.0, -1.0, -0.5, -0.5, 0.0, -0.5, -1.0],
+    "bias": 0.0,
+    "thresholds": [-3.0, 3.0],
+    "margin_scale": 2.0,
+}
+
+
+class KpiScorer:
+    """
+    Linear ordinal scorer for project KPIs. A project's score is compared with a
+    low and a high threshold to pick Low, Medium or High; the distance to the
+    nearest threshold gives a confidence in [0, 1). Whole feature matrices are
+    scored at once with NumPy.
+    """
+
+    def __init__(self, model: Optional[Dict] = None):
+        model = model or DEFAULT_MODEL
+        self.model = model
+        self.center = np.asarray(model["center"], dtype=float)
+        self.scale = np.asarray(model["scale"], dtype=float)
+        self.weights = np.asarray(model["weights"], dtype=float)
+        self.bias = float(model["bias"])
+        self.low_threshold, self.high_threshold = (float(t) for t in model["thresholds"])
+        self.margin_scale = float(model["margin_scale"])
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_MODEL_PATH) -> "KpiScorer":
+        """Loads a distilled model from `path`, falling back to DEFAULT_MODEL."""
+        if os.path.exists(path):
+            with open(path) as f:
+                return cls(json.load(f))
+        return cls()
+
+    def save(self, path: str = DEFAULT_MODEL_PATH) -> None:
+        with open(path, "w") as f:
+            json.dump(self.model, f, indent=2)
+
+    def score(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Classifies every row of the (n, len(FEATURES)) matrix `X`.
+
+        Returns:
+            tuple: An array of class indices into CLASSES and an array of confidences.
+        """
+        raw = ((X - self.center) / self.scale) @ self.weights + self.bias
+        labels = np.ones(len(raw), dtype=int)
+        labels[raw <= self.low_threshold] = 0
+        labels[raw >= self.high_threshold] = 2
+        margin = np.minimum(np.abs(raw - self.low_threshold), np.abs(raw - self.high_threshold))
+        return labels, np.tanh(margin / self.margin_scale)
+
+    def classify(self, X: np.ndarray, min_confidence: float = DEFAULT_MIN_CONFIDENCE):
+        """
+        Returns the predicted class name per row, or None where the confidence is
+        below `min_confidence` and the row should be escalated to Llama3.
+        """
+        labels, confidence = self.score(X)
+        return [CLASSES[label] if conf >= min_confidence else None for label, conf in zip(labels, confidence)]
+
+
+def feature_matrix(rows: List[Dict]) -> np.ndarray:
+    """Builds the feature matrix from dicts keyed by FEATURES (booleans become 0/1)."""
+    return np.array([[float(row[name] or 0) for name in FEATURES] for row in rows], dtype=float).reshape(-1, len(FEATURES))
+
+
+def fit(X: np.ndarray, labels: List[str]) -> KpiScorer:
+    """
+    Distils a scorer from Llama3 labels: features are standardised, Low/Medium/High
+    are mapped to -1/0/+1 and the weights are fitted by least squares. The class
+    thresholds then sit halfway between the targets.
+    """
+    y = np.array([CLASS_TARGETS[label] for label in labels])
+    center = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    Z = np.hstack([(X - center) / scale, np.ones((len(X), 1))])
+    coef, *_ = np.linalg.lstsq(Z, y, rcond=None)
+    return KpiScorer({
+        "center": center.tolist(),
+        "scale": scale.tolist(),
+        "weights": coef[:-1].tolist(),
+        "bias": float(coef[-1]),
+        "thresholds": [-0.5, 0.5],
+        "margin_scale": 0.25,
+    })
+
+
+def evaluate(scorer: KpiScorer, X: np.ndarray, labels: List[str], min_confidence: float, llm_seconds: float) -> Dict:
+    """Compares the scorer with Llama3 labels and estimates the LLM time it saves."""
+    started = time.perf_counter()
+    predicted, confidence = scorer.score(X)
+    local_seconds = time.perf_counter() - started
+
+    truth = np.array([CLASSES.index(label) for label in labels])
+    confident = confidence >= min_confidence
+    handled = int(confident.sum())
+    agree = predicted == truth
+    return {
+        "rows": len(truth),
+        "agreement": float(agree.mean()) if len(truth) else 0.0,
+        "agreement_when_confident": float(agree[confident].mean()) if handled else 0.0,
+        "handled_locally": handled,
+        "escalated": len(truth) - handled,
+        "local_seconds": local_seconds,
+        "llm_seconds_all": len(truth) * llm_seconds,
+        "llm_seconds_tiered": (len(truth) - handled) * llm_seconds + local_seconds,
+        "estimated_seconds_saved": handled * llm_seconds - local_seconds,
+    }
+
+
+def load_cached_labels(cache_path: str) -> Tuple[np.ndarray, List[str]]:
+    """Reads past Llama3 classifications from the KpiClassificationCache table."""
+    conn = sqlite3.connect(cache_path)
+    try:
+        rows = conn.execute("SELECT features, kpi_class FROM kpi_classification_cache").fetchall()
+    finally:
+        conn.close()
+    rows = [(json.loads(features), kpi_class) for features, kpi_class in rows if kpi_class in CLASSES]
+    return feature_matrix([features for features, _ in rows]), [kpi_class for _, kpi_class in rows]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Train or evaluate the local KPI classifier tier against Llama3 labels.")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("--cache-path", default=os.getenv("KPI_CACHE_PATH", "./kpi_cache.db"),
+                        help="KPI classification cache holding past Llama3 labels")
+    parser.add_argument("--model-path", default=os.getenv("KPI_SCORER_PATH", DEFAULT_MODEL_PATH))
+    parser.add_argument("--min-confidence", type=float, default=DEFAULT_MIN_CONFIDENCE)
+    parser.add_argument("--llm-seconds", type=float, default=3.0,
+                        help="Average latency of one Llama3 classification, used for the savings estimate")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction of labels held out for evaluation when training")
+    args = parser.parse_args(argv)
+
+    X, labels = load_cached_labels(args.cache_path)
+    if not labels:
+        parser.exit(1, f"No Llama3 labels found in {args.cache_path}\n")
+
+    if args.command == "train":
+        order = np.random.default_rng(0).permutation(len(labels))
+        n_test = int(len(labels) * args.holdout)
+        test, train = order[:n_test], order[n_test:]
+        scorer = fit(X[train], [labels[i] for i in train])
+        scorer.save(args.model_path)
+        print(f"Trained on {len(train)} labels, model written to {args.model_path}")
+        if n_test:
+            X, labels = X[test], [labels[i] for i in test]
+    else:
+        scorer = KpiScorer.load(args.model_path)
+
+    report = evaluate(scorer, X, labels, args.min_confidence, args.llm_seconds)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
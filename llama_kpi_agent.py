@@ -1,14 +1,91 @@
 # Backend/llama_kpi_agent.py
 
+import asyncio
 import json
+import random
+import time
+import httpx
 import requests
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+# Bump KPI_PROMPT_VERSION whenever KPI_PROMPT_TEMPLATE changes so cached
+# classifications made with the old prompt are no longer used.
+KPI_PROMPT_VERSION = "1"
+KPI_PROMPT_TEMPLATE = """
+        You are an expert project manager and an AI assistant designed to classify project KPI performance.
+        Given the following project parameters, classify the project's overall KPI class as 'Low', 'Medium', or 'High'.
+        Only respond with one of these three words: 'Low', 'Medium', or 'High'. Do not include any other text or explanation.
+
+        Project Parameters:
+        - Completion Percentage: {completion_percentage}%
+        - Milestone Completion: {milestone_completion}%
+        - Budget Utilization: {budget_utilization}%
+        - Schedule Variance: {schedule_variance} days (positive is ahead, negative is behind)
+        - Overdue Tasks: {overdue_tasks}
+        - Alert Count: {alert_count}
+        - Average Task Completion Time: {avg_task_completion_time} days
+        - Employee Workload Index: {employee_workload_index}
+        - Customer Priority Level: {customer_priority_level} (1=highest, 5=lowest)
+        - Reopened Tasks: {reopened_tasks}
+        - Risk Flag: {risk_flag}
+
+        Based on these parameters, what is the KPI class of this project?
+        """
+
+def kpi_features(
+    completion_percentage: float,
+    milestone_completion: float,
+    budget_utilization: float,
+    schedule_variance: float,
+    overdue_tasks: int,
+    alert_count: int,
+    avg_task_completion_time: float,
+    employee_workload_index: float,
+    customer_priority_level: int,
+    reopened_tasks: int,
+    risk_flag: bool
+) -> Dict[str, Any]:
+    return {
+        "completion_percentage": completion_percentage,
+        "milestone_completion": milestone_completion,
+        "budget_utilization": budget_utilization,
+        "schedule_variance": schedule_variance,
+        "overdue_tasks": overdue_tasks,
+        "alert_count": alert_count,
+        "avg_task_completion_time": avg_task_completion_time,
+        "employee_workload_index": employee_workload_index,
+        "customer_priority_level": customer_priority_level,
+        "reopened_tasks": reopened_tasks,
+        "risk_flag": risk_flag,
+    }
+
+def build_payload(model_name: str, features: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "model": model_name,
+        "prompt": KPI_PROMPT_TEMPLATE.format(**features),
+        "stream": False # Set to False for single, complete response
+    }
+
+def parse_classification(result: Dict[str, Any]) -> str:
+    """Maps an Ollama /api/generate response to "Low", "Medium", "High" or "Error"."""
+    if result.get('response'):
+        text = result['response'].strip().capitalize()
+        if text in ["Low", "Medium", "High"]:
+            return text
+        else:
+            print(f"Warning: Llama3 returned an unexpected classification: '{text}'. Defaulting to 'Medium'.")
+            return "Medium"
+    else:
+        print("Error: Llama3 API response structure is unexpected or 'response' field is missing.")
+        print(f"Full Llama3 response: {result}") # Print full response for debugging
+        return "Error"
 
 class Llama3Client:
     """
     A client to interact with a local Llama3 agent for KPI classification.
     """
-    def __init__(self, api_url: str = "http://localhost:11434/api/generate", model_name: str = "llama3"):
+    def __init__(self, api_url: str = "http://localhost:11434/api/generate", model_name: str = "llama3",
+                 cache: Optional[Any] = None, connect_timeout: float = 3.0, read_timeout: float = 60.0):
         """
         Initializes the Llama3Client.
 
@@ -16,9 +93,17 @@ class Llama3Client:
             api_url (str): The URL of your local Llama3 API endpoint.
                            Defaults to 'http://localhost:11434/api/generate' for Ollama.
             model_name (str): The name of the Llama3 model you're using llama3
+            cache (KpiClassificationCache, optional): Cache consulted before calling the model.
+                           Only successful classifications are stored.
+            connect_timeout (float): Seconds to wait for a connection to the agent.
+            read_timeout (float): Seconds to wait for the agent's answer.
         """
         self.api_url = api_url
         self.model_name = model_name
+        self.cache = cache
+        self.timeout = (connect_timeout, read_timeout)
+        # A Session keeps connections to the agent alive between calls
+        self.session = requests.Session()
 
     def classify_kpi_class(
         self,
@@ -57,56 +142,37 @@ class Llama3Client:
             str: The classified KPI class ("Low", "Medium", or "High"), or "Error" if classification fails.
         """
 
-        # Construct the prompt for the Llama3 model
-        prompt = f"""
-        You are an expert project manager and an AI assistant designed to classify project KPI performance.
-        Given the following project parameters, classify the project's overall KPI class as 'Low', 'Medium', or 'High'.
-        Only respond with one of these three words: 'Low', 'Medium', or 'High'. Do not include any other text or explanation.
-
-        Project Parameters:
-        - Completion Percentage: {completion_percentage}%
-        - Milestone Completion: {milestone_completion}%
-        - Budget Utilization: {budget_utilization}%
-        - Schedule Variance: {schedule_variance} days (positive is ahead, negative is behind)
-        - Overdue Tasks: {overdue_tasks}
-        - Alert Count: {alert_count}
-        - Average Task Completion Time: {avg_task_completion_time} days
-        - Employee Workload Index: {employee_workload_index}
-        - Customer Priority Level: {customer_priority_level} (1=highest, 5=lowest)
-        - Reopened Tasks: {reopened_tasks}
-        - Risk Flag: {risk_flag}
+        features = kpi_features(
+            completion_percentage, milestone_completion, budget_utilization, schedule_variance,
+            overdue_tasks, alert_count, avg_task_completion_time, employee_workload_index,
+            customer_priority_level, reopened_tasks, risk_flag
+        )
+        if self.cache is None:
+            return self._request_classification(features)
 
-        Based on these parameters, what is the KPI class of this project?
-        """
+        key = self.cache.make_key(features, self.model_name, KPI_PROMPT_VERSION)
+        return self.cache.get_or_compute(
+            key,
+            lambda: self._request_classification(features),
+            features,
+            cacheable=lambda kpi_class: kpi_class != "Error",
+        )
 
-        payload = {
-            "model": self.model_name,
-            "prompt": prompt,
-            "stream": False # Set to False for single, complete response
-        }
+    def _request_classification(self, features: Dict[str, Any]) -> str:
+        # Construct the prompt for the Llama3 model
+        payload = build_payload(self.model_name, features)
 
         try:
             # Make the API call to your local Llama3 agent
-            response = requests.post(
+            response = self.session.post(
                 self.api_url,
                 headers={'Content-Type': 'application/json'},
-                json=payload
+                json=payload,
+                timeout=self.timeout
             )
             response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
 
-            result = response.json()
-
-            if result.get('response'):
-                text = result['response'].strip().capitalize()
-                if text in ["Low", "Medium", "High"]:
-                    return text
-                else:
-                    print(f"Warning: Llama3 returned an unexpected classification: '{text}'. Defaulting to 'Medium'.")
-                    return "Medium"
-            else:
-                print("Error: Llama3 API response structure is unexpected or 'response' field is missing.")
-                print(f"Full Llama3 response: {result}") # Print full response for debugging
-                return "Error"
+            return parse_classification(response.json())
 
         except requests.exceptions.ConnectionError:
             print(f"Error: Could not connect to local Llama3 agent at {self.api_url}.")
@@ -119,6 +185,157 @@ class Llama3Client:
             print(f"An unexpected error occurred: {e}")
             return "Error"
 
+class Llama3Unavailable(Exception):
+    """Raised without contacting the agent while the circuit breaker is open."""
+
+class CircuitBreaker:
+    """
+    Stops calls to the agent after `failure_threshold` consecutive failures.
+    Once `reset_timeout` seconds have passed a single trial call is let through;
+    its outcome closes the circuit again or re-opens it.
+    """
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def release(self) -> None:
+        """Gives up a half-open trial that ended without a verdict (e.g. cancelled)."""
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+class AsyncLlama3Client:
+    """
+    Non-blocking counterpart of Llama3Client for use inside the event loop.
+
+    Requests go through one pooled httpx.AsyncClient with keep-alive connections,
+    bounded connect/read timeouts and a semaphore limiting concurrent calls.
+    Transport errors and 5xx answers are retried with exponential backoff, and a
+    circuit breaker fails fast while the agent is down.
+    """
+    def __init__(self, api_url: str = "http://localhost:11434/api/generate", model_name: str = "llama3",
+                 cache: Optional[Any] = None, connect_timeout: float = 3.0, read_timeout: float = 60.0,
+                 max_retries: int = 2, backoff_base: float = 0.5, max_concurrency: int = 4,
+                 max_connections: int = 10, breaker: Optional[CircuitBreaker] = None):
+        """
+        Args:
+            api_url (str): The URL of your local Llama3 API endpoint.
+            model_name (str): The name of the Llama3 model you're using llama3
+            cache (KpiClassificationCache, optional): Cache consulted before calling the model.
+            connect_timeout (float): Seconds to wait for a connection to the agent.
+            read_timeout (float): Seconds to wait for the agent's answer.
+            max_retries (int): Extra attempts after a transport error or 5xx answer.
+            backoff_base (float): Delay before the first retry; doubled on each further retry.
+            max_concurrency (int): Maximum number of requests in flight at once.
+            max_connections (int): Size of the HTTP connection pool.
+            breaker (CircuitBreaker, optional): Breaker shared by all calls of this client.
+        """
+        self.api_url = api_url
+        self.model_name = model_name
+        self.cache = cache
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.breaker = breaker or CircuitBreaker()
+        self._timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        # Created on first use so it binds to the running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self._timeout, limits=self._limits)
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def classify_kpi_class(self, **kwargs) -> str:
+        """
+        Same parameters and return values as Llama3Client.classify_kpi_class.
+
+        Raises:
+            Llama3Unavailable: If the circuit breaker is open.
+        """
+        features = kpi_features(**kwargs)
+        if self.cache is None:
+            return await self._request_classification(features)
+
+        key = self.cache.make_key(features, self.model_name, KPI_PROMPT_VERSION)
+        return await self.cache.get_or_compute_async(
+            key,
+            lambda: self._request_classification(features),
+            features,
+            cacheable=lambda kpi_class: kpi_class != "Error",
+        )
+
+    async def _request_classification(self, features: Dict[str, Any]) -> str:
+        payload = build_payload(self.model_name, features)
+        async with self._semaphore:
+            if not self.breaker.allow():
+                raise Llama3Unavailable(f"Llama3 agent at {self.api_url} is unavailable (circuit open)")
+            try:
+                return await self._post_with_retries(payload)
+            except BaseException:
+                self.breaker.release()
+                raise
+
+    async def _post_with_retries(self, payload: Dict[str, Any]) -> str:
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._http().post(self.api_url, json=payload)
+                if response.status_code < 500:
+                    response.raise_for_status()
+                    self.breaker.record_success()
+                    return parse_classification(response.json())
+                error = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                error = repr(e)
+            except (httpx.HTTPStatusError, ValueError) as e:
+                # 4xx answers and malformed bodies are not worth retrying
+                self.breaker.record_success()
+                print(f"Error calling local Llama3 API: {e}")
+                return "Error"
+
+            if attempt < self.max_retries:
+                delay = self.backoff_base * (2 ** attempt)
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+        self.breaker.record_failure()
+        print(f"Error calling local Llama3 API after {self.max_retries + 1} attempts: {error}")
+        return "Error"
+
 # --- Example Usage (can be run directly in a Python script) ---
 if __name__ == "__main__":
     llama_client_instance = Llama3Client()
@@ -1,20 +1,78 @@
-from fastapi import FastAPI, Depends, HTTPException, status, APIRouter
-from sqlalchemy.orm import Session
-from typing import List, Optional
-
-import models, schemas, crud # Absolute imports
-from database import engine, Base, get_db # Absolute imports
+from fastapi import FastAPI, Body, Depends, HTTPException, Request, Response, status, APIRouter
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, List, Optional
+from contextlib import asynccontextmanager
+import os
+import time
+
+import models, schemas, crud, async_crud # Absolute imports
+from job_queue import KpiJobQueue, PeriodicJob, QueueFull
+from database import AsyncReadSessionLocal, async_engine, get_async_db, get_async_read_db # Absolute imports
+import migrations
+import bulk_import
+import table_versions
+import fast_json
+import compression
 
 from fastapi.middleware.cors import CORSMiddleware # For CORS configuration
+from fastapi.responses import StreamingResponse
+from datetime import date
 import json # Ensure json is imported for EmployeePreferences handling in schemas
 
-# Create all tables in the database (uncomment to run ONCE for initial setup, usually done with Alembic)
-# models.Base.metadata.create_all(bind=engine)
+# The schema is managed by migrations.py; pending migrations are applied on startup
+
+# Background KPI classification jobs, persisted in kpi_classification_jobs
+kpi_job_queue = KpiJobQueue(
+    workers=int(os.getenv("KPI_JOB_WORKERS", "2")),
+    max_pending=int(os.getenv("KPI_JOB_MAX_PENDING", "100")),
+)
+
+# Forecasts budget exhaustion and stores budget_used/budget_status; 0 disables it
+budget_forecast_job = PeriodicJob(
+    "Budget forecast",
+    async_crud.refresh_budget_forecast,
+    interval_seconds=float(os.getenv("BUDGET_FORECAST_INTERVAL_SECONDS", "3600")),
+)
+
+# Flags overdue tasks and raises overdue, budget overrun and stalled project alerts; 0 disables it
+alert_rules_job = PeriodicJob(
+    "Alert rules",
+    async_crud.run_alert_rules,
+    interval_seconds=float(os.getenv("ALERT_RULES_INTERVAL_SECONDS", "60")),
+)
+
+# Moves the employees' overdue and due soon counts to the new day; 0 disables it
+employee_workload_job = PeriodicJob(
+    "Employee workload",
+    async_crud.roll_over_employee_workload,
+    interval_seconds=float(os.getenv("EMPLOYEE_WORKLOAD_INTERVAL_SECONDS", "300")),
+)
+
+# Serve the plain list endpoints from column tuples encoded by orjson, skipping
+# response_model validation; see fast_json.py. Off by default
+FAST_LIST_RESPONSES = os.getenv("FAST_LIST_RESPONSES", "0") == "1"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with async_engine.begin() as conn:
+        await conn.run_sync(migrations.upgrade)
+    await kpi_job_queue.start()
+    await budget_forecast_job.start()
+    await alert_rules_job.start()
+    await employee_workload_job.start()
+    yield
+    await employee_workload_job.stop()
+    await alert_rules_job.stop()
+    await budget_forecast_job.stop()
+    await kpi_job_queue.stop()
+    # Release the pooled connections to the Llama3 agent
+    await crud.async_llama_client.aclose()
 
 app = FastAPI(
     title="Project Management Dashboard API",
     description="API for managing projects, tasks, employees, customers, and KPIs.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -30,9 +88,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag"],
 )
 
+# Brotli or gzip, as the client accepts, for bodies of COMPRESSION_MINIMUM_SIZE bytes or more
+app.add_middleware(compression.CompressionMiddleware, minimum_size=int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024")))
+
 # Create an API router with the /api prefix
+# GET endpoints take their session from the reader pool (get_async_read_db),
+# everything that writes from the writer pool (get_async_db)
 api_router = APIRouter(prefix="/api")
 
 # --- Root Endpoint ---
@@ -41,230 +105,687 @@ api_router = APIRouter(prefix="/api")
 def read_root():
     return {"message": "Welcome to the Project Management Dashboard API!"}
 
-# --- Helper for employee email check (can remain here or be moved to crud.py) ---
-def get_employee_by_email(db: Session, email: str):
-    return db.query(models.Employee).filter(models.Employee.email == email).first()
-
+# --- Helper for keyset pagination: the next page's cursor travels in a response header ---
+def set_next_cursor(response: Response, model, rows, limit: int, sort_column=None):
+    cursor = crud.next_cursor(model, rows, limit, sort_column)
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
+
+# --- Helper for filtered lists: the number of matching rows travels in X-Total-Count ---
+# List endpoints take typed filters on whitelisted, indexed columns (string
+# filters accept comma-separated alternatives) and `sort`, a column name with
+# "-" for descending; rows are ordered by id otherwise. `fields`, a comma-separated
+# subset of the schema's fields, narrows both the SELECT and the returned objects.
+# Endpoints that return `schema` rows unchanged pass it, which enables `fields` and FAST_LIST_RESPONSES.
+async def read_list(response: Response, db: AsyncSession, entity: str, read, filters: dict,
+                    skip: int, limit: int, after: Optional[str], sort: Optional[str], schema=None,
+                    fields: Optional[str] = None):
+    sort_column, _ = crud.parse_sort(entity, sort)
+    fast = schema is not None and (FAST_LIST_RESPONSES or bool(fields))
+    if fast:
+        names = fast_json.select_fields(schema, fields)
+    # Counted before the page is read, see crud.count_rows
+    total = await async_crud.count_rows(db, entity, filters)
+    if fast:
+        rows = await async_crud.list_records(db, entity, names, skip=skip, limit=limit, after=after, filters=filters, sort=sort)
+    else:
+        rows = await read(db, skip=skip, limit=limit, after=after, filters=filters, sort=sort)
+    response.headers["X-Total-Count"] = str(total)
+    set_next_cursor(response, crud.LIST_TABLES[entity][0], rows, limit, sort_column)
+    return fast_json.rows_response(rows, names, response) if fast else rows
+
+# --- Helper for sparse item reads: ?fields= selects the columns to read and return ---
+async def read_fields(response: Response, db: AsyncSession, entity: str, schema, fields: str,
+                      record_id: int, not_found: str, by: str = "id"):
+    names = fast_json.select_fields(schema, fields)
+    row = await async_crud.get_record(db, entity, names, record_id, by=by)
+    if row is None:
+        raise HTTPException(status_code=404, detail=not_found)
+    return fast_json.row_response(row, names, response)
+
+# --- Helper for conditional GETs: ETags come from per-table write counters ---
+def conditional_get(*tables):
+    """
+    Dependency that tags a GET with an ETag derived from the versions of the
+    tables it reads. A matching If-None-Match is answered with 304 before the
+    endpoint runs, so an unchanged poll costs one primary key lookup.
+    """
+    table_names = [table.__tablename__ for table in tables]
+
+    # Shares the request's reader session, and reads the versions before the endpoint reads any rows
+    async def check(request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db)):
+        etag = await db.run_sync(table_versions.etag, table_names, f"{request.url.path}?{request.url.query}")
+        # no-cache: clients may store the response but must revalidate it on every use
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if table_versions.etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+    return Depends(check)
 
 # --- Employee Endpoints ---
 @api_router.post("/employees/", response_model=schemas.Employee, status_code=status.HTTP_201_CREATED)
-def create_employee(employee: schemas.EmployeeCreate, db: Session = Depends(get_db)):
-    if get_employee_by_email(db, email=employee.email):
+async def create_employee(employee: schemas.EmployeeCreate, db: AsyncSession = Depends(get_async_db)):
+    if await async_crud.get_employee_by_email(db, email=employee.email):
         raise HTTPException(status_code=400, detail="Email already registered")
-    return crud.create_employee(db=db, employee=employee)
-
-@api_router.get("/employees/", response_model=List[schemas.Employee])
-def read_employees(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    employees = crud.get_employees(db, skip=skip, limit=limit)
-    return employees
+    return await async_crud.create_employee(db=db, employee=employee)
+
+@api_router.get("/employees/", response_model=List[schemas.Employee], dependencies=[conditional_get(models.Employee)])
+async def read_employees(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    status: Optional[str] = None,
+    position: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Employees matching the filters; date_from/date_to bound the hire date, sort takes name or hire_date."""
+    filters = {
+        "status": status,
+        "position": position,
+        "date_from": date_from,
+        "date_to": date_to,
+    }
+    return await read_list(response, db, "employees", async_crud.get_employees, filters, skip, limit, after, sort, schemas.Employee, fields)
+
+@api_router.get(
+    "/employees/workload",
+    response_model=List[schemas.EmployeeWorkload],
+    dependencies=[conditional_get(models.Employee, models.EmployeeWorkload)],
+)
+async def read_employee_workloads(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Open tasks, priority-weighted load, overdue and due soon counts and the
+    0-100 workload index of every employee, busiest first. Read from the
+    materialized workload that task writes keep current.
+    """
+    return await async_crud.get_employee_workloads(db, skip=skip, limit=limit)
 
-@api_router.get("/employees/{employee_id}", response_model=schemas.Employee)
-def read_employee(employee_id: int, db: Session = Depends(get_db)):
-    db_employee = crud.get_employee(db, employee_id=employee_id)
+@api_router.get("/employees/{employee_id}", response_model=schemas.Employee, dependencies=[conditional_get(models.Employee)])
+async def read_employee(employee_id: int, response: Response, fields: Optional[str] = None, db: AsyncSession = Depends(get_async_read_db)):
+    if fields:
+        return await read_fields(response, db, "employees", schemas.Employee, fields, employee_id, "Employee not found")
+    db_employee = await async_crud.get_employee(db, employee_id=employee_id)
     if db_employee is None:
         raise HTTPException(status_code=404, detail="Employee not found")
     return db_employee
 
 @api_router.patch("/employees/{employee_id}", response_model=schemas.Employee)
-def update_employee(employee_id: int, employee: schemas.EmployeeUpdate, db: Session = Depends(get_db)):
-    db_employee = crud.update_employee(db, employee_id=employee_id, employee_update=employee)
+async def update_employee(employee_id: int, employee: schemas.EmployeeUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_employee = await async_crud.update_employee(db, employee_id=employee_id, employee_update=employee)
     if db_employee is None:
         raise HTTPException(status_code=404, detail="Employee not found")
     return db_employee
 
 @api_router.delete("/employees/{employee_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_employee(employee_id: int, db: Session = Depends(get_db)):
-    if not crud.delete_employee(db, employee_id=employee_id):
+async def delete_employee(employee_id: int, db: AsyncSession = Depends(get_async_db)):
+    if not await async_crud.delete_employee(db, employee_id=employee_id):
         raise HTTPException(status_code=404, detail="Employee not found")
     return {"message": "Employee deleted successfully"}
 
 # --- Customer Endpoints ---
 @api_router.post("/customers/", response_model=schemas.Customer, status_code=status.HTTP_201_CREATED)
-def create_customer(customer: schemas.CustomerCreate, db: Session = Depends(get_db)):
-    return crud.create_customer(db=db, customer=customer)
-
-@api_router.get("/customers/", response_model=List[schemas.Customer])
-def read_customers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    customers = crud.get_customers(db, skip=skip, limit=limit)
-    return customers
-
-@api_router.get("/customers/{customer_id}", response_model=schemas.Customer)
-def read_customer(customer_id: int, db: Session = Depends(get_db)):
-    db_customer = crud.get_customer(db, customer_id=customer_id)
+async def create_customer(customer: schemas.CustomerCreate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.create_customer(db=db, customer=customer)
+
+@api_router.get("/customers/", response_model=List[schemas.Customer], dependencies=[conditional_get(models.Customer)])
+async def read_customers(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    industry: Optional[str] = None,
+    priority_level: Optional[int] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Customers matching the filters; sort takes name or priority_level."""
+    filters = {
+        "industry": industry,
+        "priority_level": priority_level,
+    }
+    return await read_list(response, db, "customers", async_crud.get_customers, filters, skip, limit, after, sort, schemas.Customer, fields)
+
+@api_router.get(
+    "/customers/overview",
+    response_model=List[schemas.CustomerOverview],
+    dependencies=[conditional_get(models.Customer, models.Project, models.Project_KPI)],
+)
+async def read_customer_overview(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    industry: Optional[str] = None,
+    priority_level: Optional[int] = None,
+    sort: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Customers with their project count, active project count, total and used
+    budget and worst KPI class, so the customers page needs no project list.
+    Filters, sort and paging are those of /customers/.
+    """
+    filters = {
+        "industry": industry,
+        "priority_level": priority_level,
+    }
+    return await read_list(response, db, "customers", async_crud.get_customer_overview, filters, skip, limit, after, sort)
+
+@api_router.get("/customers/{customer_id}", response_model=schemas.Customer, dependencies=[conditional_get(models.Customer)])
+async def read_customer(customer_id: int, response: Response, fields: Optional[str] = None, db: AsyncSession = Depends(get_async_read_db)):
+    if fields:
+        return await read_fields(response, db, "customers", schemas.Customer, fields, customer_id, "Customer not found")
+    db_customer = await async_crud.get_customer(db, customer_id=customer_id)
     if db_customer is None:
         raise HTTPException(status_code=404, detail="Customer not found")
     return db_customer
 
 @api_router.patch("/customers/{customer_id}", response_model=schemas.Customer)
-def update_customer(customer_id: int, customer: schemas.CustomerUpdate, db: Session = Depends(get_db)):
-    db_customer = crud.update_customer(db, customer_id=customer_id, customer_update=customer)
+async def update_customer(customer_id: int, customer: schemas.CustomerUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_customer = await async_crud.update_customer(db, customer_id=customer_id, customer_update=customer)
     if db_customer is None:
         raise HTTPException(status_code=404, detail="Customer not found")
     return db_customer
 
 @api_router.delete("/customers/{customer_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_customer(customer_id: int, db: Session = Depends(get_db)):
-    if not crud.delete_customer(db, customer_id=customer_id):
+async def delete_customer(customer_id: int, db: AsyncSession = Depends(get_async_db)):
+    if not await async_crud.delete_customer(db, customer_id=customer_id):
         raise HTTPException(status_code=404, detail="Customer not found")
     return {"message": "Customer deleted successfully"}
 
 # --- Project Endpoints ---
 @api_router.post("/projects/", response_model=schemas.Project, status_code=status.HTTP_201_CREATED)
-def create_project(project: schemas.ProjectCreate, db: Session = Depends(get_db)):
-    return crud.create_project(db=db, project=project)
-
-@api_router.get("/projects/", response_model=list[schemas.Project])
-def read_projects(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_projects(db, skip=skip, limit=limit)
-
-@api_router.get("/projects/{project_id}", response_model=schemas.Project)
-def read_project(project_id: int, db: Session = Depends(get_db)):
-    db_project = crud.get_project(db, project_id=project_id)
+async def create_project(project: schemas.ProjectCreate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.create_project(db=db, project=project)
+
+@api_router.get("/projects/", response_model=list[schemas.Project], dependencies=[conditional_get(models.Project)])
+async def read_projects(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    status: Optional[str] = None,
+    customer_id: Optional[int] = None,
+    budget_status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Projects matching the filters; date_from/date_to bound the start date, sort takes project_name, start_date or launch_date."""
+    filters = {
+        "status": status,
+        "customer_id": customer_id,
+        "budget_status": budget_status,
+        "date_from": date_from,
+        "date_to": date_to,
+    }
+    return await read_list(response, db, "projects", async_crud.get_projects, filters, skip, limit, after, sort, schemas.Project, fields)
+
+@api_router.get(
+    "/projects/{project_id}",
+    response_model=schemas.ProjectDetail,
+    response_model_exclude_unset=True,
+    # Any table an ?include= can embed
+    dependencies=[conditional_get(models.Project, models.Customer, models.Task, models.Employee, models.BudgetHistory, models.Project_KPI)],
+)
+async def read_project(
+    project_id: int,
+    response: Response,
+    include: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Returns the project, embedding the relationships listed in `include`
+    (comma-separated: customer, tasks, tasks.assignee, budget_history, kpi).
+    Each requested relationship costs at most one extra query. `fields`
+    returns only the listed project fields and cannot be combined with `include`.
+    """
+    if fields:
+        if include:
+            raise HTTPException(status_code=400, detail="fields cannot be combined with include")
+        return await read_fields(response, db, "projects", schemas.Project, fields, project_id, "Project not found")
+    db_project = await async_crud.get_project_detail(db, project_id=project_id, include=crud.parse_includes(include))
     if db_project is None:
         raise HTTPException(status_code=404, detail="Project not found")
     return db_project
 
 @api_router.patch("/projects/{project_id}", response_model=schemas.Project)
-def update_project(project_id: int, project: schemas.ProjectUpdate, db: Session = Depends(get_db)):
-    db_project = crud.update_project(db, project_id=project_id, project_update=project)
+async def update_project(project_id: int, project: schemas.ProjectUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_project = await async_crud.update_project(db, project_id=project_id, project_update=project)
     if db_project is None:
         raise HTTPException(status_code=404, detail="Project not found")
     return db_project
 
 @api_router.delete("/projects/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_project(project_id: int, db: Session = Depends(get_db)):
-    if not crud.delete_project(db, project_id=project_id):
+async def delete_project(project_id: int, db: AsyncSession = Depends(get_async_db)):
+    if not await async_crud.delete_project(db, project_id=project_id):
         raise HTTPException(status_code=404, detail="Project not found or could not be deleted")
     return {"message": "Project deleted successfully"}
 
 # --- Task Endpoints ---
 @api_router.post("/tasks/", response_model=schemas.Task, status_code=status.HTTP_201_CREATED)
-def create_task(task: schemas.TaskCreate, db: Session = Depends(get_db)):
-    return crud.create_task(db=db, task=task)
-
-@api_router.get("/tasks/", response_model=List[schemas.Task])
-def read_tasks(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    tasks = crud.get_tasks(db, skip=skip, limit=limit)
-    return tasks
-
-@api_router.get("/tasks/{task_id}", response_model=schemas.Task)
-def read_task(task_id: int, db: Session = Depends(get_db)):
-    db_task = crud.get_task(db, task_id=task_id)
+async def create_task(task: schemas.TaskCreate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.create_task(db=db, task=task)
+
+@api_router.get("/tasks/", response_model=List[schemas.Task], dependencies=[conditional_get(models.Task)])
+async def read_tasks(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    project_id: Optional[int] = None,
+    assignee_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Tasks matching the filters; date_from/date_to bound the due date, sort takes due_date, priority, status or title."""
+    filters = {
+        "status": status,
+        "priority": priority,
+        "project_id": project_id,
+        "assignee_id": assignee_id,
+        "date_from": date_from,
+        "date_to": date_to,
+    }
+    return await read_list(response, db, "tasks", async_crud.get_tasks, filters, skip, limit, after, sort, schemas.Task, fields)
+
+@api_router.get("/tasks/{task_id}", response_model=schemas.Task, dependencies=[conditional_get(models.Task)])
+async def read_task(task_id: int, response: Response, fields: Optional[str] = None, db: AsyncSession = Depends(get_async_read_db)):
+    if fields:
+        return await read_fields(response, db, "tasks", schemas.Task, fields, task_id, "Task not found")
+    db_task = await async_crud.get_task(db, task_id=task_id)
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     return db_task
 
 @api_router.patch("/tasks/{task_id}", response_model=schemas.Task)
-def update_task(task_id: int, task: schemas.TaskUpdate, db: Session = Depends(get_db)):
-    db_task = crud.update_task(db, task_id=task_id, task_update=task)
+async def update_task(task_id: int, task: schemas.TaskUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_task = await async_crud.update_task(db, task_id=task_id, task_update=task)
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     return db_task
 
 @api_router.delete("/tasks/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(task_id: int, db: Session = Depends(get_db)):
-    if not crud.delete_task(db, task_id=task_id):
+async def delete_task(task_id: int, db: AsyncSession = Depends(get_async_db)):
+    if not await async_crud.delete_task(db, task_id=task_id):
         raise HTTPException(status_code=404, detail="Task not found")
     return {"message": "Task deleted successfully"}
 
 # --- Alert Endpoints ---
 @api_router.post("/alerts/", response_model=schemas.Alert, status_code=status.HTTP_201_CREATED)
-def create_alert(alert: schemas.AlertCreate, db: Session = Depends(get_db)):
-    return crud.create_alert(db=db, alert=alert)
-
-@api_router.get("/alerts/", response_model=List[schemas.Alert])
-def read_alerts(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    alerts = crud.get_alerts(db, skip=skip, limit=limit)
-    return alerts
-
-@api_router.get("/alerts/{alert_id}", response_model=schemas.Alert)
-def read_alert(alert_id: int, db: Session = Depends(get_db)):
-    db_alert = crud.get_alert(db, alert_id=alert_id)
+async def create_alert(alert: schemas.AlertCreate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.create_alert(db=db, alert=alert)
+
+@api_router.get("/alerts/", response_model=List[schemas.Alert], dependencies=[conditional_get(models.Alert)])
+async def read_alerts(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    project_id: Optional[int] = None,
+    task_id: Optional[int] = None,
+    type: Optional[str] = None,
+    is_resolved: Optional[bool] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Alerts matching the filters; date_from/date_to bound the creation date, sort takes created_at or type."""
+    filters = {
+        "project_id": project_id,
+        "task_id": task_id,
+        "type": type,
+        "is_resolved": is_resolved,
+        "date_from": date_from,
+        "date_to": date_to,
+    }
+    return await read_list(response, db, "alerts", async_crud.get_alerts, filters, skip, limit, after, sort, schemas.Alert, fields)
+
+@api_router.get("/alerts/{alert_id}", response_model=schemas.Alert, dependencies=[conditional_get(models.Alert)])
+async def read_alert(alert_id: int, response: Response, fields: Optional[str] = None, db: AsyncSession = Depends(get_async_read_db)):
+    if fields:
+        return await read_fields(response, db, "alerts", schemas.Alert, fields, alert_id, "Alert not found")
+    db_alert = await async_crud.get_alert(db, alert_id=alert_id)
     if db_alert is None:
         raise HTTPException(status_code=404, detail="Alert not found")
     return db_alert
 
 @api_router.patch("/alerts/{alert_id}", response_model=schemas.Alert)
-def update_alert(alert_id: int, alert: schemas.AlertUpdate, db: Session = Depends(get_db)):
-    db_alert = crud.update_alert(db, alert_id=alert_id, alert_update=alert)
+async def update_alert(alert_id: int, alert: schemas.AlertUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_alert = await async_crud.update_alert(db, alert_id=alert_id, alert_update=alert)
     if db_alert is None:
         raise HTTPException(status_code=404, detail="Alert not found")
     return db_alert
 
 @api_router.delete("/alerts/{alert_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_alert(alert_id: int, db: Session = Depends(get_db)):
-    if not crud.delete_alert(db, alert_id=alert_id):
+async def delete_alert(alert_id: int, db: AsyncSession = Depends(get_async_db)):
+    if not await async_crud.delete_alert(db, alert_id=alert_id):
         raise HTTPException(status_code=404, detail="Alert not found")
     return {"message": "Alert deleted successfully"}
 
 # --- Budget History Endpoints ---
 @api_router.post("/budget-history/", response_model=schemas.BudgetHistory, status_code=status.HTTP_201_CREATED)
-def create_budget_history(budget_history: schemas.BudgetHistoryCreate, db: Session = Depends(get_db)):
-    return crud.create_budget_history(db=db, budget_history=budget_history)
-
-@api_router.get("/budget-history/", response_model=List[schemas.BudgetHistory])
-def read_budget_histories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    histories = crud.get_budget_histories(db, skip=skip, limit=limit)
-    return histories
+async def create_budget_history(budget_history: schemas.BudgetHistoryCreate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.create_budget_history(db=db, budget_history=budget_history)
+
+@api_router.get("/budget-history/", response_model=List[schemas.BudgetHistory], dependencies=[conditional_get(models.BudgetHistory)])
+async def read_budget_histories(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    project_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Budget entries matching the filters; date_from/date_to bound the entry date, sort takes date."""
+    filters = {
+        "project_id": project_id,
+        "date_from": date_from,
+        "date_to": date_to,
+    }
+    return await read_list(response, db, "budget-history", async_crud.get_budget_histories, filters, skip, limit, after, sort, schemas.BudgetHistory, fields)
+
+@api_router.get(
+    "/projects/{project_id}/budget/series",
+    response_model=schemas.BudgetSeries,
+    dependencies=[conditional_get(models.BudgetRollup, models.Project)],
+)
+async def read_budget_series(
+    project_id: int,
+    bucket: str = "week",
+    points: int = 200,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Returns the project's spending per day, week or month (spent, cumulative
+    spent, remaining) from the precomputed rollups. Consecutive periods are
+    merged so at most `points` points come back, whatever the ledger length.
+    """
+    series = await async_crud.get_budget_series(
+        db, project_id, bucket=bucket, points=points, date_from=date_from, date_to=date_to
+    )
+    if series is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return series
 
-@api_router.get("/budget-history/{history_id}", response_model=schemas.BudgetHistory)
-def read_budget_history(history_id: int, db: Session = Depends(get_db)):
-    db_history = crud.get_budget_history(db, history_id=history_id)
+@api_router.get("/budget-history/{history_id}", response_model=schemas.BudgetHistory, dependencies=[conditional_get(models.BudgetHistory)])
+async def read_budget_history(history_id: int, response: Response, fields: Optional[str] = None, db: AsyncSession = Depends(get_async_read_db)):
+    if fields:
+        return await read_fields(response, db, "budget-history", schemas.BudgetHistory, fields, history_id, "Budget history record not found")
+    db_history = await async_crud.get_budget_history(db, history_id=history_id)
     if db_history is None:
         raise HTTPException(status_code=404, detail="Budget history record not found")
     return db_history
 
 # --- Project KPI Endpoints ---
 @api_router.post("/project-kpis/", response_model=schemas.ProjectKpi, status_code=status.HTTP_201_CREATED)
-def create_project_kpi(kpi: schemas.ProjectKpiCreate, db: Session = Depends(get_db)):
-    existing_kpi = db.query(models.Project_KPI).filter(models.Project_KPI.project_id == kpi.project_id).first()
+async def create_project_kpi(kpi: schemas.ProjectKpiCreate, db: AsyncSession = Depends(get_async_db)):
+    existing_kpi = await async_crud.get_project_kpi_by_project(db, project_id=kpi.project_id)
     if existing_kpi:
         raise HTTPException(status_code=400, detail=f"KPI record already exists for project ID {kpi.project_id}")
-    return crud.create_project_kpi(db=db, kpi=kpi)
-
-@api_router.get("/project-kpis/", response_model=List[schemas.ProjectKpi])
-def read_project_kpis(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    kpis = crud.get_project_kpis(db, skip=skip, limit=limit)
-    return kpis
-
-@api_router.get("/project-kpis/{kpi_id}", response_model=schemas.ProjectKpi)
-def read_project_kpi(kpi_id: int, db: Session = Depends(get_db)):
-    db_kpi = crud.get_project_kpi(db, kpi_id=kpi_id)
+    return await async_crud.create_project_kpi(db=db, kpi=kpi)
+
+@api_router.get("/project-kpis/", response_model=List[schemas.ProjectKpi], dependencies=[conditional_get(models.Project_KPI)])
+async def read_project_kpis(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    project_id: Optional[int] = None,
+    kpi_class: Optional[str] = None,
+    risk_flag: Optional[bool] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Project KPIs matching the filters; sort takes project_id."""
+    filters = {
+        "project_id": project_id,
+        "kpi_class": kpi_class,
+        "risk_flag": risk_flag,
+    }
+    return await read_list(response, db, "project-kpis", async_crud.get_project_kpis, filters, skip, limit, after, sort, schemas.ProjectKpi, fields)
+
+@api_router.post("/project-kpis/recompute", response_model=schemas.KpiRecomputeResult)
+async def recompute_project_kpis(db: AsyncSession = Depends(get_async_db)):
+    """
+    Recomputes the KPI fields derived from tasks, alerts, budget history and
+    customers for every project. Writes keep them fresh afterwards.
+    """
+    started = time.perf_counter()
+    updated = await async_crud.recompute_project_kpis(db)
+    return schemas.KpiRecomputeResult(updated=updated, elapsed_seconds=time.perf_counter() - started)
+
+@api_router.get("/project-kpis/{kpi_id}", response_model=schemas.ProjectKpi, dependencies=[conditional_get(models.Project_KPI)])
+async def read_project_kpi(kpi_id: int, response: Response, fields: Optional[str] = None, db: AsyncSession = Depends(get_async_read_db)):
+    if fields:
+        return await read_fields(response, db, "project-kpis", schemas.ProjectKpi, fields, kpi_id, "Project KPI not found")
+    db_kpi = await async_crud.get_project_kpi(db, kpi_id=kpi_id)
     if db_kpi is None:
         raise HTTPException(status_code=404, detail="Project KPI not found")
     return db_kpi
 
-@api_router.get("/projects/{project_id}/kpi", response_model=schemas.ProjectKpi)
-def get_project_kpi_by_project_id(project_id: int, db: Session = Depends(get_db)):
-    db_kpi = db.query(models.Project_KPI).filter(models.Project_KPI.project_id == project_id).first()
+@api_router.get("/projects/{project_id}/kpi", response_model=schemas.ProjectKpi, dependencies=[conditional_get(models.Project_KPI)])
+async def get_project_kpi_by_project_id(project_id: int, response: Response, fields: Optional[str] = None,
+                                        db: AsyncSession = Depends(get_async_read_db)):
+    if fields:
+        return await read_fields(
+            response, db, "project-kpis", schemas.ProjectKpi, fields, project_id,
+            "Project KPI not found for this project ID", by="project_id",
+        )
+    db_kpi = await async_crud.get_project_kpi_by_project(db, project_id=project_id)
     if db_kpi is None:
         raise HTTPException(status_code=404, detail="Project KPI not found for this project ID")
     return db_kpi
 
 @api_router.patch("/project-kpis/{kpi_id}", response_model=schemas.ProjectKpi)
-def update_project_kpi(kpi_id: int, kpi: schemas.ProjectKpiUpdate, db: Session = Depends(get_db)):
-    db_kpi = crud.update_project_kpi(db, kpi_id=kpi_id, kpi_update=kpi)
+async def update_project_kpi(kpi_id: int, kpi: schemas.ProjectKpiUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_kpi = await async_crud.update_project_kpi(db, kpi_id=kpi_id, kpi_update=kpi)
     if db_kpi is None:
         raise HTTPException(status_code=404, detail="Project KPI not found")
     return db_kpi
 
 @api_router.delete("/project-kpis/{kpi_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_project_kpi(kpi_id: int, db: Session = Depends(get_db)):
-    if not crud.delete_project_kpi(db, kpi_id=kpi_id):
+async def delete_project_kpi(kpi_id: int, db: AsyncSession = Depends(get_async_db)):
+    if not await async_crud.delete_project_kpi(db, kpi_id=kpi_id):
         raise HTTPException(status_code=404, detail="Project KPI not found")
     return {"message": "Project KPI deleted successfully"}
 
+# --- Bulk Endpoints ---
+# Items are validated one by one so a bad row is reported in the per-item
+# results instead of rejecting the whole batch.
+@api_router.post("/tasks/bulk", response_model=schemas.BulkResult)
+async def bulk_create_tasks(items: List[Any] = Body(...), db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.bulk_create_tasks(db, items)
+
+@api_router.post("/budget-history/bulk", response_model=schemas.BulkResult)
+async def bulk_create_budget_histories(items: List[Any] = Body(...), db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.bulk_create_budget_histories(db, items)
+
+@api_router.post("/alerts/bulk", response_model=schemas.BulkResult)
+async def bulk_create_alerts(items: List[Any] = Body(...), db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.bulk_create_alerts(db, items)
+
+@api_router.post("/project-kpis/bulk", response_model=schemas.BulkResult)
+async def bulk_upsert_project_kpis(items: List[Any] = Body(...), db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.bulk_upsert_project_kpis(db, items)
+
+# --- Search Endpoints ---
+@api_router.get(
+    "/search",
+    response_model=List[schemas.SearchHit],
+    dependencies=[conditional_get(models.Project, models.Task, models.Customer, models.Employee)],
+)
+async def search(q: str, entity: Optional[str] = None, skip: int = 0, limit: int = 20, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Ranked full-text search over project names, task titles and descriptions,
+    customer names, contacts and industries, and employee names and positions.
+    Every word of `q` matches as a prefix; `entity` takes a comma-separated
+    subset of projects, tasks, customers and employees. Paging stops at
+    skip + limit = 1000; deeper pages answer 400.
+    """
+    entities = [name.strip() for name in entity.split(",") if name.strip()] if entity else None
+    return await async_crud.search(db, q, entities=entities, skip=skip, limit=limit)
+
+# --- Forecast Endpoints ---
+@api_router.get("/forecast/budget", response_model=schemas.BudgetForecast)
+async def read_budget_forecast(
+    as_of: Optional[date] = None,
+    budget_status: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Forecasts, for every project, the daily burn rate over the recent window
+    and the date its budget runs out, flagging projects that are At Risk
+    (out of budget before launch, or within the horizon) or Over Budget.
+    Computed on request; the scheduled job stores the same figures on the projects.
+    """
+    return await async_crud.get_budget_forecast(db, as_of=as_of, budget_status=budget_status)
+
+# --- Export Endpoints ---
+@api_router.get("/export/{entity}")
+async def export_table(
+    entity: str,
+    format: str = "ndjson",
+    project_id: Optional[int] = None,
+    assignee_id: Optional[int] = None,
+    customer_id: Optional[int] = None,
+    status: Optional[str] = None,
+    type: Optional[str] = None,
+    is_resolved: Optional[bool] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+):
+    """
+    Streams a whole table (tasks, projects, budget-history or alerts) as NDJSON
+    or CSV, optionally filtered. Rows are serialized as they are fetched, so
+    exports of any size run in constant memory.
+    """
+    if format not in crud.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}'. Available: {', '.join(crud.EXPORT_FORMATS)}")
+    filters = {
+        "project_id": project_id,
+        "assignee_id": assignee_id,
+        "customer_id": customer_id,
+        "status": status,
+        "type": type,
+        "is_resolved": is_resolved,
+    }
+    stmt, columns = crud.export_statement(entity, filters, date_from=date_from, date_to=date_to)
+
+    async def body():
+        # The session lives as long as the stream, not as long as the endpoint call
+        async with AsyncReadSessionLocal() as db:
+            async for chunk in crud.stream_export(db, stmt, columns, format):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=crud.EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{entity}.{format}"'},
+    )
+
+# --- Import Endpoints ---
+@api_router.post("/import/{entity}", response_model=schemas.ImportReport)
+async def import_table(
+    entity: str,
+    request: Request,
+    format: str = "csv",
+    chunk_size: int = bulk_import.IMPORT_CHUNK_SIZE,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Imports a CSV or NDJSON file sent as the raw request body into tasks or
+    budget-history. The body is parsed while it is received and written in
+    committed chunks; invalid rows are skipped and listed in the report, which
+    also carries the row, chunk and timing counts.
+    """
+    importer = bulk_import.BulkImporter(entity, format, chunk_size=chunk_size)
+    return await bulk_import.import_stream(db, importer, request.stream())
+
+# --- Dashboard Endpoints ---
+@api_router.get(
+    "/dashboard/summary",
+    response_model=schemas.DashboardSummary,
+    dependencies=[conditional_get(models.Project, models.Task, models.Customer, models.Alert)],
+)
+async def read_dashboard_summary(project_limit: int = 50, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Returns the totals, task status histogram and per-project budget figures
+    shown on the home page, aggregated server-side and briefly cached.
+    """
+    return await async_crud.get_dashboard_summary(db, project_limit=project_limit)
+
 # --- KPI Classification Endpoint (using Llama3) ---
 @api_router.post("/projects/{project_id}/classify_kpi", response_model=schemas.ProjectKpi)
-def trigger_kpi_classification(project_id: int, db: Session = Depends(get_db)):
+async def trigger_kpi_classification(project_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Triggers the Llama3 agent to classify the KPI class for a specific project
-    and updates the database.
+    and updates the database. Answers 503 while the agent is unreachable and
+    502 when it fails to classify.
     """
-    db_kpi = crud.classify_and_update_project_kpi_class(db, project_id=project_id)
+    db_kpi = await async_crud.classify_and_update_project_kpi_class(db, project_id=project_id)
     if db_kpi is None:
-        raise HTTPException(status_code=404, detail="Project KPI not found or classification failed. Check backend logs.")
+        raise HTTPException(status_code=404, detail="Project KPI not found")
     return db_kpi
 
+@api_router.post("/projects/{project_id}/classify_kpi/jobs", response_model=schemas.KpiJob, status_code=status.HTTP_202_ACCEPTED)
+async def submit_kpi_classification_job(project_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Queues a KPI classification for the project and returns the job right away.
+    Poll GET /api/jobs/{job_id} for the result. Answers 429 when the queue is full.
+    """
+    if await async_crud.get_project_kpi_by_project(db, project_id=project_id) is None:
+        raise HTTPException(status_code=404, detail="Project KPI not found")
+    try:
+        return await kpi_job_queue.submit(project_id)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+
+@api_router.get("/jobs/{job_id}", response_model=schemas.KpiJob, dependencies=[conditional_get(models.KpiClassificationJob)])
+async def read_kpi_job(job_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    db_job = await async_crud.get_kpi_job(db, job_id=job_id)
+    if db_job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return db_job
+
+@api_router.post("/project-kpis/classify-batch", response_model=schemas.KpiClassifyBatchResult)
+async def trigger_kpi_classification_batch(
+    batch: schemas.KpiClassifyBatchRequest = Body(default_factory=schemas.KpiClassifyBatchRequest),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Classifies a list of projects, or every project matching the filter, with
+    concurrent Llama3 calls and reports the outcome per project.
+    """
+    return await async_crud.classify_project_kpis_batch(db, batch)
+
+@api_router.get("/kpi-cache/stats", response_model=schemas.KpiCacheStats)
+def read_kpi_cache_stats():
+    """Hit/miss counters of the Llama3 classification cache."""
+    return crud.kpi_classification_cache.stats()
+
 # IMPORTANT: Include the router in your main app
 app.include_router(api_router)
\ No newline at end of file
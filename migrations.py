@@ -0,0 +1,255 @@
+# Backend/migrations.py
+
+import argparse
+import sys
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, func, inspect, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+import models, kpi_engine
+import budget_rollups
+import search_index
+import workload
+
+# Applied migrations are recorded here, one row per version
+migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+# --- Helpers ---
+# The first migration builds the schema from the current models, so a fresh
+# database already has everything later migrations add. Migrations therefore
+# use these idempotent helpers instead of unconditional DDL.
+
+def create_index(conn: Connection, table, name: str) -> None:
+    index = next(index for index in table.indexes if index.name == name)
+    index.create(conn, checkfirst=True)
+
+def add_column(conn: Connection, table, name: str) -> None:
+    if name in {column["name"] for column in inspect(conn).get_columns(table.name)}:
+        return
+    column = table.c[name]
+    ddl_type = column.type.compile(dialect=conn.dialect)
+    conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {ddl_type}")
+
+
+# --- Migrations ---
+# A migration may return a line describing what it did, which upgrade() passes
+# on to its caller with the migration's name.
+
+def _initial_schema(conn: Connection) -> None:
+    # Adopts databases created by Base.metadata.create_all as well as empty ones
+    models.Base.metadata.create_all(conn, checkfirst=True)
+
+def _hot_path_indexes(conn: Connection) -> None:
+    create_index(conn, models.Project.__table__, "ix_projects_customer_id")
+    create_index(conn, models.Task.__table__, "ix_tasks_project_id_status")
+    create_index(conn, models.Task.__table__, "ix_tasks_assignee_id_status")
+    create_index(conn, models.Task.__table__, "ix_tasks_status_due_date")
+    create_index(conn, models.Alert.__table__, "ix_alerts_project_id")
+    create_index(conn, models.Alert.__table__, "ix_alerts_unresolved_project_id")
+    create_index(conn, models.BudgetHistory.__table__, "ix_budget_history_project_id_date")
+
+def _budget_rollups(conn: Connection) -> str:
+    models.BudgetRollup.__table__.create(conn, checkfirst=True)
+    # Backfill from the existing ledger; later appends keep the rollups current
+    with Session(bind=conn) as db:
+        folded = budget_rollups.rebuild(db)
+    return f"Rolled up {folded} budget history entries"
+
+def _alert_rule_watermarks(conn: Connection) -> None:
+    for model in (models.Task, models.Project):
+        add_column(conn, model.__table__, "updated_at")
+        # Existing rows count as changed now, so the first rule run does not see them all as stale
+        conn.execute(update(model.__table__).where(model.updated_at.is_(None)).values(updated_at=func.current_timestamp()))
+    create_index(conn, models.Project.__table__, "ix_projects_updated_at")
+    create_index(conn, models.Task.__table__, "ix_tasks_updated_at")
+    create_index(conn, models.Task.__table__, "ix_tasks_due_date")
+    create_index(conn, models.Alert.__table__, "ix_alerts_unresolved_task_id")
+    models.AlertRuleState.__table__.create(conn, checkfirst=True)
+
+def _search_index(conn: Connection) -> None:
+    # FTS5 tables and triggers are SQLite DDL outside the models, so they get their own step
+    search_index.create(conn)
+
+def _list_filter_indexes(conn: Connection) -> None:
+    create_index(conn, models.Project.__table__, "ix_projects_status")
+    create_index(conn, models.Task.__table__, "ix_tasks_status")
+    create_index(conn, models.Task.__table__, "ix_tasks_priority")
+    create_index(conn, models.Alert.__table__, "ix_alerts_is_resolved")
+    create_index(conn, models.Alert.__table__, "ix_alerts_type")
+    create_index(conn, models.Alert.__table__, "ix_alerts_created_at")
+    create_index(conn, models.BudgetHistory.__table__, "ix_budget_history_date")
+
+def _employee_workload(conn: Connection) -> str:
+    models.EmployeeWorkload.__table__.create(conn, checkfirst=True)
+    models.EmployeeProjectLoad.__table__.create(conn, checkfirst=True)
+    create_index(conn, models.EmployeeProjectLoad.__table__, "ix_employee_project_load_project_id")
+    # Backfill from the existing tasks; task writes keep the rows current
+    with Session(bind=conn) as db:
+        employees = workload.rebuild(db)
+    return f"Computed the workload of {employees} employees"
+
+def _table_versions(conn: Connection) -> None:
+    models.TableVersion.__table__.create(conn, checkfirst=True)
+
+# Append new migrations at the end; never renumber or edit an applied one
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], Optional[str]]]] = [
+    (1, "initial_schema", _initial_schema),
+    (2, "hot_path_indexes", _hot_path_indexes),
+    (3, "budget_rollups", _budget_rollups),
+    (4, "alert_rule_watermarks", _alert_rule_watermarks),
+    (5, "search_index", _search_index),
+    (6, "list_filter_indexes", _list_filter_indexes),
+    (7, "employee_workload", _employee_workload),
+    (8, "table_versions", _table_versions),
+]
+
+
+def applied_versions(conn: Connection) -> Dict[int, datetime]:
+    schema_migrations.create(conn, checkfirst=True)
+    return {row.version: row.applied_at for row in conn.execute(select(schema_migrations))}
+
+def upgrade(conn: Connection, target: Optional[int] = None, log: Optional[Callable[[str], None]] = None) -> List[int]:
+    """
+    Applies every pending migration up to `target` (default: the latest) inside
+    the caller's transaction. Prints nothing itself, as it also runs at API
+    startup; the CLI passes print as `log`.
+
+    Args:
+        conn (Connection): Connection whose transaction the migrations run in.
+        target (int, optional): Last version to apply.
+        log (callable, optional): Receives a line for every applied migration.
+
+    Returns:
+        list: The versions that were applied.
+    """
+    done = applied_versions(conn)
+    applied = []
+    for version, name, migrate in MIGRATIONS:
+        if version in done or (target is not None and version > target):
+            continue
+        detail = migrate(conn)
+        conn.execute(schema_migrations.insert().values(version=version, name=name, applied_at=datetime.utcnow()))
+        if log is not None:
+            log(f"Applied migration {version:04d}_{name}" + (f": {detail}" if detail else ""))
+        applied.append(version)
+    return applied
+
+
+# --- Query plan check ---
+# Queries issued per project or per request. Each must be answered through an
+# index; a plan step that scans one of these tables in full fails the check.
+
+def _hot_queries() -> Dict[str, object]:
+    Task, Alert, BudgetHistory = models.Task, models.Alert, models.BudgetHistory
+    return {
+        "tasks_by_project": select(Task).where(Task.project_id == 1),
+        "tasks_by_assignee_and_status": select(Task).where(Task.assignee_id == 1, Task.status == "In Progress"),
+        "overdue_tasks_by_status": select(Task.id).where(Task.status == "In Progress", Task.due_date < date(2024, 1, 1)),
+        "unresolved_alerts_by_project": select(Alert).where(Alert.project_id == 1, Alert.is_resolved.is_(False)),
+        "budget_history_by_project": (
+            select(BudgetHistory).where(BudgetHistory.project_id == 1).order_by(BudgetHistory.date)
+        ),
+        "projects_by_customer": select(models.Project).where(models.Project.customer_id == 1),
+        "budget_series": select(models.BudgetRollup).where(
+            models.BudgetRollup.project_id == 1, models.BudgetRollup.bucket == "week"
+        ).order_by(models.BudgetRollup.period_start),
+        "tasks_changed_since": select(Task.id).where(Task.updated_at >= datetime(2024, 1, 1)),
+        "tasks_due_between": select(Task.id).where(Task.due_date >= date(2024, 1, 1), Task.due_date < date(2024, 1, 2)),
+        "unresolved_alerts_by_task": select(Alert.id).where(Alert.task_id == 1, Alert.is_resolved.is_(False)),
+        "tasks_by_status_in_id_order": select(Task).where(Task.status == "Pending").order_by(Task.id),
+        "tasks_by_priority": select(Task).where(Task.priority == "High").order_by(Task.id),
+        "alerts_by_type": select(Alert).where(Alert.type == "Overdue Task").order_by(Alert.id),
+        "alerts_created_between": select(Alert.id).where(Alert.created_at >= date(2024, 1, 1), Alert.created_at <= date(2024, 1, 31)),
+        "budget_history_between": select(BudgetHistory.id).where(BudgetHistory.date >= date(2024, 1, 1), BudgetHistory.date <= date(2024, 1, 31)),
+        "projects_by_status": select(models.Project).where(models.Project.status == "In Progress"),
+        "employee_load_by_project": select(models.EmployeeProjectLoad).where(models.EmployeeProjectLoad.project_id == 1),
+        "kpi_refresh_for_projects": kpi_engine._derived_kpis_select([1, 2, 3], today=date(2024, 1, 1)),
+    }
+
+CHECKED_TABLES = (
+    "projects", "tasks", "alerts", "budget_history", "budget_rollups", "project_kpis", "customers", "employee_project_load",
+)
+
+def full_scans(conn: Connection, stmt) -> List[str]:
+    """Returns the EXPLAIN QUERY PLAN steps of `stmt` that scan a checked table without an index."""
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    scans = []
+    for row in plan:
+        detail = row[-1]
+        # SQLite 3.36 shortened "SCAN TABLE tasks" to "SCAN tasks"; both are read
+        words = detail.split()
+        if words[1:2] == ["TABLE"]:
+            del words[1]
+        if len(words) >= 2 and words[0] == "SCAN" and words[1] in CHECKED_TABLES and "INDEX" not in detail:
+            scans.append(detail)
+    return scans
+
+def check_query_plans(conn: Connection) -> Dict[str, List[str]]:
+    """
+    Runs EXPLAIN QUERY PLAN on every hot query (SQLite only).
+
+    Returns:
+        dict: Query name -> full table scans found; empty when every query uses an index.
+    """
+    if conn.dialect.name != "sqlite":
+        raise RuntimeError("The query plan check only supports SQLite")
+    failures = {}
+    for name, stmt in _hot_queries().items():
+        scans = full_scans(conn, stmt)
+        if scans:
+            failures[name] = scans
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from database import engine
+
+    parser = argparse.ArgumentParser(description="Apply schema migrations and check the plans of hot queries.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = subparsers.add_parser("upgrade", help="Apply pending migrations")
+    upgrade_parser.add_argument("--target", type=int, help="Stop after this version")
+    subparsers.add_parser("status", help="List migrations and whether they are applied")
+    check_parser = subparsers.add_parser("check-plans", help="Fail if a hot query falls back to a full table scan")
+    check_parser.add_argument("--live", action="store_true",
+                              help="Check the configured database instead of a freshly migrated in-memory one")
+    args = parser.parse_args(argv)
+
+    if args.command == "upgrade":
+        with engine.begin() as conn:
+            applied = upgrade(conn, target=args.target, log=print)
+        print(f"{len(applied)} migration(s) applied")
+    elif args.command == "status":
+        with engine.begin() as conn:
+            done = applied_versions(conn)
+        for version, name, _ in MIGRATIONS:
+            state = f"applied {done[version]:%Y-%m-%d %H:%M:%S}" if version in done else "pending"
+            print(f"{version:04d}_{name}: {state}")
+    else:
+        if not args.live:
+            engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            if not args.live:
+                upgrade(conn)
+            failures = check_query_plans(conn)
+        for name, scans in failures.items():
+            for detail in scans:
+                print(f"FAIL {name}: {detail}")
+        if failures:
+            sys.exit(1)
+        print(f"All {len(_hot_queries())} hot queries use an index")
+
+
+if __name__ == "__main__":
+    main()
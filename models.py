@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, Date, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey, Index, Text, func
 from sqlalchemy.orm import relationship, declarative_base
-from datetime import date
+from datetime import date, datetime
 
 Base = declarative_base()
 
@@ -20,6 +20,15 @@ class Project(Base):
     budget_status = Column(String, default="OK")
     start_date = Column(Date)
     launch_date = Column(Date, nullable=True)
+    # Watermark for the alert rules; set by the database so driver-level writes get it too
+    updated_at = Column(DateTime, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+    __table_args__ = (
+        Index("ix_projects_customer_id", "customer_id"),
+        Index("ix_projects_updated_at", "updated_at"),
+        # List filter
+        Index("ix_projects_status", "status"),
+    )
 
     customer = relationship("Customer", back_populates="projects")
     tasks = relationship("Task", back_populates="project")
@@ -72,6 +81,22 @@ class Task(Base):
     priority = Column(String)
     completion_date = Column(Date, nullable=True)
     reopened_count = Column(Integer, default=0)
+    updated_at = Column(DateTime, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+    __table_args__ = (
+        # Per-project task lists and the KPI aggregates grouped by project
+        Index("ix_tasks_project_id_status", "project_id", "status"),
+        # Employee workload
+        Index("ix_tasks_assignee_id_status", "assignee_id", "status"),
+        # Overdue scans
+        Index("ix_tasks_status_due_date", "status", "due_date"),
+        # Alert rules: rows changed since the last run and due dates passed since then
+        Index("ix_tasks_updated_at", "updated_at"),
+        Index("ix_tasks_due_date", "due_date"),
+        # List filters: single-column indexes return one status or priority in id order, without a sort
+        Index("ix_tasks_status", "status"),
+        Index("ix_tasks_priority", "priority"),
+    )
 
     project = relationship("Project", back_populates="tasks")
     assignee = relationship("Employee", back_populates="tasks")
@@ -89,6 +114,26 @@ class Alert(Base):
     created_at = Column(Date)
     is_resolved = Column(Boolean, default=False)
 
+    __table_args__ = (
+        Index("ix_alerts_project_id", "project_id"),
+        # Only open alerts count towards a project's KPIs, so they get their own partial index
+        Index(
+            "ix_alerts_unresolved_project_id", "project_id",
+            sqlite_where=is_resolved.is_(False),
+            postgresql_where=is_resolved.is_(False),
+        ),
+        # Deduplication of task alerts raised by the alert rules
+        Index(
+            "ix_alerts_unresolved_task_id", "task_id",
+            sqlite_where=is_resolved.is_(False),
+            postgresql_where=is_resolved.is_(False),
+        ),
+        # List filters
+        Index("ix_alerts_is_resolved", "is_resolved"),
+        Index("ix_alerts_type", "type"),
+        Index("ix_alerts_created_at", "created_at"),
+    )
+
 # ---------------------------
 # Budget History model
 # ---------------------------
@@ -100,8 +145,80 @@ class BudgetHistory(Base):
     amount_spent = Column(Float)
     remaining_budget = Column(Float)
 
+    __table_args__ = (
+        Index("ix_budget_history_project_id_date", "project_id", "date"),
+        # Date range filter across projects
+        Index("ix_budget_history_date", "date"),
+    )
+
     project = relationship("Project", back_populates="budget_history")
 
+# ---------------------------
+# Budget Rollup model
+# ---------------------------
+# BudgetHistory aggregated per project and day, week or month; kept current by budget_rollups.py
+class BudgetRollup(Base):
+    __tablename__ = "budget_rollups"
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    bucket = Column(String, nullable=False)  # day, week (starting Monday) or month
+    period_start = Column(Date, nullable=False)
+    amount_spent = Column(Float, default=0.0)
+    cumulative_spent = Column(Float, default=0.0)  # Spent up to the end of the period
+    remaining_budget = Column(Float, nullable=True)  # From the period's latest ledger entry
+    last_entry_date = Column(Date)
+    entries = Column(Integer, default=0)
+
+    __table_args__ = (
+        # Upsert target for incremental updates and the index behind series reads
+        Index("ux_budget_rollups_project_bucket_period", "project_id", "bucket", "period_start", unique=True),
+    )
+
+# ---------------------------
+# Alert Rule State model
+# ---------------------------
+# One row per rule engine run loop: where the last run stopped, so the next one only looks at later changes
+class AlertRuleState(Base):
+    __tablename__ = "alert_rule_state"
+    name = Column(String, primary_key=True)
+    watermark = Column(DateTime)  # Database time when the last run finished
+    ran_on = Column(Date)  # Day of the last run; date-driven rules run again once it changes
+
+# ---------------------------
+# Table Version model
+# ---------------------------
+# Committed writes per table, bumped in the writing transaction by table_versions.py;
+# ETags and cached list counts are keyed on it, so every process sees the same versions
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+# ---------------------------
+# Employee Workload models
+# ---------------------------
+# Open tasks per employee; kept current by workload.py
+class EmployeeWorkload(Base):
+    __tablename__ = "employee_workload"
+    employee_id = Column(Integer, ForeignKey("employees.id"), primary_key=True)
+    open_tasks = Column(Integer, default=0)
+    weighted_load = Column(Float, default=0.0)  # Open tasks weighted by priority
+    overdue_tasks = Column(Integer, default=0)
+    due_soon_tasks = Column(Integer, default=0)  # Open, due within the next few days of as_of
+    workload_index = Column(Float, default=0.0)  # 0-100: weighted load against capacity
+    as_of = Column(Date)  # Day the overdue and due soon counts refer to
+
+# Open tasks per employee and project; a project's employee_workload_index averages its employees' workload
+class EmployeeProjectLoad(Base):
+    __tablename__ = "employee_project_load"
+    employee_id = Column(Integer, ForeignKey("employees.id"), primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+    open_tasks = Column(Integer, default=0)
+
+    __table_args__ = (
+        Index("ix_employee_project_load_project_id", "project_id"),
+    )
+
 # ---------------------------
 # Project KPI model
 # ---------------------------
@@ -124,3 +241,17 @@ class Project_KPI(Base):
     kpi_class = Column(String, default="Medium")
 
     project = relationship("Project", back_populates="kpi")
+
+# ---------------------------
+# KPI Classification Job model
+# ---------------------------
+class KpiClassificationJob(Base):
+    __tablename__ = "kpi_classification_jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"))
+    status = Column(String, default="queued", index=True)  # queued, running, succeeded, failed
+    kpi_class = Column(String, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -1,7 +1,7 @@
 # Backend/schemas.py
 from pydantic import BaseModel, EmailStr, Field
-from datetime import date
-from typing import Optional
+from datetime import date, datetime
+from typing import Optional, List, Dict, Any
 
 class EmployeePreferences(BaseModel):
     theme: Optional[str] = "dark"
@@ -30,6 +30,19 @@ class Employee(EmployeeBase):
     class Config:
         from_attributes = True # For Pydantic v2
 
+class EmployeeWorkload(BaseModel):
+    employee_id: int
+    name: Optional[str] = None
+    position: Optional[str] = None
+    open_tasks: int = 0
+    weighted_load: float = 0.0 # Open tasks weighted by priority
+    overdue_tasks: int = 0
+    due_soon_tasks: int = 0
+    workload_index: float = 0.0 # 0-100, 100 at or above capacity
+    as_of: Optional[date] = None # Day the overdue and due soon counts refer to
+    class Config:
+        from_attributes = True
+
 class CustomerBase(BaseModel):
     name: str
     email: EmailStr
@@ -56,6 +69,22 @@ class Customer(CustomerBase):
     class Config:
         from_attributes = True
 
+class CustomerOverview(BaseModel):
+    id: int
+    name: Optional[str] = None
+    contact_person: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    industry: Optional[str] = None
+    priority_level: Optional[int] = None
+    project_count: int = 0
+    active_project_count: int = 0 # Projects not completed, canceled or on hold
+    budget_total: float = 0.0
+    budget_used: float = 0.0
+    worst_kpi_class: Optional[str] = None # Lowest KPI class among the projects; None before any is classified
+    class Config:
+        from_attributes = True
+
 from pydantic import BaseModel
 from datetime import date
 from typing import Optional
@@ -83,6 +112,9 @@ class ProjectUpdate(BaseModel):
 
 class Project(ProjectBase):
     id: int
+    # Maintained by the budget forecast job
+    budget_used: Optional[float] = 0.0
+    budget_status: Optional[str] = "OK"
     class Config:
         from_attributes = True
 
@@ -157,6 +189,41 @@ class BudgetHistory(BudgetHistoryBase):
     class Config:
         from_attributes = True
 
+class BudgetSeriesPoint(BaseModel):
+    period_start: date
+    period_end: date # Start of the last period merged into this point
+    amount_spent: float
+    cumulative_spent: float
+    remaining_budget: Optional[float] = None
+
+class BudgetSeries(BaseModel):
+    project_id: int
+    bucket: str
+    periods: int # Periods in range before downsampling
+    stride: int # Periods merged into each point
+    points: List[BudgetSeriesPoint]
+
+class ProjectBudgetForecast(BaseModel):
+    project_id: int
+    budget_total: Optional[float] = None
+    budget_used: float
+    burn_rate_per_day: float
+    days_until_exhaustion: Optional[float] = None # None while the budget is not being consumed
+    exhaustion_date: Optional[date] = None
+    budget_status: str # "OK", "At Risk" or "Over Budget"
+
+class BudgetForecast(BaseModel):
+    as_of: date
+    window_days: int
+    projects: List[ProjectBudgetForecast]
+
+class SearchHit(BaseModel):
+    entity: str # "projects", "tasks", "customers" or "employees"
+    id: int
+    title: Optional[str] = None
+    snippet: str # Best matching passage, matched words in [brackets]
+    score: float # bm25; lower is a better match
+
 class ProjectKpiBase(BaseModel):
     project_id: int
     completion_percentage: float = 0.0
@@ -192,4 +259,105 @@ class ProjectKpiUpdate(BaseModel):
 class ProjectKpi(ProjectKpiBase):
     id: int
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# --- Project detail: relationships are only present when requested with ?include= ---
+class TaskDetail(Task):
+    assignee: Optional[Employee] = None
+
+class ProjectDetail(Project):
+    customer: Optional[Customer] = None
+    tasks: Optional[List[TaskDetail]] = None
+    budget_history: Optional[List[BudgetHistory]] = None
+    kpi: Optional[ProjectKpi] = None
+
+class ProjectBudgetSummary(BaseModel):
+    id: int
+    project_name: Optional[str] = None
+    budget_total: float = 0.0
+    budget_used: float = 0.0
+
+class DashboardSummary(BaseModel):
+    total_projects: int
+    total_tasks: int
+    total_customers: int
+    total_alerts: int
+    unresolved_alerts: int
+    total_budget: float
+    total_budget_used: float
+    task_status_counts: Dict[str, int]
+    project_budgets: List[ProjectBudgetSummary]
+
+class BulkItemResult(BaseModel):
+    index: int
+    status: str # "created", "updated" or "error"
+    id: Optional[int] = None
+    errors: Optional[List[Dict[str, Any]]] = None
+
+class BulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+class ImportRejectedRow(BaseModel):
+    line: int # Line of the file where the row starts (1-based)
+    errors: List[Dict[str, Any]]
+
+class ImportReport(BaseModel):
+    entity: str
+    rows_read: int
+    inserted: int
+    rejected: int
+    chunks: int
+    elapsed_seconds: float
+    rejected_rows: List[ImportRejectedRow] # The first IMPORT_MAX_REPORTED_REJECTS only
+
+class KpiRecomputeResult(BaseModel):
+    updated: int
+    elapsed_seconds: float
+
+class KpiClassifyBatchRequest(BaseModel):
+    # Either an explicit list of projects or a filter on their current KPI record;
+    # with neither, every project that has a KPI record is reclassified.
+    project_ids: Optional[List[int]] = None
+    kpi_class: Optional[str] = None
+    risk_flag: Optional[bool] = None
+    max_concurrency: Optional[int] = Field(None, ge=1)
+    # Let the local scorer settle clear-cut projects before calling Llama3; only applies once a model is trained
+    use_local_tier: bool = True
+
+class KpiClassifyOutcome(BaseModel):
+    project_id: int
+    status: str # "classified" or "error"
+    kpi_class: Optional[str] = None
+    source: Optional[str] = None # "local" or "llm"
+    error: Optional[str] = None
+
+class KpiClassifyBatchResult(BaseModel):
+    classified: int
+    failed: int
+    escalated: int # projects sent to Llama3
+    elapsed_seconds: float
+    results: List[KpiClassifyOutcome]
+
+class KpiCacheStats(BaseModel):
+    hits: int
+    misses: int
+    coalesced: int
+    hit_rate: float
+    memory_entries: int
+    persisted_entries: int
+    avg_llm_seconds: float
+    estimated_llm_seconds_saved: float
+
+class KpiJob(BaseModel):
+    id: int
+    project_id: int
+    status: str
+    kpi_class: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    class Config:
+        from_attributes = True
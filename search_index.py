@@ -0,0 +1,190 @@
+# Backend/search_index.py
+
+import argparse
+import heapq
+import re
+import time
+import unicodedata
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+import models
+
+# Each searchable table gets an external-content FTS5 table: the index stores
+# only tokens and reads the text back from the table itself. Triggers keep it in
+# step with every write path, including bulk imports that bypass the ORM.
+# entity -> (model, indexed columns, bm25 weight per column); the first column is the hit's title
+SEARCH_TABLES: Dict[str, tuple] = {
+    "projects": (models.Project, ("project_name",), (4.0,)),
+    "tasks": (models.Task, ("title", "description"), (4.0, 1.0)),
+    "customers": (models.Customer, ("name", "contact_person", "industry"), (4.0, 2.0, 1.0)),
+    "employees": (models.Employee, ("name", "position"), (4.0, 1.0)),
+}
+
+INDEXED_TABLES = {model.__tablename__ for model, _, _ in SEARCH_TABLES.values()}
+
+# Prefix indexes make "ab*" and "abc*" lookups as cheap as whole-word ones
+FTS_OPTIONS = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+MAX_QUERY_TERMS = 8
+SNIPPET_WORDS = 12
+# Letters and digits, as unicode61 splits them
+_TOKEN = re.compile(r"[^\W_]+")
+# Each table returns skip + limit rows for a page, so the page size is capped,
+# and so is the depth a page may start at: bm25 ranks every match either way
+MAX_PAGE_SIZE = 100
+MAX_RESULT_WINDOW = 1000
+
+
+def fts_table(entity: str) -> str:
+    return f"{SEARCH_TABLES[entity][0].__tablename__}_fts"
+
+
+def _ddl(entity: str) -> List[str]:
+    model, columns, _ = SEARCH_TABLES[entity]
+    table, fts = model.__tablename__, fts_table(entity)
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    delete = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old});"
+    insert = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, content = '{table}', content_rowid = 'id', {FTS_OPTIONS})",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END",
+        # Only edits to indexed columns touch the index; status changes and the like do not
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names} ON {table} BEGIN {delete} {insert} END",
+    ]
+
+
+def create(conn: Connection) -> None:
+    """Creates the FTS tables and their triggers if missing, and indexes the existing rows."""
+    for entity in SEARCH_TABLES:
+        for statement in _ddl(entity):
+            conn.exec_driver_sql(statement)
+        rebuild(conn, entity)
+
+
+def rebuild(conn, entity: str) -> None:
+    """Re-indexes `entity` from its table, e.g. after writes made with the triggers dropped."""
+    fts = fts_table(entity)
+    conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def _fold(value: str) -> str:
+    # Mirrors the unicode61 tokenizer: case and diacritics are ignored
+    value = value.lower()
+    if value.isascii():
+        return value
+    return "".join(c for c in unicodedata.normalize("NFKD", value) if not unicodedata.combining(c))
+
+
+def query_terms(q: str) -> List[str]:
+    """Splits free text into the words to search for; operators and quotes are dropped."""
+    return _TOKEN.findall(_fold(q))[:MAX_QUERY_TERMS]
+
+
+def match_expression(terms: Sequence[str]) -> str:
+    """Builds an FTS5 query in which every term must match, as a prefix of an indexed token."""
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def snippet(texts: Sequence[Optional[str]], terms: Sequence[str], weights: Sequence[float], width: int = SNIPPET_WORDS) -> str:
+    """Returns up to `width` words of the column matching the most terms, around its first match, matches in [brackets]."""
+    best, best_score = "", 0.0
+    for value, weight in zip(texts, weights):
+        words = list(_TOKEN.finditer(value or ""))
+        folded = [_fold(word.group()) for word in words]
+        hits = [index for index, token in enumerate(folded) if any(token.startswith(term) for term in terms)]
+        score = weight * sum(1 for term in terms if any(folded[index].startswith(term) for index in hits))
+        if score <= best_score:
+            continue
+        best_score = score
+        first = max(0, min(hits[0] - width // 3, len(words) - width))
+        shown = [
+            f"[{words[index].group()}]" if index in hits else words[index].group()
+            for index in range(first, min(first + width, len(words)))
+        ]
+        best = ("..." if first > 0 else "") + " ".join(shown) + ("..." if first + width < len(words) else "")
+    return best
+
+
+def search(db: Session, terms: Sequence[str], entities: Sequence[str], skip: int = 0, limit: int = 20) -> List[dict]:
+    """
+    Finds the rows of each entity that contain every term and ranks them with
+    FTS5's bm25() and the column weights of SEARCH_TABLES. Each entity returns
+    its best skip + limit matches, ordered and cut in SQL. The pages are merged
+    by score, and only the rows of the requested page are read back for
+    titles and snippets.
+
+    Returns:
+        list: Hits with entity, id, title, snippet and score (lower is better), best first.
+    """
+    match = match_expression(terms)
+    ranked = []
+    for entity in entities:
+        _, _, weights = SEARCH_TABLES[entity]
+        fts = fts_table(entity)
+        bm25 = ", ".join(str(weight) for weight in weights)
+        rows = db.execute(
+            # Among equal scores, the most recent row first
+            text(f"SELECT rowid, bm25({fts}, {bm25}) AS score FROM {fts} WHERE {fts} MATCH :match "
+                 f"ORDER BY score, rowid DESC LIMIT :count"),
+            {"match": match, "count": skip + limit},
+        ).all()
+        ranked.append([(score, entity, row_id) for row_id, score in rows])
+    page = list(heapq.merge(*ranked, key=lambda hit: (hit[0], -hit[2])))[skip:skip + limit]
+
+    texts = {}
+    for entity in {entity for _, entity, _ in page}:
+        model, columns, _ = SEARCH_TABLES[entity]
+        ids = [row_id for _, hit_entity, row_id in page if hit_entity == entity]
+        for row in db.execute(select(model.id, *(getattr(model, column) for column in columns)).where(model.id.in_(ids))):
+            texts[entity, row.id] = row[1:]
+    return [
+        {
+            "entity": entity,
+            "id": row_id,
+            "title": texts[entity, row_id][0],
+            "snippet": snippet(texts[entity, row_id], terms, SEARCH_TABLES[entity][2]),
+            "score": score,
+        }
+        for score, entity, row_id in page
+        if (entity, row_id) in texts  # Deleted since it was ranked
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Query or rebuild the full-text search index.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    query_parser = subparsers.add_parser("query", help="Print the best matches for a query")
+    query_parser.add_argument("q")
+    query_parser.add_argument("--limit", type=int, default=20)
+    rebuild_parser = subparsers.add_parser("rebuild", help="Re-index tables from scratch")
+    rebuild_parser.add_argument("entities", nargs="*", help=f"Any of {', '.join(SEARCH_TABLES)}; default: all")
+    args = parser.parse_args(argv)
+    if args.command == "rebuild" and not set(args.entities) <= set(SEARCH_TABLES):
+        parser.error(f"unknown entity; available: {', '.join(SEARCH_TABLES)}")
+
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        if args.command == "rebuild":
+            for entity in args.entities or SEARCH_TABLES:
+                rebuild(db, entity)
+            db.commit()
+            print(f"Rebuilt in {time.perf_counter() - started:.3f}s")
+            return
+        terms = query_terms(args.q)
+        if not terms:
+            parser.error("the query has no searchable words")
+        for hit in search(db, terms, list(SEARCH_TABLES), limit=args.limit):
+            print(f"{hit['score']:8.3f}  {hit['entity']}/{hit['id']}: {hit['title']}  {hit['snippet']}")
+        print(f"Searched in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
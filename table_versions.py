@@ -0,0 +1,86 @@
+# Backend/table_versions.py
+
+import hashlib
+from itertools import chain
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from models import TableVersion
+
+_PENDING_KEY = "table_versions.pending"
+
+
+def bump(conn: Connection, tables: Iterable[str]) -> None:
+    """Adds one to the version of every table in `tables`, inside the transaction of `conn`."""
+    stmt = sqlite_insert(TableVersion).values([{"table_name": table, "version": 1} for table in sorted(tables)])
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=["table_name"], set_={"version": TableVersion.version + 1}
+    ))
+
+def versions(db: Session, tables: Iterable[str]) -> Dict[str, int]:
+    current = dict.fromkeys(tables, 0)
+    stmt = select(TableVersion.table_name, TableVersion.version).where(TableVersion.table_name.in_(current))
+    current.update(db.execute(stmt).all())
+    return current
+
+def etag(db: Session, tables: Iterable[str], key: str) -> str:
+    """
+    Builds a strong ETag from the stored versions of `tables` and `key`, which
+    identifies the representation (path and query string). It changes whenever
+    a committed write touches one of the tables, from any process.
+    """
+    current = sorted(versions(db, tables).items())
+    material = f"{current}|{key}"
+    return '"' + hashlib.sha1(material.encode()).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], current: str) -> bool:
+    if not if_none_match:
+        return False
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or current in candidates
+
+
+# --- Write tracking ---
+# Every Session (including the one behind an AsyncSession) records the tables
+# its flushes and INSERT/UPDATE/DELETE statements touch, and bumps their
+# versions just before it commits. The bump is part of the committed
+# transaction, so a reader can never pair a new ETag with old rows, and a
+# rolled back write leaves the versions alone.
+
+def _pending(session: Session) -> set:
+    return session.info.setdefault(_PENDING_KEY, set())
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    _pending(session).update(
+        obj.__table__.name for obj in chain(session.new, session.dirty, session.deleted) if hasattr(obj, "__table__")
+    )
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            _pending(orm_execute_state.session).add(table.name)
+
+def track(session: Session, tables: Iterable[str]) -> None:
+    """Records tables written through the session's connection without the ORM, e.g. exec_driver_sql."""
+    _pending(session).update(tables)
+
+@event.listens_for(Session, "before_commit")
+def _bump_committing(session):
+    # The commit flushes after this hook; flushing here first counts those tables too
+    session.flush()
+    tables = session.info.pop(_PENDING_KEY, None)
+    if tables:
+        # Through the connection, so the bump is not tracked as a write of its own
+        bump(session.connection(), tables)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop(_PENDING_KEY, None)
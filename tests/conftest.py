@@ -0,0 +1,65 @@
+# Backend/tests/conftest.py
+
+import os
+import sys
+import tempfile
+from datetime import date
+
+# The app binds its engines at import, so the test database is configured first
+_TMP = tempfile.mkdtemp(prefix="pm-dashboard-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP, 'test.db')}"
+os.environ["KPI_CACHE_PATH"] = os.path.join(_TMP, "kpi_cache.db")
+os.environ["KPI_SCORER_PATH"] = os.path.join(_TMP, "kpi_scoring_model.json")
+for job in ("BUDGET_FORECAST", "ALERT_RULES", "EMPLOYEE_WORKLOAD"):
+    os.environ[f"{job}_INTERVAL_SECONDS"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="session")
+def client():
+    import main
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def db(client):
+    from database import SessionLocal
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def project(client):
+    """A fresh customer and project; tests scope their queries to it, as the database is shared."""
+    customer = client.post("/api/customers/", json={"name": "Acme", "email": "ops@example.com", "phone": "555-0100"})
+    assert customer.status_code == 201, customer.text
+    response = client.post("/api/projects/", json={
+        "project_name": "Test project",
+        "customer_id": customer.json()["id"],
+        "status": "In Progress",
+        "budget_total": 1000.0,
+        "start_date": date(2024, 1, 1).isoformat(),
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+@pytest.fixture
+def make_task(client, project):
+    def make_task(**fields):
+        payload = {
+            "title": "Task",
+            "project_id": project["id"],
+            "due_date": date(2030, 1, 1).isoformat(),
+            "status": "Pending",
+            "priority": "Medium",
+            **fields,
+        }
+        response = client.post("/api/tasks/", json=payload)
+        assert response.status_code == 201, response.text
+        return response.json()
+    return make_task
@@ -0,0 +1,50 @@
+# Backend/tests/test_alert_rules.py
+
+from datetime import date, timedelta
+
+import alert_rules
+import models
+
+
+def _alerts(db, alert_type, **where):
+    query = db.query(models.Alert).filter(models.Alert.type == alert_type, models.Alert.is_resolved.is_(False))
+    return query.filter_by(**where).all()
+
+
+def test_overdue_task_alert_is_raised_once(client, db, make_task):
+    task = make_task(title="Late", due_date=(date.today() - timedelta(days=3)).isoformat())
+
+    alert_rules.run(db)
+    # The task changes again after the first run, so the second run looks at it too
+    assert client.patch(f"/api/tasks/{task['id']}", json={"description": "Still late"}).status_code == 200
+    alert_rules.run(db, today=date.today() + timedelta(days=1))
+
+    assert db.get(models.Task, task["id"]).status == alert_rules.OVERDUE_STATUS
+    assert len(_alerts(db, alert_rules.ALERT_OVERDUE_TASK, task_id=task["id"])) == 1
+
+
+def test_resolved_alert_is_raised_again(client, db, make_task):
+    task = make_task(title="Late", due_date=(date.today() - timedelta(days=3)).isoformat())
+    alert_rules.run(db)
+    [alert] = _alerts(db, alert_rules.ALERT_OVERDUE_TASK, task_id=task["id"])
+    assert client.patch(f"/api/alerts/{alert.id}", json={"is_resolved": True}).status_code == 200
+
+    assert client.patch(f"/api/tasks/{task['id']}", json={"description": "Still late"}).status_code == 200
+    alert_rules.run(db)
+    db.expire_all()
+    assert len(_alerts(db, alert_rules.ALERT_OVERDUE_TASK, task_id=task["id"])) == 1
+
+
+def test_stalled_project_alert_is_raised_once(db, project):
+    later = date.today() + timedelta(days=alert_rules.STALL_DAYS + 1)
+    alert_rules.run(db, today=later)
+    alert_rules.run(db, today=later + timedelta(days=1))
+    assert len(_alerts(db, alert_rules.ALERT_STALLED_PROJECT, project_id=project["id"])) == 1
+
+
+def test_task_without_project_does_not_hide_stalled_projects(db, project):
+    # A recently changed task without a project made NOT IN (...) unknown for every project
+    db.add(models.Task(title="Orphan", project_id=None, status="Pending", priority="Low", due_date=date(2030, 1, 1)))
+    db.commit()
+    alert_rules.run(db, today=date.today() + timedelta(days=1))
+    assert len(_alerts(db, alert_rules.ALERT_STALLED_PROJECT, project_id=project["id"])) == 1
@@ -0,0 +1,52 @@
+# Backend/tests/test_budget_forecast.py
+
+from datetime import date, timedelta
+
+import pytest
+
+import budget_forecast
+
+
+def _forecast(db, project_id, as_of):
+    result = budget_forecast.forecast(budget_forecast.load_portfolio(db, as_of), as_of)
+    [row] = [row for row in budget_forecast.forecast_rows(result, as_of) if row["project_id"] == project_id]
+    return row
+
+
+def test_young_project_burns_over_its_own_days(client, db, project):
+    # 150 spent over the first 5 days of a 1000 budget, forecast 10 days after the first entry
+    first = date(2024, 1, 1)
+    for day in range(5):
+        response = client.post("/api/budget-history/", json={
+            "project_id": project["id"],
+            "date": (first + timedelta(days=day)).isoformat(),
+            "amount_spent": 30.0,
+            "remaining_budget": 1000.0 - 30.0 * (day + 1),
+        })
+        assert response.status_code == 201, response.text
+
+    row = _forecast(db, project["id"], first + timedelta(days=10))
+    assert row["budget_used"] == pytest.approx(150.0)
+    # The 11 days since the first entry, not the whole window
+    assert row["burn_rate_per_day"] == pytest.approx(150.0 / 11)
+    assert row["days_until_exhaustion"] == pytest.approx(850.0 / (150.0 / 11))
+    assert row["budget_status"] == budget_forecast.STATUS_AT_RISK
+
+
+def test_project_older_than_the_window_burns_over_the_window(client, db, project):
+    first = date(2024, 1, 1)
+    for day in (0, 100):
+        client.post("/api/budget-history/", json={
+            "project_id": project["id"], "date": (first + timedelta(days=day)).isoformat(),
+            "amount_spent": 91.0, "remaining_budget": 0.0,
+        })
+    row = _forecast(db, project["id"], first + timedelta(days=100))
+    # Only the entry inside the window counts, spread over the whole window
+    assert row["burn_rate_per_day"] == pytest.approx(91.0 / budget_forecast.WINDOW_DAYS)
+
+
+def test_project_without_spend_does_not_burn(db, project):
+    row = _forecast(db, project["id"], date(2024, 1, 1))
+    assert row["burn_rate_per_day"] == 0.0
+    assert row["days_until_exhaustion"] is None
+    assert row["budget_status"] == budget_forecast.STATUS_OK
@@ -0,0 +1,108 @@
+# Backend/tests/test_budget_rollups.py
+
+import json
+import math
+from datetime import date
+
+import pytest
+
+import budget_rollups
+import models
+
+# Crosses week (Monday) and month boundaries; the 2024-01-29 pair shares a day,
+# and the 2024-01-20 entry arrives after later ones
+SINGLE_ENTRIES = [
+    (date(2024, 1, 27), 100.0, 900.0),
+    (date(2024, 1, 29), 50.0, 850.0),
+    (date(2024, 1, 29), 25.0, 825.0),
+    (date(2024, 2, 4), 10.0, 815.0),
+    (date(2024, 2, 5), 40.0, 775.0),
+    (date(2024, 1, 20), 5.0, 995.0),
+]
+IMPORTED_ENTRIES = [
+    (date(2024, 2, 29), 60.0, 715.0),
+    (date(2024, 3, 1), 30.0, 685.0),
+    (date(2024, 3, 4), 20.0, 665.0),
+    (date(2024, 2, 12), 15.0, 760.0),
+]
+
+
+@pytest.fixture
+def ledger(client, project):
+    for day, amount, remaining in SINGLE_ENTRIES:
+        response = client.post("/api/budget-history/", json={
+            "project_id": project["id"], "date": day.isoformat(), "amount_spent": amount, "remaining_budget": remaining,
+        })
+        assert response.status_code == 201, response.text
+    lines = "\n".join(json.dumps({
+        "project_id": project["id"], "date": day.isoformat(), "amount_spent": amount, "remaining_budget": remaining,
+    }) for day, amount, remaining in IMPORTED_ENTRIES)
+    assert client.post("/api/import/budget-history?format=ndjson", content=lines.encode()).json()["inserted"] == 4
+    return project
+
+
+def _expected(db, project_id, bucket):
+    """The series computed straight from budget_history: sums per period, running totals, latest remaining."""
+    periods = {}
+    for entry in db.query(models.BudgetHistory).filter_by(project_id=project_id).order_by(models.BudgetHistory.id):
+        start = budget_rollups.period_start(entry.date, bucket)
+        amount, latest, remaining = periods.get(start, (0.0, date.min, None))
+        if entry.date >= latest:
+            latest, remaining = entry.date, entry.remaining_budget
+        periods[start] = (amount + entry.amount_spent, latest, remaining)
+    series, total = [], 0.0
+    for start in sorted(periods):
+        amount, _, remaining = periods[start]
+        total += amount
+        series.append({"period_start": start.isoformat(), "amount_spent": amount,
+                       "cumulative_spent": total, "remaining_budget": remaining})
+    return series
+
+
+def _series(client, project_id, **params):
+    response = client.get(f"/api/projects/{project_id}/budget/series", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.mark.parametrize("bucket", budget_rollups.BUCKETS)
+def test_series_matches_the_ledger(client, db, ledger, bucket):
+    expected = _expected(db, ledger["id"], bucket)
+    series = _series(client, ledger["id"], bucket=bucket, points=1000)
+    assert (series["periods"], series["stride"]) == (len(expected), 1)
+    assert [{key: point[key] for key in expected[0]} for point in series["points"]] == expected
+    assert all(point["period_end"] == point["period_start"] for point in series["points"])
+
+
+def test_rebuild_matches_incremental_folding(client, db, ledger):
+    before = {bucket: _series(client, ledger["id"], bucket=bucket) for bucket in budget_rollups.BUCKETS}
+    budget_rollups.rebuild(db, [ledger["id"]])
+    db.commit()
+    assert {bucket: _series(client, ledger["id"], bucket=bucket) for bucket in budget_rollups.BUCKETS} == before
+
+
+@pytest.mark.parametrize("points", [1, 3, 4, 7])
+def test_downsampling_merges_consecutive_periods(client, db, ledger, points):
+    expected = _expected(db, ledger["id"], "day")
+    stride = math.ceil(len(expected) / points)
+    merged = [expected[start:start + stride] for start in range(0, len(expected), stride)]
+
+    series = _series(client, ledger["id"], bucket="day", points=points)
+
+    assert series["stride"] == stride
+    assert len(series["points"]) <= points
+    assert series["points"] == [{
+        "period_start": group[0]["period_start"],
+        "period_end": group[-1]["period_start"],
+        "amount_spent": pytest.approx(sum(period["amount_spent"] for period in group)),
+        "cumulative_spent": group[-1]["cumulative_spent"],
+        "remaining_budget": group[-1]["remaining_budget"],
+    } for group in merged]
+
+
+def test_date_range_covers_whole_periods(client, db, ledger):
+    # Starting mid-week keeps the whole week the date falls in
+    series = _series(client, ledger["id"], bucket="week", date_from="2024-01-31", date_to="2024-02-29")
+    assert [point["period_start"] for point in series["points"]] == [
+        "2024-01-29", "2024-02-05", "2024-02-12", "2024-02-26",
+    ]
@@ -0,0 +1,67 @@
+# Backend/tests/test_bulk.py
+
+from datetime import date
+
+import crud
+
+
+def test_bulk_tasks_report_errors_per_item(client, project):
+    items = [
+        {"title": "First", "project_id": project["id"], "due_date": "2030-01-01", "status": "Pending", "priority": "High"},
+        {"project_id": project["id"], "due_date": "2030-01-01", "status": "Pending", "priority": "High"},
+        {"title": "Bad date", "project_id": project["id"], "due_date": "someday", "status": "Pending", "priority": "Low"},
+        "not an object",
+        {"title": "Last", "project_id": project["id"], "due_date": "2030-02-01", "status": "Done", "priority": "Low"},
+    ]
+    response = client.post("/api/tasks/bulk", json=items)
+    assert response.status_code == 200, response.text
+    body = response.json()
+
+    assert (body["succeeded"], body["failed"]) == (2, 3)
+    assert [result["index"] for result in body["results"]] == list(range(len(items)))
+    assert [result["status"] for result in body["results"]] == ["created", "error", "error", "error", "created"]
+    assert [error["loc"] for error in body["results"][1]["errors"]] == [["title"]]
+    assert [error["loc"] for error in body["results"][2]["errors"]] == [["due_date"]]
+    assert body["results"][3]["errors"]
+    # Only the valid items were written, each under the id reported for it
+    for index in (0, 4):
+        task = client.get(f"/api/tasks/{body['results'][index]['id']}").json()
+        assert (task["title"], task["project_id"]) == (items[index]["title"], project["id"])
+    titles = {task["title"] for task in client.get("/api/tasks/", params={"project_id": project["id"]}).json()}
+    assert titles == {"First", "Last"}
+
+
+def test_bulk_rejects_oversized_batches(client, project, monkeypatch):
+    monkeypatch.setattr(crud, "BULK_MAX_ITEMS", 2)
+    item = {"project_id": project["id"], "date": date(2024, 1, 1).isoformat(), "amount_spent": 1.0, "remaining_budget": 999.0}
+    response = client.post("/api/budget-history/bulk", json=[item] * 3)
+    assert response.status_code == 400
+    assert client.get("/api/budget-history/", params={"project_id": project["id"]}).json() == []
+
+
+def test_bulk_kpi_upsert_reports_created_and_updated(client, project):
+    other = client.post("/api/projects/", json={
+        "project_name": "Other project", "customer_id": project["customer_id"], "status": "In Progress",
+        "budget_total": 500.0, "start_date": date(2024, 1, 1).isoformat(),
+    }).json()
+    existing = client.post("/api/project-kpis/", json={"project_id": project["id"], "kpi_class": "Low", "milestone_completion": 10.0})
+    assert existing.status_code == 201, existing.text
+
+    response = client.post("/api/project-kpis/bulk", json=[
+        {"project_id": project["id"], "milestone_completion": 50.0},
+        {"project_id": other["id"], "kpi_class": "High"},
+        {"project_id": "not a project"},
+        # The second item for a project in the batch updates the record the first one created
+        {"project_id": other["id"], "schedule_variance": 3.0},
+    ])
+    assert response.status_code == 200, response.text
+    body = response.json()
+
+    assert (body["succeeded"], body["failed"]) == (3, 1)
+    assert [result["status"] for result in body["results"]] == ["updated", "created", "error", "updated"]
+    kpi = client.get(f"/api/projects/{project['id']}/kpi").json()
+    other_kpi = client.get(f"/api/projects/{other['id']}/kpi").json()
+    assert [result["id"] for result in body["results"]] == [existing.json()["id"], other_kpi["id"], None, other_kpi["id"]]
+    # Updates write only the fields the item carries
+    assert (kpi["milestone_completion"], kpi["kpi_class"]) == (50.0, "Low")
+    assert (other_kpi["kpi_class"], other_kpi["schedule_variance"]) == ("High", 3.0)
@@ -0,0 +1,75 @@
+# Backend/tests/test_compression.py
+
+import gzip
+import zlib
+
+import pytest
+
+import compression
+
+
+def _raw(client, url, accept_encoding):
+    # httpx decodes bodies on access; streaming keeps the wire bytes
+    with client.stream("GET", url, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+@pytest.fixture
+def tasks_url(project, make_task):
+    for n in range(40):
+        make_task(title=f"Compressible task {n}", description="The same words over and over " * 4)
+    return f"/api/tasks/?project_id={project['id']}"
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, br", "br" if compression.brotli else "gzip"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("identity", None),
+    ("gzip;q=0", None),
+    ("*", "br" if compression.brotli else "gzip"),
+])
+def test_negotiate(header, expected):
+    assert compression.negotiate(header) == expected
+
+
+def test_large_list_is_gzipped(client, tasks_url):
+    identity, plain = _raw(client, tasks_url, "identity")
+    response, body = _raw(client, tasks_url, "gzip")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert int(response.headers["Content-Length"]) == len(body) < len(plain)
+    assert gzip.decompress(body) == plain
+    # Same representation, different bytes: the validator is weakened
+    assert response.headers["ETag"] == "W/" + identity.headers["ETag"]
+    assert "Content-Encoding" not in identity.headers
+
+
+@pytest.mark.skipif(compression.brotli is None, reason="brotli is not installed")
+def test_large_list_is_brotli_compressed(client, tasks_url):
+    _, plain = _raw(client, tasks_url, "identity")
+    response, body = _raw(client, tasks_url, "br")
+    assert response.headers["Content-Encoding"] == "br"
+    assert compression.brotli.decompress(body) == plain
+
+
+def test_weak_etag_still_revalidates(client, tasks_url):
+    response, _ = _raw(client, tasks_url, "gzip")
+    again = client.get(tasks_url, headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+    assert "Content-Encoding" not in again.headers
+
+
+def test_small_response_is_left_alone(client, project):
+    response, body = _raw(client, f"/api/tasks/?project_id={project['id']}", "gzip")
+    assert body == b"[]"
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" not in response.headers.get("Vary", "")
+
+
+def test_streamed_export_is_compressed_per_chunk(client, project, tasks_url):
+    url = f"/api/export/tasks?format=ndjson&project_id={project['id']}"
+    _, plain = _raw(client, url, "identity")
+    response, body = _raw(client, url, "gzip")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert zlib.decompress(body, 16 + zlib.MAX_WBITS) == plain
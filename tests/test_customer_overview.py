@@ -0,0 +1,69 @@
+# Backend/tests/test_customer_overview.py
+
+import uuid
+from datetime import date
+
+import pytest
+
+import models
+
+
+@pytest.fixture
+def customers(client, db):
+    """Three customers sharing an industry tag: one with mixed projects, one without, one unclassified."""
+    industry = f"Industry {uuid.uuid4().hex[:8]}"
+    ids = [
+        client.post("/api/customers/", json={"name": f"Customer {n}", "email": f"c{n}@example.com", "phone": "555-0100",
+                                             "industry": industry, "priority_level": n + 1}).json()["id"]
+        for n in range(3)
+    ]
+    # (customer, status, budget_total, budget_used, kpi_class or None for no KPI record)
+    projects = [
+        (ids[0], "In Progress", 1000.0, 400.0, "Medium"),
+        (ids[0], "Completed", 500.0, 500.0, "Low"),
+        (ids[0], "On Hold", 200.0, 0.0, "Error"),
+        (ids[0], "Planning", 300.0, 50.0, None),
+        (ids[2], "In Progress", 100.0, 10.0, "Error"),
+    ]
+    project_ids = [
+        client.post("/api/projects/", json={
+            "project_name": "Project", "customer_id": customer_id, "status": status,
+            "budget_total": budget_total, "start_date": date(2024, 1, 1).isoformat(),
+        }).json()["id"]
+        for customer_id, status, budget_total, _, _ in projects
+    ]
+    # budget_used is written by the forecast job, so the test sets it directly
+    for project_id, (_, _, _, budget_used, kpi_class) in zip(project_ids, projects):
+        db.query(models.Project).filter_by(id=project_id).update({"budget_used": budget_used})
+        if kpi_class is not None:
+            db.add(models.Project_KPI(project_id=project_id, kpi_class=kpi_class))
+    db.commit()
+    return industry, ids
+
+
+def test_overview_rollups(client, customers):
+    industry, ids = customers
+    response = client.get("/api/customers/overview", params={"industry": industry})
+    assert response.status_code == 200, response.text
+    rollups = {row["id"]: (row["project_count"], row["active_project_count"], row["budget_total"],
+                           row["budget_used"], row["worst_kpi_class"]) for row in response.json()}
+    assert rollups == {
+        # On Hold and Completed are not active; "Error" and missing KPIs do not rank
+        ids[0]: (4, 2, 2000.0, 950.0, "Low"),
+        ids[1]: (0, 0, 0.0, 0.0, None),
+        ids[2]: (1, 1, 100.0, 10.0, None),
+    }
+    assert response.headers["X-Total-Count"] == "3"
+
+
+@pytest.mark.parametrize("params", [{}, {"sort": "-priority_level"}, {"sort": "name", "limit": 2}, {"skip": 1, "limit": 1}])
+def test_overview_pages_like_the_customer_list(client, customers, params):
+    industry, _ = customers
+    query = {"industry": industry, **params}
+    overview = client.get("/api/customers/overview", params=query)
+    listed = client.get("/api/customers/", params=query)
+    assert [row["id"] for row in overview.json()] == [row["id"] for row in listed.json()]
+    for row, customer in zip(overview.json(), listed.json()):
+        assert {key: row[key] for key in ("name", "email", "phone", "industry", "priority_level")} == \
+            {key: customer[key] for key in ("name", "email", "phone", "industry", "priority_level")}
+    assert overview.headers.get("X-Next-Cursor") == listed.headers.get("X-Next-Cursor")
@@ -0,0 +1,26 @@
+# Backend/tests/test_dashboard.py
+
+from datetime import date
+
+import crud
+import models
+
+
+def test_summary_follows_writes_from_other_sessions(client, db, project):
+    first = client.get("/api/dashboard/summary")
+    tasks = first.json()["total_tasks"]
+
+    # Stands in for a CLI job or another worker, which never touch this process's cache
+    db.add(models.Task(title="Out of process", project_id=project["id"], status="Pending", priority="Low", due_date=date(2030, 1, 1)))
+    db.commit()
+
+    second = client.get("/api/dashboard/summary", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert second.json()["total_tasks"] == tasks + 1
+
+
+def test_summary_is_reused_while_its_tables_are_unchanged(client, monkeypatch):
+    client.get("/api/dashboard/summary?project_limit=3")
+    monkeypatch.setattr(crud, "_compute_dashboard_summary", lambda db, project_limit: None)
+    assert client.get("/api/dashboard/summary?project_limit=3").status_code == 200
@@ -0,0 +1,57 @@
+# Backend/tests/test_etags.py
+
+from datetime import date
+
+import models
+
+
+def test_write_invalidates_etag(client, project, make_task):
+    make_task(title="First")
+    url = f"/api/tasks/?project_id={project['id']}"
+    first = client.get(url)
+    etag = first.headers["ETag"]
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    make_task(title="Second")
+    second = client.get(url, headers={"If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != etag
+    assert [task["title"] for task in second.json()] == ["First", "Second"]
+
+
+def test_write_to_another_table_keeps_etag(client, project, make_task):
+    url = f"/api/tasks/?project_id={project['id']}"
+    etag = client.get(url).headers["ETag"]
+    client.post("/api/customers/", json={"name": "Other", "email": "other@example.com", "phone": "555-0101"})
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_etag_depends_on_query(client, project):
+    first = client.get(f"/api/tasks/?project_id={project['id']}").headers["ETag"]
+    second = client.get(f"/api/tasks/?project_id={project['id']}&limit=5").headers["ETag"]
+    assert first != second
+
+
+def test_write_from_another_session_invalidates_etag_and_count(client, db, project, make_task):
+    # Stands in for a CLI job or another worker: nothing is shared with the app but the database
+    make_task(title="First")
+    url = f"/api/tasks/?project_id={project['id']}"
+    first = client.get(url)
+    assert first.headers["X-Total-Count"] == "1"
+
+    db.add(models.Task(title="Second", project_id=project["id"], status="Pending", priority="Low", due_date=date(2030, 1, 1)))
+    db.commit()
+
+    second = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.headers["X-Total-Count"] == "2"
+
+
+def test_rolled_back_write_keeps_etag(client, db, project):
+    url = f"/api/tasks/?project_id={project['id']}"
+    etag = client.get(url).headers["ETag"]
+    db.add(models.Task(title="Never", project_id=project["id"], status="Pending", priority="Low"))
+    db.flush()
+    db.rollback()
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
@@ -0,0 +1,23 @@
+# Backend/tests/test_export.py
+
+import csv
+import io
+import json
+
+
+def test_export_carries_the_schema_fields(client, project, make_task):
+    task = make_task(title="Exported")
+    response = client.get("/api/export/tasks", params={"format": "ndjson", "project_id": project["id"]})
+    assert response.status_code == 200, response.text
+    [row] = [json.loads(line) for line in response.text.splitlines()]
+    assert row == task
+    assert "updated_at" not in row
+
+
+def test_csv_export_leads_with_id(client, project, make_task):
+    make_task(title="Exported")
+    response = client.get("/api/export/tasks", params={"format": "csv", "project_id": project["id"]})
+    header, row = csv.reader(io.StringIO(response.text))
+    assert header[0] == "id"
+    assert "updated_at" not in header
+    assert row[header.index("title")] == "Exported"
@@ -0,0 +1,70 @@
+# Backend/tests/test_fast_json.py
+
+import json
+from datetime import date
+
+import pytest
+
+import crud
+import main
+
+
+def _typed(body: bytes):
+    # Keeps 1 and 1.0 apart, which a plain json.loads comparison would not
+    return json.loads(body, parse_int=lambda text: ("int", int(text)), parse_float=lambda text: ("float", float(text)))
+
+
+@pytest.fixture
+def populated(client, project, make_task):
+    """Rows in every listed table, with nulls, dates, booleans and floats, tied to the project."""
+    employee = client.post("/api/employees/", json={
+        "name": "Employee", "email": f"fast.{project['id']}@example.com", "position": "Engineer",
+        "hire_date": date(2023, 1, 1).isoformat(), "status": "Active",
+    }).json()
+    make_task(assignee_id=employee["id"], description="Has a description")
+    task = make_task(status="Done", completion_date=date(2024, 2, 1).isoformat(), reopened_count=2)
+    for n, resolved in enumerate((False, True)):
+        assert client.post("/api/alerts/", json={
+            "message": f"Alert {n}", "project_id": project["id"], "task_id": task["id"] if n else None,
+            "type": "Overdue Task", "created_at": date(2024, 2, 1 + n).isoformat(), "is_resolved": resolved,
+        }).status_code == 201
+    for n in range(3):
+        assert client.post("/api/budget-history/", json={
+            "project_id": project["id"], "date": date(2024, 1, 1 + n).isoformat(),
+            "amount_spent": 12.5 * n, "remaining_budget": 1000 - 12.5 * n,
+        }).status_code == 201
+    assert client.post("/api/project-kpis/", json={"project_id": project["id"], "risk_flag": True}).status_code == 201
+    return {"project": project, "employee": employee}
+
+
+def _cases(populated):
+    project_id, customer_id = populated["project"]["id"], populated["project"]["customer_id"]
+    return [
+        ("employees", {"position": "Engineer", "sort": "-hire_date"}),
+        ("customers", {"sort": "name", "limit": 5}),
+        ("projects", {"customer_id": customer_id}),
+        ("tasks", {"project_id": project_id}),
+        ("tasks", {"project_id": project_id, "sort": "-due_date", "limit": 1}),
+        ("alerts", {"project_id": project_id, "sort": "created_at"}),
+        ("budget-history", {"project_id": project_id, "sort": "-date", "limit": 2}),
+        ("project-kpis", {"project_id": project_id}),
+    ]
+
+
+def test_fast_path_matches_the_validated_path(client, populated, monkeypatch):
+    for entity, params in _cases(populated):
+        monkeypatch.setattr(main, "FAST_LIST_RESPONSES", False)
+        validated = client.get(f"/api/{entity}/", params=params)
+        monkeypatch.setattr(main, "FAST_LIST_RESPONSES", True)
+        fast = client.get(f"/api/{entity}/", params=params)
+
+        assert validated.status_code == fast.status_code == 200, (entity, validated.text, fast.text)
+        assert validated.json(), entity
+        assert _typed(fast.content) == _typed(validated.content), entity
+        for header in ("X-Total-Count", "X-Next-Cursor", "ETag", "Content-Type"):
+            assert fast.headers.get(header) == validated.headers.get(header), (entity, header)
+
+
+def test_every_list_endpoint_is_covered(populated):
+    # A list endpoint added later must be added to the cases above
+    assert {entity for entity, _ in _cases(populated)} == set(crud.LIST_TABLES)
@@ -0,0 +1,26 @@
+# Backend/tests/test_import.py
+
+import json
+
+
+def test_import_reports_to_the_caller(client, project, capsys):
+    rows = [
+        {"title": "Imported 1", "project_id": project["id"], "due_date": "2030-01-01", "status": "Pending", "priority": "Low"},
+        {"title": "Imported 2", "project_id": project["id"], "due_date": "2030-01-02", "status": "Pending", "priority": "High"},
+        {"title": "No due date", "project_id": project["id"], "status": "Pending", "priority": "Low"},
+    ]
+    url = f"/api/tasks/?project_id={project['id']}"
+    etag = client.get(url).headers["ETag"]
+
+    response = client.post(
+        "/api/import/tasks?format=ndjson", content="\n".join(json.dumps(row) for row in rows).encode()
+    )
+
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert (report["rows_read"], report["inserted"], report["rejected"]) == (3, 2, 1)
+    assert [row["line"] for row in report["rejected_rows"]] == [3]
+    # Progress goes to the caller, not to the server's stdout
+    assert capsys.readouterr().out == ""
+    # Rows written through the driver still move the ETag
+    assert client.get(url, headers={"If-None-Match": etag}).headers["X-Total-Count"] == "2"
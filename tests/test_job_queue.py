@@ -0,0 +1,98 @@
+# Backend/tests/test_job_queue.py
+
+import asyncio
+import contextlib
+
+import pytest
+
+import crud
+import main
+import models
+from job_queue import KpiJobQueue, PeriodicJob, QueueFull
+
+
+@pytest.fixture
+def kpi_project(client, project, monkeypatch):
+    assert client.post("/api/project-kpis/", json={"project_id": project["id"]}).status_code == 201
+
+    async def classify(kpi_data):
+        return "High"
+    monkeypatch.setattr(crud, "_classify_with_llama", classify)
+    return project
+
+
+def _job_statuses(db, project_id):
+    db.rollback()
+    return [status for (status,) in db.query(models.KpiClassificationJob.status)
+            .filter_by(project_id=project_id).order_by(models.KpiClassificationJob.id)]
+
+
+def test_full_queue_answers_429(client, db, kpi_project, monkeypatch):
+    monkeypatch.setattr(main.kpi_job_queue, "max_pending", 0)
+    response = client.post(f"/api/projects/{kpi_project['id']}/classify_kpi/jobs")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "5"
+    assert _job_statuses(db, kpi_project["id"]) == []
+
+
+def test_submit_counts_waiting_jobs(client, db, kpi_project):
+    # No workers: submitted jobs stay pending
+    queue = KpiJobQueue(workers=0, max_pending=2)
+
+    async def submit_three():
+        await queue.submit(kpi_project["id"])
+        await queue.submit(kpi_project["id"])
+        with pytest.raises(QueueFull):
+            await queue.submit(kpi_project["id"])
+        return queue.pending
+
+    assert client.portal.call(submit_three) == 2
+    assert _job_statuses(db, kpi_project["id"]) == ["queued", "queued"]
+
+
+def test_start_resumes_persisted_jobs(client, db, kpi_project):
+    statuses = ["queued", "running", "succeeded", "failed"]
+    jobs = [models.KpiClassificationJob(project_id=kpi_project["id"], status=status) for status in statuses]
+    db.add_all(jobs)
+    db.commit()
+    ids = [job.id for job in jobs]
+    # Recovered jobs are queued even past max_pending
+    queue = KpiJobQueue(workers=1, max_pending=0)
+
+    async def restart():
+        await queue.start()
+        # The workers have not run yet: this is what start() queued
+        queued = list(queue._queue._queue)
+        await queue._queue.join()
+        await queue.stop()
+        return queued
+
+    queued = client.portal.call(restart)
+    assert [job_id for job_id in queued if job_id in ids] == ids[:2]
+    assert _job_statuses(db, kpi_project["id"]) == ["succeeded", "succeeded", "succeeded", "failed"]
+    assert [client.get(f"/api/jobs/{job_id}").json()["kpi_class"] for job_id in ids[:2]] == ["High", "High"]
+
+
+def test_periodic_job_logs_only_work_and_failures(capsys):
+    results = iter([0, {"overdue_tasks": 0, "stalled_project_alerts": 0}, ValueError("boom"), 3, {"overdue_tasks": 2}])
+
+    async def job(db):
+        result = next(results, None)
+        if result is None:
+            raise asyncio.CancelledError
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    @contextlib.asynccontextmanager
+    async def session_factory():
+        yield None
+
+    periodic = PeriodicJob("Test job", job, interval_seconds=0, session_factory=session_factory)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(periodic._loop())
+    assert capsys.readouterr().out.splitlines() == [
+        "Error running Test job: boom",
+        "Test job finished: 3",
+        "Test job finished: {'overdue_tasks': 2}",
+    ]
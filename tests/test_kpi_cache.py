@@ -0,0 +1,56 @@
+# Backend/tests/test_kpi_cache.py
+
+import asyncio
+import threading
+import time
+
+from kpi_cache import KpiClassificationCache
+
+
+def _commit_in_progress(cache):
+    """Holds the SQLite connection from another thread, as put() does while it commits; returns the release event."""
+    locked, release = threading.Event(), threading.Event()
+
+    def commit():
+        with cache._db_lock:
+            locked.set()
+            release.wait(1)
+    threading.Thread(target=commit, daemon=True).start()
+    locked.wait(1)
+    return release
+
+
+def test_memory_hits_do_not_wait_for_a_commit(tmp_path):
+    cache = KpiClassificationCache(path=str(tmp_path / "cache.db"))
+    cache.put("key", "High", {"overdue_tasks": 1})
+    release = _commit_in_progress(cache)
+    started = time.perf_counter()
+    assert cache.get("key") == "High"
+    assert time.perf_counter() - started < 0.5
+    release.set()
+
+
+def test_async_lookups_leave_the_event_loop(tmp_path):
+    cache = KpiClassificationCache(path=str(tmp_path / "cache.db"))
+    features = {"overdue_tasks": 1}
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return "High"
+
+    async def scenario():
+        first = await cache.get_or_compute_async("key", compute, features)
+        release = _commit_in_progress(cache)
+        # A key missing from memory has to read SQLite, so it waits for the commit off the loop
+        lookup = asyncio.ensure_future(cache.get_or_compute_async("other", compute, features))
+        await asyncio.sleep(0.05)
+        waiting = not lookup.done()
+        # Lookups served from memory and the in-flight bookkeeping go on meanwhile
+        hit = await asyncio.wait_for(cache.get_or_compute_async("key", compute, features), timeout=0.5)
+        release.set()
+        return first, hit, await lookup, waiting
+
+    assert asyncio.run(scenario()) == ("High", "High", "High", True)
+    assert len(calls) == 2
+    assert cache.stats()["hits"] == 1
@@ -0,0 +1,52 @@
+# Backend/tests/test_kpi_classification.py
+
+import pytest
+
+import crud
+from kpi_scoring import KpiScorer
+
+# Clear-cut on every feature, so the hand-tuned model is confident about it
+HEALTHY = {
+    "completion_percentage": 100.0, "milestone_completion": 100.0, "budget_utilization": 50.0,
+    "schedule_variance": 10.0, "overdue_tasks": 0, "alert_count": 0, "avg_task_completion_time": 2.0,
+    "employee_workload_index": 40.0, "customer_priority_level": 3, "reopened_tasks": 0, "risk_flag": False,
+}
+
+
+@pytest.fixture
+def healthy_project(client, project):
+    response = client.post("/api/project-kpis/", json={"project_id": project["id"], "kpi_class": "Low", **HEALTHY})
+    assert response.status_code == 201, response.text
+    return project
+
+
+@pytest.fixture
+def llama(client, monkeypatch):
+    calls = []
+
+    async def classify(kpi_data):
+        calls.append(kpi_data)
+        return "Medium"
+    monkeypatch.setattr(crud, "_classify_with_llama", classify)
+    return calls
+
+
+def test_untrained_local_tier_defers_to_llama(client, healthy_project, llama):
+    # No model file: even a clear-cut project goes to Llama3
+    assert crud.kpi_scorer is None
+    assert crud.classify_locally([HEALTHY]) == [None]
+
+    response = client.post(f"/api/projects/{healthy_project['id']}/classify_kpi")
+
+    assert response.status_code == 200, response.text
+    assert response.json()["kpi_class"] == "Medium"
+    assert len(llama) == 1
+
+
+def test_trained_local_tier_settles_clear_cut_projects(client, healthy_project, llama, monkeypatch):
+    monkeypatch.setattr(crud, "kpi_scorer", KpiScorer())
+
+    response = client.post(f"/api/projects/{healthy_project['id']}/classify_kpi")
+
+    assert response.json()["kpi_class"] == "High"
+    assert llama == []
@@ -0,0 +1,62 @@
+# Backend/tests/test_kpi_engine.py
+
+from datetime import date
+
+import pytest
+
+import kpi_engine
+import models
+
+
+def _kpi(db, project_id):
+    db.expire_all()
+    row = db.query(models.Project_KPI).filter_by(project_id=project_id).one()
+    return {field: getattr(row, field) for field in ("kpi_class", *kpi_engine.DERIVED_FIELDS)}
+
+
+def test_refresh_updates_only_the_given_project(client, db, project):
+    fields = {name: project[name] for name in ("customer_id", "status", "budget_total", "start_date")}
+    other = client.post("/api/projects/", json={**fields, "project_name": "Untouched"}).json()
+    for project_id in (project["id"], other["id"]):
+        assert client.post("/api/project-kpis/", json={"project_id": project_id}).status_code == 201
+    before = _kpi(db, other["id"])
+
+    # Written around crud, so nothing but the refresh below updates the KPIs
+    pid = project["id"]
+    db.add_all([
+        models.Task(project_id=pid, title="Late", status="Pending", priority="Low", due_date=date(2020, 1, 1)),
+        models.Task(project_id=pid, title="Flagged", status="Overdue", priority="Low", due_date=date(2030, 1, 1)),
+        models.Task(project_id=pid, title="Reopened", status="Done", priority="Low", due_date=date(2024, 2, 1),
+                    completion_date=date(2024, 1, 11), reopened_count=2),
+        models.Task(project_id=pid, title="Done", status="Done", priority="Low", due_date=date(2024, 2, 1),
+                    completion_date=date(2024, 1, 21)),
+        models.Alert(project_id=pid, message="Open", type="Manual", created_at=date(2024, 1, 5), is_resolved=False),
+        models.Alert(project_id=pid, message="Open", type="Manual", created_at=date(2024, 1, 6), is_resolved=False),
+        models.Alert(project_id=pid, message="Closed", type="Manual", created_at=date(2024, 1, 7), is_resolved=True),
+        models.BudgetHistory(project_id=pid, date=date(2024, 1, 5), amount_spent=250.0, remaining_budget=750.0),
+        models.BudgetHistory(project_id=pid, date=date(2024, 1, 9), amount_spent=150.0, remaining_budget=600.0),
+        models.Task(project_id=other["id"], title="Late elsewhere", status="Pending", priority="Low", due_date=date(2020, 1, 1)),
+    ])
+    db.get(models.Customer, project["customer_id"]).priority_level = 5
+    db.commit()
+
+    kpi_engine.refresh_projects(db, [pid])
+    db.commit()
+
+    assert _kpi(db, pid) == {
+        "kpi_class": before["kpi_class"],  # Not derived, so left alone
+        "overdue_tasks": 2,
+        "alert_count": 2,
+        "avg_task_completion_time": pytest.approx(15.0),
+        "reopened_tasks": 1,
+        "budget_utilization": pytest.approx(40.0),
+        "customer_priority_level": 5,  # Shared customer, but only this project was refreshed
+        "employee_workload_index": 0.0,
+    }
+    assert _kpi(db, other["id"]) == before
+
+
+def test_refresh_skips_projects_without_a_kpi_record(db, project):
+    kpi_engine.refresh_projects(db, [project["id"], None])
+    db.commit()
+    assert db.query(models.Project_KPI).filter_by(project_id=project["id"]).count() == 0
@@ -0,0 +1,127 @@
+# Backend/tests/test_list_filters.py
+
+import uuid
+from datetime import date
+
+import pytest
+
+import models
+
+
+def _post(client, path, payload):
+    response = client.post(f"/api/{path}/", json=payload)
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+@pytest.fixture(scope="module")
+def data(client):
+    """Two rows per entity that differ in every filterable column; tag keeps them apart from other tests' rows."""
+    from database import SessionLocal
+
+    tag = uuid.uuid4().hex[:8]
+    ids = {"tag": tag}
+    ids["customers"] = [
+        _post(client, "customers", {"name": f"Customer {n}", "email": f"c{n}.{tag}@example.com", "phone": "555-0100",
+                                    "industry": f"Industry {tag}", "priority_level": level})
+        for n, level in enumerate((1, 5))
+    ]
+    ids["employees"] = [
+        _post(client, "employees", {"name": f"Employee {n}", "email": f"e{n}.{tag}@example.com", "position": f"Position {tag}",
+                                    "hire_date": hired, "status": status})
+        for n, (status, hired) in enumerate((("Active", "2020-01-01"), ("On Leave", "2022-06-01")))
+    ]
+    ids["projects"] = [
+        _post(client, "projects", {"project_name": f"Project {n}", "customer_id": ids["customers"][0], "status": status,
+                                   "budget_total": 1000.0, "start_date": started})
+        for n, (status, started) in enumerate((("In Progress", "2024-01-01"), ("Completed", "2024-06-01")))
+    ]
+    with SessionLocal() as db:
+        db.query(models.Project).filter(models.Project.id == ids["projects"][1]).update({"budget_status": "Over Budget"})
+        db.commit()
+    project_id = ids["projects"][0]
+    ids["tasks"] = [
+        _post(client, "tasks", {"title": f"Task {n}", "project_id": project_id, "assignee_id": assignee,
+                                "due_date": due, "status": status, "priority": priority})
+        for n, (assignee, due, status, priority) in enumerate((
+            (ids["employees"][0], "2030-01-01", "Pending", "High"),
+            (ids["employees"][1], "2030-06-01", "In Progress", "Low"),
+        ))
+    ]
+    ids["alerts"] = [
+        _post(client, "alerts", {"message": f"Alert {n}", "project_id": project_id, "task_id": task_id, "type": kind,
+                                 "created_at": created, "is_resolved": resolved})
+        for n, (task_id, kind, created, resolved) in enumerate((
+            (ids["tasks"][0], "Overdue Task", "2024-02-01", False),
+            (ids["tasks"][1], "Budget Overrun", "2024-05-01", True),
+        ))
+    ]
+    ids["budget-history"] = [
+        _post(client, "budget-history", {"project_id": project_id, "date": day, "amount_spent": 10.0, "remaining_budget": 990.0})
+        for day in ("2024-02-01", "2024-05-01")
+    ]
+    ids["project-kpis"] = [
+        _post(client, "project-kpis", {"project_id": pid, "kpi_class": kpi_class, "risk_flag": risk})
+        for pid, (kpi_class, risk) in zip(ids["projects"], (("High", False), ("Low", True)))
+    ]
+    return ids
+
+
+# (entity, params, index of the matching row among the entity's two rows); "{...}" takes a value from the data
+CASES = [
+    ("employees", {"position": "Position {tag}", "status": "Active"}, [0]),
+    ("employees", {"position": "Position {tag}", "status": "Active,On Leave"}, [0, 1]),
+    ("employees", {"position": "Position {tag}", "date_from": "2021-01-01"}, [1]),
+    ("employees", {"position": "Position {tag}", "date_to": "2021-01-01"}, [0]),
+    ("customers", {"industry": "Industry {tag}"}, [0, 1]),
+    ("customers", {"industry": "Industry {tag}", "priority_level": 5}, [1]),
+    ("projects", {"customer_id": "{customers[0]}"}, [0, 1]),
+    ("projects", {"customer_id": "{customers[0]}", "status": "Completed"}, [1]),
+    ("projects", {"customer_id": "{customers[0]}", "budget_status": "Over Budget"}, [1]),
+    ("projects", {"customer_id": "{customers[0]}", "date_from": "2024-03-01"}, [1]),
+    ("projects", {"customer_id": "{customers[0]}", "date_to": "2024-03-01"}, [0]),
+    ("tasks", {"project_id": "{projects[0]}", "status": "Pending"}, [0]),
+    ("tasks", {"project_id": "{projects[0]}", "priority": "Low"}, [1]),
+    ("tasks", {"project_id": "{projects[0]}", "priority": "Low,High"}, [0, 1]),
+    ("tasks", {"assignee_id": "{employees[1]}"}, [1]),
+    ("tasks", {"project_id": "{projects[0]}", "date_from": "2030-03-01"}, [1]),
+    ("tasks", {"project_id": "{projects[0]}", "date_to": "2030-03-01"}, [0]),
+    ("alerts", {"project_id": "{projects[0]}"}, [0, 1]),
+    ("alerts", {"task_id": "{tasks[1]}"}, [1]),
+    ("alerts", {"project_id": "{projects[0]}", "type": "Overdue Task"}, [0]),
+    ("alerts", {"project_id": "{projects[0]}", "is_resolved": "false"}, [0]),
+    ("alerts", {"project_id": "{projects[0]}", "date_from": "2024-03-01"}, [1]),
+    ("alerts", {"project_id": "{projects[0]}", "date_to": "2024-03-01"}, [0]),
+    ("budget-history", {"project_id": "{projects[0]}"}, [0, 1]),
+    ("budget-history", {"project_id": "{projects[0]}", "date_from": "2024-03-01"}, [1]),
+    ("budget-history", {"project_id": "{projects[0]}", "date_to": "2024-03-01"}, [0]),
+    ("project-kpis", {"project_id": "{projects[1]}"}, [1]),
+    ("project-kpis", {"project_id": "{projects[0]}", "kpi_class": "High"}, [0]),
+    ("project-kpis", {"project_id": "{projects[0]}", "kpi_class": "Low"}, []),
+    ("project-kpis", {"project_id": "{projects[1]}", "risk_flag": "true"}, [1]),
+    ("project-kpis", {"project_id": "{projects[1]}", "risk_flag": "false"}, []),
+]
+
+
+@pytest.mark.parametrize("entity, params, expected", CASES, ids=[f"{case[0]}-{'-'.join(case[1])}" for case in CASES])
+def test_filter(client, data, entity, params, expected):
+    query = {name: value.format(**data) if isinstance(value, str) else value for name, value in params.items()}
+    response = client.get(f"/api/{entity}/", params={**query, "limit": 1000})
+    assert response.status_code == 200, response.text
+    assert [row["id"] for row in response.json()] == [data[entity][index] for index in expected]
+    assert response.headers["X-Total-Count"] == str(len(expected))
+
+
+def test_total_count_follows_writes(client, project, make_task):
+    def total():
+        response = client.get("/api/tasks/", params={"project_id": project["id"], "limit": 1})
+        assert response.status_code == 200, response.text
+        return int(response.headers["X-Total-Count"])
+
+    make_task()
+    # The second read is served from the count cache
+    assert total() == total() == 1
+    task = make_task()
+    assert total() == 2
+    assert client.delete(f"/api/tasks/{task['id']}").status_code == 204
+    assert total() == 1
@@ -0,0 +1,138 @@
+# Backend/tests/test_llama_client.py
+
+import asyncio
+
+import httpx
+import pytest
+
+import llama_kpi_agent
+from llama_kpi_agent import AsyncLlama3Client, CircuitBreaker, Llama3Unavailable
+
+FEATURES = {
+    "completion_percentage": 50.0, "milestone_completion": 50.0, "budget_utilization": 50.0,
+    "schedule_variance": 0.0, "overdue_tasks": 0, "alert_count": 0, "avg_task_completion_time": 5.0,
+    "employee_workload_index": 50.0, "customer_priority_level": 3, "reopened_tasks": 0, "risk_flag": False,
+}
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Records the backoff delays instead of waiting them; the jitter is pinned to 0."""
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay, *args, **kwargs):
+        delays.append(delay)
+        await real_sleep(0)
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    monkeypatch.setattr(llama_kpi_agent.random, "uniform", lambda low, high: 0.0)
+    return delays
+
+
+def _client(answers, **kwargs):
+    """A client whose agent replies with `answers` in turn: a status code, a classification or an exception."""
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        answer = answers[min(len(requests), len(answers)) - 1]
+        if isinstance(answer, Exception):
+            raise answer
+        if isinstance(answer, int):
+            return httpx.Response(answer)
+        return httpx.Response(200, json={"response": answer})
+
+    client = AsyncLlama3Client(**kwargs)
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client, requests
+
+
+def _classify(client):
+    return asyncio.run(client.classify_kpi_class(**FEATURES))
+
+
+def test_retries_5xx_and_transport_errors_with_backoff(sleeps):
+    client, requests = _client([503, httpx.ConnectError("refused"), "High"], max_retries=2, backoff_base=0.5)
+    assert _classify(client) == "High"
+    assert len(requests) == 3
+    assert sleeps == [0.5, 1.0]
+    assert (client.breaker.failures, client.breaker.state) == (0, "closed")
+
+
+def test_gives_up_after_the_last_retry(sleeps):
+    client, requests = _client([500], max_retries=2, backoff_base=0.5)
+    assert _classify(client) == "Error"
+    assert len(requests) == 3
+    assert sleeps == [0.5, 1.0]
+    assert client.breaker.failures == 1
+
+
+def test_4xx_is_not_retried(sleeps):
+    client, requests = _client([404], max_retries=2)
+    assert _classify(client) == "Error"
+    assert len(requests) == 1
+    assert sleeps == []
+    assert client.breaker.failures == 0
+
+
+def test_breaker_opens_and_fails_fast(sleeps):
+    client, requests = _client([503], max_retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=30.0))
+    assert [_classify(client), _classify(client)] == ["Error", "Error"]
+    assert client.breaker.state == "open"
+    with pytest.raises(Llama3Unavailable):
+        _classify(client)
+    assert len(requests) == 2
+
+
+@pytest.mark.parametrize("trial, state", [(httpx.Response(200, json={"response": "Low"}), "closed"), (httpx.Response(503), "open")])
+def test_half_open_lets_one_trial_through(sleeps, trial, state):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0)
+    breaker.record_failure()
+    breaker.opened_at -= 31.0
+    assert breaker.state == "half-open"
+    client = AsyncLlama3Client(max_retries=0, breaker=breaker)
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        await answer.wait()
+        return trial
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    async def trial_and_concurrent_call():
+        trial_call = asyncio.create_task(client.classify_kpi_class(**FEATURES))
+        while not requests:
+            await asyncio.sleep(0)
+        # The trial holds the half-open slot, so a concurrent call fails fast
+        with pytest.raises(Llama3Unavailable):
+            await client.classify_kpi_class(**FEATURES)
+        answer.set()
+        return await trial_call
+
+    answer = asyncio.Event()
+    assert asyncio.run(trial_and_concurrent_call()) == ("Low" if state == "closed" else "Error")
+    assert len(requests) == 1
+    assert breaker.state == state
+
+
+def test_cancelled_trial_frees_the_half_open_slot(sleeps):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0)
+    breaker.record_failure()
+    breaker.opened_at -= 31.0
+    client = AsyncLlama3Client(breaker=breaker)
+    entered = []
+
+    async def hang(request):
+        entered.append(request)
+        await asyncio.Event().wait()
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(hang))
+
+    async def cancel_trial():
+        trial = asyncio.create_task(client.classify_kpi_class(**FEATURES))
+        while not entered:
+            await asyncio.sleep(0)
+        trial.cancel()
+        await asyncio.gather(trial, return_exceptions=True)
+
+    asyncio.run(cancel_trial())
+    assert (breaker.state, breaker.trial_in_flight) == ("half-open", False)
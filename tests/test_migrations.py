@@ -0,0 +1,61 @@
+# Backend/tests/test_migrations.py
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects import sqlite
+
+import database
+import migrations
+import models
+
+
+class _PlanConnection:
+    """Answers EXPLAIN QUERY PLAN with fixed rows, as older and newer SQLite versions word them."""
+    dialect = sqlite.dialect()
+
+    def __init__(self, details):
+        self.details = details
+
+    def exec_driver_sql(self, sql):
+        return self
+
+    def fetchall(self):
+        return [(index, 0, 0, detail) for index, detail in enumerate(self.details)]
+
+
+@pytest.mark.parametrize("detail", ["SCAN tasks", "SCAN TABLE tasks"])
+def test_full_scans_reads_both_plan_wordings(detail):
+    stmt = select(models.Task)
+    assert migrations.full_scans(_PlanConnection([detail]), stmt) == [detail]
+
+
+@pytest.mark.parametrize("detail", [
+    "SCAN tasks USING INDEX ix_tasks_status",
+    "SCAN TABLE tasks USING COVERING INDEX ix_tasks_status",
+    "SEARCH TABLE tasks USING INDEX ix_tasks_project_id_status (project_id=?)",
+    "SCAN TABLE employees",
+])
+def test_full_scans_ignores_indexed_and_unchecked_steps(detail):
+    assert migrations.full_scans(_PlanConnection([detail]), select(models.Task)) == []
+
+
+def test_hot_queries_use_indexes(client):
+    with database.engine.connect() as conn:
+        assert migrations.check_query_plans(conn) == {}
+
+
+@pytest.mark.parametrize("url", ["postgresql://user@host/db", "mysql://user@host/db"])
+def test_engines_refuse_other_databases(url):
+    with pytest.raises(ValueError, match="only SQLite"):
+        database.make_engine(url)
+
+
+def test_upgrade_reports_through_log_only(capsys):
+    lines = []
+    with create_engine("sqlite://").begin() as conn:
+        applied = migrations.upgrade(conn, log=lines.append)
+    assert capsys.readouterr().out == ""
+    assert applied == [version for version, _, _ in migrations.MIGRATIONS]
+    assert lines[0] == "Applied migration 0001_initial_schema"
+    assert "Applied migration 0003_budget_rollups: Rolled up 0 budget history entries" in lines
+    assert len(lines) == len(applied)
@@ -0,0 +1,55 @@
+# Backend/tests/test_pagination.py
+
+from datetime import date, timedelta
+
+
+def _walk(client, params, limit=2):
+    """Follows X-Next-Cursor from the first page to the last, returning the ids in page order."""
+    ids, after = [], None
+    while True:
+        query = {**params, "limit": limit, **({"after": after} if after else {})}
+        response = client.get("/api/tasks/", params=query)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page) <= limit
+        ids.extend(task["id"] for task in page)
+        after = response.headers.get("X-Next-Cursor")
+        if not after:
+            return ids
+
+
+def test_cursor_follows_id_order(client, project, make_task):
+    created = [make_task(title=f"Task {n}")["id"] for n in range(7)]
+    assert _walk(client, {"project_id": project["id"]}) == created
+
+
+def test_cursor_breaks_ties_by_id(client, project, make_task):
+    # Three due dates shared by seven tasks: every page boundary falls inside a tie
+    start = date(2030, 3, 1)
+    tasks = [make_task(title=f"Task {n}", due_date=(start + timedelta(days=n % 3)).isoformat()) for n in range(7)]
+
+    ascending = [t["id"] for t in sorted(tasks, key=lambda t: (t["due_date"], t["id"]))]
+    assert _walk(client, {"project_id": project["id"], "sort": "due_date"}) == ascending
+
+    descending = [t["id"] for t in sorted(tasks, key=lambda t: (t["due_date"], t["id"]), reverse=True)]
+    assert _walk(client, {"project_id": project["id"], "sort": "-due_date"}) == descending
+
+
+def test_cursor_and_skip_agree(client, project, make_task):
+    for n in range(5):
+        make_task(title=f"Task {n}", priority=("Low", "High")[n % 2])
+    params = {"project_id": project["id"], "sort": "-priority"}
+    walked = _walk(client, params)
+    skipped = [task["id"] for skip in range(0, 5, 2)
+               for task in client.get("/api/tasks/", params={**params, "skip": skip, "limit": 2}).json()]
+    assert walked == skipped
+    assert client.get("/api/tasks/", params=params).headers["X-Total-Count"] == "5"
+
+
+def test_cursor_rejects_a_different_sort(client, project, make_task):
+    for n in range(3):
+        make_task(title=f"Task {n}")
+    response = client.get("/api/tasks/", params={"project_id": project["id"], "sort": "title", "limit": 1})
+    after = response.headers["X-Next-Cursor"]
+    response = client.get("/api/tasks/", params={"project_id": project["id"], "sort": "-due_date", "after": after})
+    assert response.status_code == 400
@@ -0,0 +1,43 @@
+# Backend/tests/test_project_detail.py
+
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+import crud
+
+
+@pytest.fixture
+def staffed_project(client, project, make_task):
+    for n in range(3):
+        employee = client.post("/api/employees/", json={
+            "name": f"Employee {n}", "email": f"employee{n}.{project['id']}@example.com", "position": "Engineer",
+            "hire_date": date(2023, 1, 1).isoformat(), "status": "Active",
+        })
+        assert employee.status_code == 201, employee.text
+        make_task(title=f"Task {n}", assignee_id=employee.json()["id"])
+        client.post("/api/budget-history/", json={
+            "project_id": project["id"], "date": date(2024, 1, 1 + n).isoformat(),
+            "amount_spent": 10.0, "remaining_budget": 990.0 - 10.0 * n,
+        })
+    return project
+
+
+@pytest.mark.parametrize("include", [
+    set(),
+    {"customer", "kpi"},
+    {"tasks"},
+    {"tasks", "tasks.assignee", "budget_history", "customer", "kpi"},
+])
+def test_project_detail_stays_within_query_limit(db, staffed_project, include):
+    statements = []
+    conn = db.connection()
+    event.listen(conn, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    detail = crud.get_project_detail(db, staffed_project["id"], include)
+
+    assert len(statements) <= crud.project_detail_query_limit(include), statements
+    if "tasks.assignee" in include:
+        assert [task.assignee.name for task in detail.tasks] == ["Employee 0", "Employee 1", "Employee 2"]
+        assert len(detail.budget_history) == 3
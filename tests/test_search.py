@@ -0,0 +1,34 @@
+# Backend/tests/test_search.py
+
+
+def test_search_ranks_by_bm25(client, make_task):
+    # Many older matches in descriptions, then one newer and one older match in titles
+    title = make_task(title="Quokka migration", description="Move the data")
+    for n in range(30):
+        make_task(title=f"Routine {n}", description="Mentions a quokka once among many other words of text")
+    newest = make_task(title="Quokka rollout", description="Ship it")
+
+    hits = client.get("/api/search", params={"q": "quokka", "entity": "tasks", "limit": 5}).json()
+
+    assert [hit["id"] for hit in hits[:2]] == [newest["id"], title["id"]]
+    assert [hit["score"] for hit in hits] == sorted(hit["score"] for hit in hits)
+    assert hits[0]["snippet"] == "[Quokka] rollout"
+
+
+def test_search_pages_agree(client, make_task):
+    for n in range(7):
+        make_task(title=f"Wombat {n}", description="wombat " * (n % 3))
+    whole = client.get("/api/search", params={"q": "wombat", "entity": "tasks", "limit": 7}).json()
+    paged = [hit for skip in (0, 3, 6)
+             for hit in client.get("/api/search", params={"q": "wombat", "entity": "tasks", "skip": skip, "limit": 3}).json()]
+    assert [hit["id"] for hit in paged] == [hit["id"] for hit in whole]
+    assert len(whole) == 7
+
+
+def test_search_caps_the_result_window(client, make_task):
+    make_task(title="Platypus")
+    params = {"q": "platypus", "entity": "tasks", "limit": 100}
+    assert client.get("/api/search", params={**params, "skip": 900}).status_code == 200
+    response = client.get("/api/search", params={**params, "skip": 901})
+    assert response.status_code == 400
+    assert "1000" in response.json()["detail"]
@@ -0,0 +1,103 @@
+# Backend/tests/test_workload.py
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+
+import models
+import workload
+
+
+@pytest.fixture
+def make_employee(client, project):
+    count = 0
+
+    def make_employee():
+        nonlocal count
+        count += 1
+        response = client.post("/api/employees/", json={
+            "name": f"Employee {count}", "email": f"workload{count}.{project['id']}@example.com",
+            "position": "Engineer", "hire_date": date(2023, 1, 1).isoformat(), "status": "Active",
+        })
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+    return make_employee
+
+
+def _materialized(db, employee_ids):
+    """The employee_workload and employee_project_load rows of `employee_ids`, as plain tuples."""
+    Workload, Load = models.EmployeeWorkload, models.EmployeeProjectLoad
+    workloads = db.execute(
+        select(Workload.employee_id, Workload.open_tasks, Workload.weighted_load, Workload.overdue_tasks,
+               Workload.due_soon_tasks, Workload.workload_index, Workload.as_of)
+        .where(Workload.employee_id.in_(employee_ids)).order_by(Workload.employee_id)
+    ).all()
+    loads = db.execute(
+        select(Load.employee_id, Load.project_id, Load.open_tasks)
+        .where(Load.employee_id.in_(employee_ids)).order_by(Load.employee_id, Load.project_id)
+    ).all()
+    return [tuple(row) for row in workloads], [tuple(row) for row in loads]
+
+
+def _assert_matches_rebuild(db, employee_ids, today=None):
+    db.rollback()
+    incremental = _materialized(db, employee_ids)
+    workload.rebuild(db, today)
+    assert _materialized(db, employee_ids) == incremental
+    db.rollback()
+    return incremental
+
+
+def test_task_writes_match_a_rebuild(client, db, project, make_task, make_employee):
+    other = client.post("/api/projects/", json={
+        "project_name": "Other project", "customer_id": project["customer_id"], "status": "In Progress",
+        "budget_total": 500.0, "start_date": date(2024, 1, 1).isoformat(),
+    }).json()
+    alice, bob, carol = make_employee(), make_employee(), make_employee()
+    today = date.today()
+
+    overdue = make_task(assignee_id=alice, priority="Critical", due_date=(today - timedelta(days=3)).isoformat())
+    due_soon = make_task(assignee_id=alice, priority="High", due_date=(today + timedelta(days=2)).isoformat())
+    make_task(assignee_id=alice, priority="Low", project_id=other["id"])
+    moved = make_task(assignee_id=bob, priority="Medium")
+    done = make_task(assignee_id=bob, priority="High")
+    make_task(assignee_id=carol, status="Overdue")
+    (workloads, loads) = _assert_matches_rebuild(db, [alice, bob, carol])
+    assert workloads[0][:5] == (alice, 3, 4.0 + 3.0 + 1.0, 1, 1)
+    assert (alice, other["id"], 1) in loads
+
+    # Reassigning moves the task's load across employees; completing or deleting drops it
+    assert client.patch(f"/api/tasks/{moved['id']}", json={"assignee_id": carol}).status_code == 200
+    assert client.patch(f"/api/tasks/{done['id']}", json={"status": "Done"}).status_code == 200
+    assert client.patch(f"/api/tasks/{overdue['id']}", json={"completion_date": today.isoformat()}).status_code == 200
+    assert client.patch(f"/api/tasks/{due_soon['id']}", json={"project_id": other["id"]}).status_code == 200
+    assert client.delete(f"/api/tasks/{moved['id']}").status_code == 204
+    assert client.patch(f"/api/tasks/{done['id']}", json={"status": "In Progress"}).status_code == 200
+
+    (workloads, loads) = _assert_matches_rebuild(db, [alice, bob, carol])
+    assert [row[:5] for row in workloads] == [
+        (alice, 2, 3.0 + 1.0, 0, 1),
+        (bob, 1, 3.0, 0, 0),
+        (carol, 1, 2.0, 1, 0),
+    ]
+    assert loads == [(alice, other["id"], 2), (bob, project["id"], 1), (carol, project["id"], 1)]
+
+
+def test_roll_over_moves_the_day_dependent_counts(db, make_task, make_employee):
+    day_zero, day_one = date(2024, 3, 1), date(2024, 3, 10)
+    busy, idle = make_employee(), make_employee()
+    # Due soon on day zero and overdue by day one; outside the window on day zero and due soon by day one
+    make_task(assignee_id=busy, due_date=date(2024, 3, 5).isoformat())
+    make_task(assignee_id=busy, due_date=date(2024, 3, 14).isoformat())
+    make_task(assignee_id=idle)
+    workload.refresh_employees(db, [busy, idle], day_zero)
+    db.commit()
+    workloads, _ = _materialized(db, [busy, idle])
+    assert [(row[3], row[4], row[6]) for row in workloads] == [(0, 1, day_zero), (0, 0, day_zero)]
+
+    assert workload.roll_over(db, day_one) >= 1
+    (workloads, _) = _assert_matches_rebuild(db, [busy, idle], day_one)
+    assert [(row[3], row[4], row[6]) for row in workloads] == [(1, 1, day_one), (0, 0, day_one)]
+    # Already current: nothing to recompute
+    assert workload.roll_over(db, day_one) == 0
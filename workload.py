@@ -0,0 +1,215 @@
+# Backend/workload.py
+
+import argparse
+import os
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, case, delete, func, insert, literal, or_, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+import models, kpi_engine
+import alert_rules
+
+# Each employee's open tasks are summed up in employee_workload, and the projects
+# they have open tasks in are listed in employee_project_load. Task writes refresh
+# the rows of the employees they touch from ix_tasks_assignee_id_status, so reading
+# workloads never aggregates the task table. Overdue and due soon counts depend on
+# the day; roll_over() moves them to the new day, touching only the employees with
+# tasks due in between.
+PRIORITY_WEIGHTS = {"Critical": 4.0, "High": 3.0, "Medium": 2.0, "Low": 1.0}
+DEFAULT_PRIORITY_WEIGHT = 1.0
+# Weighted load at which an employee's workload index reaches 100
+CAPACITY = float(os.getenv("EMPLOYEE_WORKLOAD_CAPACITY", "20"))
+DUE_SOON_DAYS = int(os.getenv("EMPLOYEE_WORKLOAD_DUE_SOON_DAYS", "7"))
+REFRESH_CHUNK_SIZE = 500
+
+
+def _open_task():
+    Task = models.Task
+    return and_(func.coalesce(Task.status, "").not_in(kpi_engine.DONE_TASK_STATUSES), Task.completion_date.is_(None))
+
+
+def _workload_select(employee_ids: List[int], today: date):
+    """Builds one SELECT of the employee_workload row of every employee in `employee_ids`, from their open tasks."""
+    Task, Employee = models.Task, models.Employee
+    weight = case(
+        *((Task.priority == priority, weight) for priority, weight in PRIORITY_WEIGHTS.items()),
+        else_=DEFAULT_PRIORITY_WEIGHT,
+    )
+    # Same rule as the overdue_tasks KPI: flagged by the alert rules, or already past due
+    overdue = or_(Task.status == alert_rules.OVERDUE_STATUS, Task.due_date < today)
+    due_soon = and_(
+        func.coalesce(Task.status, "") != alert_rules.OVERDUE_STATUS,
+        Task.due_date >= today,
+        Task.due_date <= today + timedelta(days=DUE_SOON_DAYS),
+    )
+    stats = (
+        select(
+            Task.assignee_id.label("employee_id"),
+            func.count().label("open_tasks"),
+            func.sum(weight).label("weighted_load"),
+            func.sum(case((overdue, 1), else_=0)).label("overdue_tasks"),
+            func.sum(case((due_soon, 1), else_=0)).label("due_soon_tasks"),
+        )
+        .where(Task.assignee_id.in_(employee_ids), _open_task())
+        .group_by(Task.assignee_id)
+        .subquery()
+    )
+    weighted_load = func.coalesce(stats.c.weighted_load, 0.0)
+    return (
+        select(
+            Employee.id,
+            func.coalesce(stats.c.open_tasks, 0),
+            weighted_load,
+            func.coalesce(stats.c.overdue_tasks, 0),
+            func.coalesce(stats.c.due_soon_tasks, 0),
+            # Two-argument min() is SQLite's scalar minimum
+            func.min(100.0, weighted_load * 100.0 / CAPACITY),
+            literal(today),
+        )
+        .select_from(Employee)
+        .outerjoin(stats, stats.c.employee_id == Employee.id)
+        .where(Employee.id.in_(employee_ids))
+    )
+
+
+def _snapshot(db: Session, employee_ids: List[int]) -> Dict[int, tuple]:
+    # employee_id -> (workload_index, ids of the projects with open tasks)
+    Workload, Load = models.EmployeeWorkload, models.EmployeeProjectLoad
+    snapshot = {
+        employee_id: (index, set())
+        for employee_id, index in db.execute(
+            select(Workload.employee_id, Workload.workload_index).where(Workload.employee_id.in_(employee_ids))
+        )
+    }
+    for employee_id, project_id in db.execute(
+        select(Load.employee_id, Load.project_id).where(Load.employee_id.in_(employee_ids))
+    ):
+        snapshot.setdefault(employee_id, (None, set()))[1].add(project_id)
+    return snapshot
+
+
+def _refresh_chunk(db: Session, employee_ids: List[int], today: date) -> set:
+    Task, Workload, Load = models.Task, models.EmployeeWorkload, models.EmployeeProjectLoad
+    before = _snapshot(db, employee_ids)
+
+    # Rows of deleted employees go; the others are rewritten in place
+    db.execute(delete(Workload).where(
+        Workload.employee_id.in_(employee_ids),
+        Workload.employee_id.not_in(select(models.Employee.id)),
+    ))
+    stmt = sqlite_insert(Workload).from_select(
+        ["employee_id", "open_tasks", "weighted_load", "overdue_tasks", "due_soon_tasks", "workload_index", "as_of"],
+        _workload_select(employee_ids, today),
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[Workload.employee_id],
+        set_={name: stmt.excluded[name] for name in (
+            "open_tasks", "weighted_load", "overdue_tasks", "due_soon_tasks", "workload_index", "as_of",
+        )},
+    ))
+
+    db.execute(delete(Load).where(Load.employee_id.in_(employee_ids)))
+    db.execute(insert(Load).from_select(
+        ["employee_id", "project_id", "open_tasks"],
+        select(Task.assignee_id, Task.project_id, func.count())
+        .where(
+            Task.assignee_id.in_(select(models.Employee.id).where(models.Employee.id.in_(employee_ids))),
+            Task.project_id.isnot(None),
+            _open_task(),
+        )
+        .group_by(Task.assignee_id, Task.project_id),
+    ))
+    # A project's average only moves if one of its employees' index changed or an employee joined or left it
+    after = _snapshot(db, employee_ids)
+    projects = set()
+    for employee_id in before.keys() | after.keys():
+        old_index, old_projects = before.get(employee_id, (None, set()))
+        new_index, new_projects = after.get(employee_id, (None, set()))
+        projects |= (old_projects | new_projects) if old_index != new_index else (old_projects ^ new_projects)
+    return projects
+
+
+def refresh_employees(db: Session, employee_ids: Iterable[Optional[int]], today: Optional[date] = None) -> None:
+    """
+    Recomputes the workload of the given employees after their tasks were
+    created, reassigned, edited or deleted, and the employee_workload_index of
+    every project they have open tasks in, before or after the change. Runs
+    inside the caller's transaction and leaves the commit to it.
+    """
+    ids = sorted({employee_id for employee_id in employee_ids if employee_id is not None})
+    if not ids:
+        return
+    today = today or date.today()
+    db.flush()
+    projects = set()
+    for start in range(0, len(ids), REFRESH_CHUNK_SIZE):
+        projects |= _refresh_chunk(db, ids[start:start + REFRESH_CHUNK_SIZE], today)
+    kpi_engine.refresh_workload_index(db, projects)
+
+
+def roll_over(db: Session, today: Optional[date] = None) -> int:
+    """
+    Moves the overdue and due soon counts to `today`. Between the oldest as_of
+    and today, only tasks due in that span or entering the due soon window can
+    change category, so only their assignees are recomputed; the other rows
+    just take the new date. Commits.
+
+    Returns:
+        int: The number of employees recomputed.
+    """
+    today = today or date.today()
+    Task, Workload = models.Task, models.EmployeeWorkload
+    since = db.execute(select(func.min(Workload.as_of))).scalar()
+    if since is None or since >= today:
+        return 0
+    affected = list(db.scalars(
+        select(Task.assignee_id).distinct().where(
+            Task.due_date >= since,
+            Task.due_date <= today + timedelta(days=DUE_SOON_DAYS),
+            Task.assignee_id.isnot(None),
+        )
+    ))
+    refresh_employees(db, affected, today)
+    db.execute(update(Workload).where(Workload.as_of < today).values(as_of=today).execution_options(synchronize_session=False))
+    db.commit()
+    return len(affected)
+
+
+def rebuild(db: Session, today: Optional[date] = None) -> int:
+    """
+    Recomputes the workload of every employee from the task table. Leaves the
+    commit to the caller.
+
+    Returns:
+        int: The number of employees.
+    """
+    employee_ids = list(db.scalars(select(models.Employee.id)))
+    refresh_employees(db, employee_ids, today)
+    return len(employee_ids)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild or roll over the materialized employee workload.")
+    parser.add_argument("command", choices=("rebuild", "roll-over"))
+    parser.add_argument("--today", type=date.fromisoformat, default=None, help="Count overdue and due soon tasks as of this day (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        if args.command == "rebuild":
+            count = rebuild(db, today=args.today)
+            db.commit()
+            print(f"Rebuilt the workload of {count} employees")
+        else:
+            print(f"Recomputed {roll_over(db, today=args.today)} employees")
+        print(f"Ran in {time.perf_counter() - started:.3f}s")
+
+
+if __name__ == "__main__":
+    main()